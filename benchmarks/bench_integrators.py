@@ -0,0 +1,63 @@
+"""
+Benchmarks of the time integrators: the largest `delta_t` at which each integrator keeps the energy error of a
+frictionless, noise-free system within a tolerance, and the CPU time this costs per unit of simulated time.
+
+Run with ``python -m pytest benchmarks/bench_integrators.py``, see conftest.py for the configuration.
+"""
+import numpy as np
+import pytest
+from bench_kernels import measure
+from Integrators import INTEGRATORS
+from ParticleSystem import ParticleSystem
+
+ENERGY_TOLERANCE = 0.01     # largest relative drift of the total energy over the run
+DELTA_TS = [0.2, 0.1, 0.05, 0.02, 0.01, 0.005]
+DURATION = 5.0              # simulated time of every run
+N = 60
+ENERGY_SAMPLES = 20001      # distances the pair potential is tabulated at, see `ParticleSystem.total_energy`
+
+
+def make_system(integrator, delta_t, seed=0):
+    """Builds a small frictionless system without Brownian motion, so that its total energy is conserved."""
+    np.random.seed(seed)
+    color_distribution = {
+        "key1": {"color": (1.0, 0.0, 0.0, 1.0), "n": N // 2, "mass": 20, "bounciness": 1.0},
+        "key2": {"color": (0.0, 1.0, 0.0, 1.0), "n": N - N // 2, "mass": 40, "bounciness": 1.0},
+    }
+    # a symmetric interaction matrix makes the forces conservative
+    interaction_matrix = {(1, 1): {"value": 1}, (1, 2): {"value": -1}, (2, 1): {"value": -1}, (2, 2): {"value": 1}}
+    ps = ParticleSystem(150, 150, color_distribution, interaction_matrix, radius=0.2, delta_t=delta_t, brownian_std=0,
+                        min_vel=-1, max_vel=1, neighbor_strategy="kdtree", integrator=integrator)
+    ps._half_life = np.inf
+    ps.delta_t = delta_t
+    return ps
+
+
+def energy_error(integrator, delta_t):
+    """Largest deviation of the total energy from its initial value over `DURATION`, relative to the initial value."""
+    ps = make_system(integrator, delta_t)
+    e0 = ps.total_energy(samples=ENERGY_SAMPLES)
+    error = 0.0
+    for _ in range(round(DURATION / delta_t)):
+        ps.move_particles()
+        error = max(error, abs(ps.total_energy(samples=ENERGY_SAMPLES) - e0) / abs(e0))
+    return error
+
+
+@pytest.mark.parametrize("integrator", list(INTEGRATORS))
+def test_achievable_delta_t(record, integrator):
+    errors = {}
+    delta_t = None
+    for dt in DELTA_TS:
+        errors[dt] = energy_error(integrator, dt)
+        if errors[dt] <= ENERGY_TOLERANCE:
+            delta_t = dt
+            break
+    # time the steps at the achievable step size, or at the smallest one if the tolerance was never met
+    ps = make_system(integrator, delta_t or DELTA_TS[-1])
+    result = measure(ps.move_particles)
+    record(f"integrator-{integrator}", {
+        "integrator": integrator, "n": N, "tolerance": ENERGY_TOLERANCE, "delta_t": delta_t,
+        "energy_errors": {str(dt): error for dt, error in errors.items()}, **result,
+        "cpu_per_simulated_time": result["seconds"] / delta_t if delta_t else None,
+    })
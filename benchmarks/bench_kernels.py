@@ -0,0 +1,183 @@
+"""
+Benchmarks of the physics kernels across particle counts, densities, radii and class counts.
+
+Run with ``python -m pytest benchmarks/bench_kernels.py``, see conftest.py for the configuration.
+"""
+import os
+import time
+import tracemalloc
+import numpy as np
+import pytest
+from conftest import bench_sizes
+from Ensemble import Ensemble
+from ParticleSystem import ParticleSystem
+from Rasterizer import FrameRenderer
+
+DENSITY = 0.005     # particles per unit area
+RADIUS = 0.5        # particle radius, the interaction radius is 100 times larger
+CLASSES = 2
+MIN_REPEAT = 3
+MAX_REPEAT = 50
+MIN_TIME = 0.5      # seconds spent timing each benchmark
+
+
+def _cases():
+    sizes = bench_sizes()
+    cases = [(n, DENSITY, RADIUS, CLASSES) for n in sizes]
+    # vary one dimension at a time around the smallest size
+    n = sizes[0]
+    cases += [(n, 0.02, RADIUS, CLASSES), (n, DENSITY, 1.0, CLASSES), (n, DENSITY, RADIUS, 8)]
+    return cases
+
+
+CASES = _cases()
+IDS = [f"n{n}-d{density}-r{radius}-c{classes}" for n, density, radius, classes in CASES]
+
+
+def make_system(n, density, radius, classes, seed=0, **options):
+    """Builds a system with `n` particles at a given density and random interaction coefficients, `options` are passed to ParticleSystem."""
+    rng = np.random.default_rng(seed)
+    np.random.seed(seed)
+    side = float(np.sqrt(n / density))
+    color_distribution = {
+        f"key{c}": {"color": (*rng.uniform(0, 1, 3), 1.0), "n": n // classes + (c < n % classes), "mass": int(rng.integers(1, 10)), "bounciness": float(rng.uniform(0, 1))}
+        for c in range(classes)
+    }
+    interaction_matrix = {(i, j): {"value": int(rng.integers(-5, 6))} for i in range(1, classes + 1) for j in range(1, classes + 1)}
+    return ParticleSystem(side, side, color_distribution, interaction_matrix, radius=radius, delta_t=0.0166, neighbor_strategy="kdtree", **options)
+
+
+def measure(fn):
+    """
+    Runs `fn` once to warm up, then times it repeatedly (at least MIN_REPEAT times and MIN_TIME seconds,
+    at most MAX_REPEAT times) and records its peak memory in a separate traced run.
+    """
+    fn()
+    times = []
+    while len(times) < MAX_REPEAT and (len(times) < MIN_REPEAT or sum(times) < MIN_TIME):
+        times.append(_timed(fn))
+    seconds = min(times)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"seconds": seconds, "peak_mb": peak / 1e6}
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def _config(n, density, radius, classes):
+    return {"n": n, "density": density, "radius": radius, "classes": classes}
+
+
+@pytest.mark.parametrize("n, density, radius, classes", CASES, ids=IDS)
+def test_check_collisions(record, n, density, radius, classes):
+    ps = make_system(n, density, radius, classes)
+    pairs = ps.check_collisions(ps.positions, ps._interaction_radius).shape[0]
+    result = measure(lambda: ps.check_collisions(ps.positions, ps._interaction_radius))
+    record(f"check_collisions-{IDS[CASES.index((n, density, radius, classes))]}",
+           {**_config(n, density, radius, classes), **result, "pairs": pairs, "pairs_per_s": pairs / result["seconds"]})
+
+
+@pytest.mark.parametrize("n, density, radius, classes", CASES, ids=IDS)
+def test_force(record, n, density, radius, classes):
+    ps = make_system(n, density, radius, classes)
+    coll = ps.check_collisions(ps.positions, ps._interaction_radius)
+    coefs = np.random.default_rng(1).uniform(-1, 1, coll.shape[0])
+    result = measure(lambda: ps.force(coll[:, 2], coefs))
+    record(f"force-{IDS[CASES.index((n, density, radius, classes))]}",
+           {**_config(n, density, radius, classes), **result, "pairs": coll.shape[0], "pairs_per_s": coll.shape[0] / result["seconds"]})
+
+
+@pytest.mark.parametrize("n, density, radius, classes", CASES, ids=IDS)
+def test_update_velocities_collisions(record, n, density, radius, classes):
+    ps = make_system(n, density * 20, radius, classes)   # dense enough to produce contacts
+    positions = ps.positions.copy()
+    velocity = ps._velocity.copy()
+    coll = ps.check_collisions(positions, 2 * ps._radius)
+
+    def resolve():
+        ps._particles[:] = positions
+        ps._velocity[:] = velocity
+        ps.update_velocities_collisions(positions, coll, mode="collision")
+    result = measure(resolve)
+    record(f"update_velocities_collisions-{IDS[CASES.index((n, density, radius, classes))]}",
+           {**_config(n, density * 20, radius, classes), **result, "pairs": coll.shape[0], "pairs_per_s": coll.shape[0] / result["seconds"]})
+
+
+@pytest.mark.parametrize("n, density, radius, classes", CASES, ids=IDS)
+def test_move_particles(record, n, density, radius, classes):
+    ps = make_system(n, density, radius, classes)
+    pairs = ps.find_neighbor_pairs(ps.positions).shape[0]
+    result = measure(ps.move_particles)
+    record(f"move_particles-{IDS[CASES.index((n, density, radius, classes))]}",
+           {**_config(n, density, radius, classes), **result, "steps_per_s": 1 / result["seconds"], "pairs": pairs, "pairs_per_s": pairs / result["seconds"]})
+
+
+@pytest.mark.parametrize("n", bench_sizes())
+def test_move_particles_float32(record, n):
+    """Throughput of a float32 step against the float64 default on the same configuration."""
+    results = {}
+    for dtype in (np.float64, np.float32):
+        ps = make_system(n, DENSITY, RADIUS, CLASSES, dtype=dtype)
+        results[dtype] = measure(ps.move_particles)
+    result = results[np.float32]
+    record(f"move_particles_float32-n{n}", {
+        **_config(n, DENSITY, RADIUS, CLASSES), **result, "steps_per_s": 1 / result["seconds"],
+        "float64_seconds": results[np.float64]["seconds"], "speedup": results[np.float64]["seconds"] / result["seconds"],
+        "memory_ratio": result["peak_mb"] / results[np.float64]["peak_mb"],
+    })
+
+
+@pytest.mark.parametrize("n", bench_sizes())
+def test_move_particles_fixed_point(record, n):
+    """Throughput of a step with fixed-point coordinates against floating point coordinates."""
+    results = {}
+    for fixed_point in (False, True):
+        ps = make_system(n, DENSITY, RADIUS, CLASSES, fixed_point=fixed_point)
+        results[fixed_point] = measure(ps.move_particles)
+    result = results[True]
+    record(f"move_particles_fixed_point-n{n}", {
+        **_config(n, DENSITY, RADIUS, CLASSES), **result, "steps_per_s": 1 / result["seconds"],
+        "float_seconds": results[False]["seconds"], "speedup": results[False]["seconds"] / result["seconds"],
+    })
+
+
+@pytest.mark.parametrize("n, batch", [(20, 256), (100, 64)], ids=["n20-b256", "n100-b64"])
+def test_ensemble(record, n, batch):
+    """Throughput of one batched Ensemble step against stepping the same number of single systems."""
+    rng = np.random.default_rng(0)
+    side = float(np.sqrt(n / DENSITY))
+    color_distribution = {
+        f"key{c}": {"color": (*rng.uniform(0, 1, 3), 1.0), "n": n // CLASSES, "mass": int(rng.integers(1, 10)), "bounciness": float(rng.uniform(0, 1))}
+        for c in range(CLASSES)
+    }
+    matrices = [{(i, j): {"value": int(rng.integers(-5, 6))} for i in range(1, CLASSES + 1) for j in range(1, CLASSES + 1)} for _ in range(batch)]
+    ensemble = Ensemble(side, side, color_distribution, matrices, list(range(batch)), radius=RADIUS, delta_t=0.0166)
+    singles = [ParticleSystem(side, side, color_distribution, matrix, radius=RADIUS, delta_t=0.0166, neighbor_strategy="kdtree") for matrix in matrices]
+    single = measure(lambda: [ps.move_particles() for ps in singles])
+    result = measure(ensemble.move_particles)
+    record(f"ensemble-n{n}-b{batch}", {
+        "n": n, "batch": batch, **result, "member_steps_per_s": batch / result["seconds"],
+        "single_seconds": single["seconds"], "speedup": single["seconds"] / result["seconds"],
+    })
+
+
+@pytest.mark.parametrize("n", bench_sizes())
+def test_render_frames(record, n):
+    """Throughput of the CPU rasterizer on one process against a pool with one worker per CPU."""
+    ps = make_system(n, DENSITY, RADIUS, CLASSES)
+    frames = [ps.positions.copy()] * 32
+    results = {}
+    for workers in (0, os.cpu_count()):
+        with FrameRenderer(ps.colors, ps.size, (ps._width, ps._height), (1280, 720), workers=workers) as renderer:
+            results[workers] = measure(lambda: list(renderer.render(frames)))
+    result = results[os.cpu_count()]
+    record(f"render_frames-n{n}", {
+        **_config(n, DENSITY, RADIUS, CLASSES), **result, "workers": os.cpu_count(), "frames_per_s": len(frames) / result["seconds"],
+        "serial_seconds": results[0]["seconds"], "speedup": results[0]["seconds"] / result["seconds"],
+    })
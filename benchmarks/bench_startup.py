@@ -0,0 +1,81 @@
+"""
+Benchmarks of the startup: the time to import the simulation and the GUI, and the time from a fresh interpreter
+to the first rendered frame of a headless system. Each is measured in new processes, so that modules imported by
+earlier benchmarks do not hide the cost. Unlike the kernel benchmarks these also fail without a baseline once
+they exceed a fixed budget.
+
+Run with ``python -m pytest benchmarks/bench_startup.py``, see conftest.py for the configuration.
+"""
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import pytest
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), "../src"))
+REPEATS = 5                 # fresh processes per measurement, the fastest one counts
+IMPORT_BUDGET = 0.5         # seconds to import ParticleSystem
+GUI_IMPORT_BUDGET = 1.5     # seconds to import the GUI module, without creating a window
+FIRST_FRAME_BUDGET = 1.0    # seconds from the start of the interpreter to the first rendered frame
+FIRST_FRAME_N = 1_000
+HEAVY_MODULES = ("scipy", "matplotlib", "vispy")
+
+# every script prints a JSON object with the measured "seconds" and the imported heavy modules
+IMPORT_SCRIPT = """
+import json, resource, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                  "loaded": sorted({{m.split(".")[0] for m in sys.modules}} & set({heavy}))}}))
+"""
+
+FIRST_FRAME_SCRIPT = """
+import json, resource, sys, time
+start = time.perf_counter()
+import numpy as np
+from ParticleSystem import ParticleSystem
+from Rasterizer import rasterize
+np.random.seed(0)
+color_distribution = {{
+    "key1": {{"color": (1.0, 0.0, 0.0, 1.0), "n": {n} // 2, "mass": 1, "bounciness": 0.8}},
+    "key2": {{"color": (0.0, 1.0, 0.0, 1.0), "n": {n} - {n} // 2, "mass": 3, "bounciness": 1.0}},
+}}
+relationships = {{(1, 1): {{"value": 2}}, (1, 2): {{"value": -3}}, (2, 1): {{"value": 1}}, (2, 2): {{"value": 0}}}}
+ps = ParticleSystem(100, 100, color_distribution, relationships, radius=0.5, delta_t=0.01)
+ps.move_particles()
+rasterize(ps.positions, ps.colors, ps.size, (100, 100), (640, 360))
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                  "loaded": sorted({{m.split(".")[0] for m in sys.modules}} & set({heavy}))}}))
+"""
+
+
+def run_fresh(script: str) -> dict:
+    """Runs a script in new interpreters with src/ on the path and returns the result of the fastest run."""
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [SRC, os.environ.get("PYTHONPATH")]))}
+    runs = []
+    for _ in range(REPEATS):
+        out = subprocess.run([sys.executable, "-c", script], env=env, check=True, capture_output=True, text=True).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+    return min(runs, key=lambda run: run["seconds"])
+
+
+@pytest.mark.parametrize("module, budget", [("ParticleSystem", IMPORT_BUDGET), ("GUI", GUI_IMPORT_BUDGET)])
+def test_import_time(record, module, budget):
+    """Import time of a module in a fresh interpreter, SciPy, matplotlib and VisPy must not be imported."""
+    if module == "GUI" and importlib.util.find_spec("PySide6") is None:
+        pytest.skip("PySide6 is not installed")
+    result = run_fresh(IMPORT_SCRIPT.format(module=module, heavy=HEAVY_MODULES))
+    record(f"import-{module}", {**result, "budget": budget})
+    assert not result["loaded"], f"importing {module} loads {', '.join(result['loaded'])}"
+    assert result["seconds"] <= budget, f"importing {module} takes {result['seconds']:.3f}s, the budget is {budget}s"
+
+
+def test_time_to_first_frame(record):
+    """Time to import, build a system, advance it one step and rasterize it, the heavy modules loaded on the way are reported."""
+    result = run_fresh(FIRST_FRAME_SCRIPT.format(n=FIRST_FRAME_N, heavy=HEAVY_MODULES))
+    record(f"first_frame-n{FIRST_FRAME_N}", {**result, "budget": FIRST_FRAME_BUDGET})
+    assert result["seconds"] <= FIRST_FRAME_BUDGET, \
+        f"the first frame takes {result['seconds']:.3f}s, the budget is {FIRST_FRAME_BUDGET}s"
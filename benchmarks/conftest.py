@@ -0,0 +1,62 @@
+import sys
+import os
+import json
+import platform
+import pytest
+
+# Set src/ as the root directory for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+# Benchmarks are configured through environment variables so they run with a plain pytest call:
+#   BENCH_PROFILE           "quick" (default) or "full" (sweeps N up to 1M)
+#   BENCH_SIZES             comma separated particle counts, overrides the profile
+#   BENCH_OUTPUT            JSON file the results are written to
+#   BENCH_BASELINE          JSON file of an earlier run to compare against
+#   BENCH_THRESHOLD         allowed relative slowdown before a benchmark fails (default 0.25)
+#   BENCH_MEMORY_THRESHOLD  allowed relative growth of peak memory (default 0.10)
+PROFILES = {
+    "quick": [1_000, 10_000],
+    "full": [1_000, 10_000, 100_000, 1_000_000],
+}
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(__file__), "results.json")
+
+
+def bench_sizes():
+    if os.environ.get("BENCH_SIZES"):
+        return [int(n) for n in os.environ["BENCH_SIZES"].split(",")]
+    return PROFILES[os.environ.get("BENCH_PROFILE", "quick")]
+
+
+@pytest.fixture(scope="session")
+def baseline():
+    path = os.environ.get("BENCH_BASELINE")
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+@pytest.fixture(scope="session")
+def bench_results():
+    results = {}
+    yield results
+    with open(os.environ.get("BENCH_OUTPUT", DEFAULT_OUTPUT), "w") as f:
+        json.dump({"machine": platform.platform(), "python": platform.python_version(), "results": results}, f, indent=2)
+
+
+@pytest.fixture
+def record(bench_results, baseline):
+    """Stores a benchmark result and fails if it regressed against the baseline."""
+    threshold = float(os.environ.get("BENCH_THRESHOLD", "0.25"))
+    memory_threshold = float(os.environ.get("BENCH_MEMORY_THRESHOLD", "0.10"))
+
+    def _record(key, result):
+        bench_results[key] = result
+        reference = baseline.get(key)
+        if reference is None:
+            return
+        assert result["seconds"] <= reference["seconds"] * (1 + threshold), \
+            f"{key}: {result['seconds']:.4f}s is more than {threshold:.0%} slower than the baseline {reference['seconds']:.4f}s"
+        assert result["peak_mb"] <= reference["peak_mb"] * (1 + memory_threshold) + 0.1, \
+            f"{key}: peak memory {result['peak_mb']:.1f}MB exceeds the baseline {reference['peak_mb']:.1f}MB by more than {memory_threshold:.0%}"
+    return _record
@@ -0,0 +1,110 @@
+import numpy as np
+
+MIN_CLUSTER_SIZE = 3        # smallest connected group of particles counted as a cluster
+
+
+class ClusterAnalysis:
+    """
+    Finds clusters as connected components of the graph whose edges are the particle pairs closer than a
+    threshold of their class pair. The edges are taken from pair lists that were computed anyway (the
+    neighbor search of a step), so the analysis never searches for neighbors itself.
+
+    The edge buffer only grows and is reused between analyses, pairs can be added in several batches
+    (e.g. one per chunk of a memory-bounded step) between `begin` and `finish`.
+    """
+
+    GROWTH = 1.5
+
+    def __init__(self, thresholds: np.ndarray, min_size: int = MIN_CLUSTER_SIZE):
+        """
+        Parameters
+        ----------
+        thresholds : np.ndarray
+            A (K, K) array with the largest distance at which two particles of classes i+1 and j+1 are
+            connected. Pair lists hold each pair in either order, so it should be symmetric.
+        min_size : int, optional
+            Smallest number of particles of a reported cluster (default is MIN_CLUSTER_SIZE).
+        """
+        self.thresholds = np.asarray(thresholds, dtype=np.float64)
+        self.min_size = min_size
+        self._edges = np.empty((0, 2), dtype=np.intp)
+        self._count = 0
+
+    def begin(self):
+        """ Starts collecting the edges of a new analysis """
+        self._count = 0
+
+    def add_pairs(self, coll_arr: np.ndarray, classes: np.ndarray, ordered: bool = False):
+        """
+        Adds the pairs of a pair list that are closer than the threshold of their class pair.
+
+        Parameters
+        ----------
+        coll_arr : np.ndarray
+            A 2D array in the format of `ParticleSystem.check_collisions`, only columns 0 to 2 are used.
+        classes : np.ndarray
+            A 1D array with the 0-based class of every particle.
+        ordered : bool, optional
+            Whether the list holds every pair in both orders, which makes no difference for the undirected
+            graph (default is False).
+        """
+        if coll_arr.shape[0] == 0:
+            return
+        i_idx, j_idx = coll_arr[:, 0].astype(np.intp), coll_arr[:, 1].astype(np.intp)
+        k = self.thresholds.shape[1]
+        limit = np.take(self.thresholds.ravel(), classes[i_idx] * k + classes[j_idx])
+        keep = np.flatnonzero(coll_arr[:, 2] <= limit)
+        end = self._count + keep.shape[0]
+        if end > self._edges.shape[0]:
+            edges = np.empty((int(end * self.GROWTH) + 1, 2), dtype=np.intp)
+            edges[:self._count] = self._edges[:self._count]
+            self._edges = edges
+        self._edges[self._count:end, 0] = i_idx[keep]
+        self._edges[self._count:end, 1] = j_idx[keep]
+        self._count = end
+
+    def finish(self, classes: np.ndarray) -> dict:
+        """
+        Computes the connected components of the collected edges.
+
+        Parameters
+        ----------
+        classes : np.ndarray
+            A 1D array with the 0-based class of every particle.
+
+        Returns
+        -------
+        dict
+            - "clusters": number of components with at least `min_size` particles.
+            - "sizes": a 1D array with their sizes, largest first.
+            - "composition": a 2D array of shape (clusters, K) counting the particles of each class per
+              cluster, in the order of "sizes".
+            - "labels": a 1D array with the cluster (index into "sizes") of every stored particle, -1 for
+              particles outside of any cluster.
+            - "largest_cluster", "clustered_fraction": the fraction of particles in the largest component
+              and in any cluster.
+        """
+        from scipy.sparse import coo_matrix     # deferred like the KD-tree, see NeighborSearch
+        from scipy.sparse.csgraph import connected_components
+        n = classes.shape[0]
+        k = self.thresholds.shape[1]
+        edges = self._edges[:self._count]
+        adjacency = coo_matrix((np.ones(edges.shape[0], dtype=np.int8), (edges[:, 0], edges[:, 1])), shape=(n, n))
+        _, components = connected_components(adjacency, directed=False)
+        sizes = np.bincount(components, minlength=1 if n else 0)
+        # clusters are numbered by decreasing size, smaller components map to -1
+        order = np.argsort(-sizes, kind='stable')
+        order = order[sizes[order] >= self.min_size]
+        index = np.full(sizes.shape[0], -1)
+        index[order] = np.arange(order.shape[0])
+        labels = index[components]
+        clustered = labels >= 0
+        composition = np.bincount(labels[clustered] * k + classes[clustered], minlength=order.shape[0] * k).reshape(order.shape[0], k)
+        return {
+            "clusters": int(order.shape[0]),
+            "sizes": sizes[order],
+            "composition": composition,
+            "labels": labels,
+            "largest_cluster": float(sizes.max(initial=0) / n) if n else 0.0,
+            "clustered_fraction": float(sizes[order].sum() / n) if n else 0.0,
+        }
@@ -0,0 +1,230 @@
+import numpy as np
+from NeighborSearch import KDTreeSearch
+from ParticleSystem import ParticleSystem
+
+UNSUPPORTED = ("reorder_interval", "memory_budget", "swept", "neighbor_strategy", "fixed_point", "rdf_interval", "cluster_interval", "adaptive_dt")
+
+
+class Ensemble(ParticleSystem):
+    """
+    A batch of independent particle systems that share the simulation area and particle classes but have their
+    own interaction matrix and seed. All members are stored in one set of flat arrays, member b owning the
+    particles b * N to (b + 1) * N - 1, so that a single vectorized step advances all of them at once.
+    """
+
+    def __init__(self, width: int, height: int, color_distribution: dict, interaction_matrices: list[dict], seeds: list[int], **kwargs):
+        """
+        Parameters
+        ----------
+        width : int
+            The width of the simulation area of every member.
+        height : int
+            The height of the simulation area of every member.
+        color_distribution : dict
+            The particle classes of every member, see `ParticleSystem`.
+        interaction_matrices : list of dict
+            The interaction matrix of each member, see `ParticleSystem`.
+        seeds : list of int
+            The seed of each member. Member b starts from the same state and draws the same Brownian motion as
+            a `ParticleSystem` created after `np.random.seed(seeds[b])`.
+        **kwargs
+            Further arguments of `ParticleSystem`, shared by all members. Reordering, memory budgets, swept
+            collisions, fixed-point coordinates, the choice of the neighbor search, the radial distribution
+            function and the cluster analysis (which would both pool the stacked members) and adaptive time
+            steps (the fastest member would set the step of all) are not supported.
+
+        Raises
+        ------
+        ValueError
+            If the number of interaction matrices and seeds differ or an unsupported argument is given.
+
+        Attributes
+        ----------
+        _batch_size : int
+            Number of members B.
+        _member_size : int
+            Number of particles N of each member.
+        _member : np.ndarray
+            A 1D array with the member index of each particle.
+        _coefficients : np.ndarray
+            A 3D array of shape (B, K, K) with the interaction coefficients of each member.
+        _active : np.ndarray
+            A boolean array of the same shape marking the class pairs that interact in either direction.
+        _row : np.ndarray
+            A 1D array with the flat offset of each particle's row (member and class) in `_coefficients`.
+        _column : np.ndarray
+            A 1D array with the column (class) of each particle in `_coefficients`.
+        _generators : list of np.random.RandomState
+            The random number generator of each member.
+        _search : KDTreeSearch
+            The batched neighbor search.
+        """
+        if len(interaction_matrices) != len(seeds) or len(seeds) == 0:
+            raise ValueError("An ensemble needs one interaction matrix per seed and at least one member")
+        unsupported = [key for key in UNSUPPORTED if key in kwargs]
+        if unsupported:
+            raise ValueError(f"Ensembles do not support {unsupported}")
+
+        global_state = np.random.get_state()
+        members = []
+        self._generators = []
+        for interaction_matrix, seed in zip(interaction_matrices, seeds):
+            np.random.seed(seed)
+            members.append(ParticleSystem(width, height, color_distribution, interaction_matrix, **kwargs))
+            # continue the member's random stream where its initialization left it
+            generator = np.random.RandomState()
+            generator.set_state(np.random.get_state())
+            self._generators.append(generator)
+        super().__init__(width, height, color_distribution, interaction_matrices[0], **kwargs)
+        np.random.set_state(global_state)
+
+        self._batch_size = len(members)
+        self._member_size = members[0].positions.shape[0]
+        self._member = np.repeat(np.arange(self._batch_size), self._member_size)
+        for name in ("_particles", "_velocity", "_colors", "_color_index", "_restitution", "_mass"):
+            setattr(self, name, np.concatenate([getattr(member, name) for member in members], axis=0))
+        self.interaction_matrix = interaction_matrices
+        classes = self._coefficients.shape[1]
+        self._column = self._color_index[:, 0] - 1
+        self._row = (self._member * classes + self._column) * classes
+        n = self._particles.shape[0]
+        self._check_particle_count(n)
+        self._ids = np.arange(n)
+        self._slots = np.arange(n)
+        self._integrator.bind(n, self._dtype)
+        self._search = KDTreeSearch()
+
+    @ParticleSystem.interaction_matrix.setter
+    def interaction_matrix(self, value):
+        """
+        Sets new interaction matrices and rebuilds the coefficients of the members.
+
+        Parameters
+        ----------
+        value : list of dict
+            The interaction matrix of each member, see `ParticleSystem`.
+
+        Raises
+        ------
+        ValueError
+            If the number of matrices differs from the number of members.
+        """
+        if isinstance(value, dict) or len(value) != self._batch_size:
+            raise ValueError(f"An ensemble of {self._batch_size} members needs a list of {self._batch_size} interaction matrices")
+        value = list(value)
+        self._interaction_matrix = value
+        self._coefficients = np.stack([self.create_interaction_matrix(matrix) for matrix in value])
+        self._active = (self._coefficients != 0) | (self._coefficients != 0).transpose(0, 2, 1)
+
+    @property
+    def batch_size(self):
+        """
+        Retrieves the number of members.
+
+        Returns
+        -------
+        int
+            Number of members B.
+        """
+        return self._batch_size
+
+    @property
+    def batch_positions(self):
+        """
+        Retrieves the particle positions of all members.
+
+        Returns
+        -------
+        np.ndarray
+            A 3D array of shape (B, N, 2), a view of `positions`.
+        """
+        return self._particles.reshape(self._batch_size, self._member_size, 2)
+
+    @property
+    def batch_velocities(self):
+        """
+        Retrieves the particle velocities of all members.
+
+        Returns
+        -------
+        np.ndarray
+            A 3D array of shape (B, N, 2), a view of the velocities.
+        """
+        return self._velocity.reshape(self._batch_size, self._member_size, 2)
+
+    def _brownian_acceleration(self) -> np.ndarray:
+        """
+        Draws the Brownian acceleration of each member from its own random stream.
+        """
+        return np.concatenate([generator.normal(0, self._brownian_std, (self._member_size, 2)) for generator in self._generators]).astype(self._dtype, copy=False)
+
+    def check_collisions(self, positions: np.ndarray, radius: float, scratch: bool = False, fixed: np.ndarray | None = None) -> np.ndarray:
+        """
+        Finds all pairs within `radius` inside every member with a single search. The members are stacked along
+        a third, periodic axis with a spacing larger than `radius`, so particles of different members are never
+        paired.
+
+        Parameters
+        ----------
+        positions : np.ndarray
+            A 2D array of the particle positions of all members.
+        radius : float
+            The search radius.
+        scratch : bool, optional
+            Whether the result may be written into a scratch buffer, see `ParticleSystem.check_collisions`
+            (default is False).
+        fixed : np.ndarray, optional
+            Unused, ensembles do not support fixed-point coordinates.
+
+        Returns
+        -------
+        np.ndarray
+            See `ParticleSystem.check_collisions`.
+        """
+        spacing = 4 * max(self._width, self._height, radius)
+        stacked = np.column_stack((positions, self._member * spacing))
+        pairs = self._search.pairs(stacked, radius, [self._width, self._height, self._batch_size * spacing])
+        return self.pair_data(positions, pairs, out=self._state.buffer("pairs", pairs.shape[0], 5) if scratch else None)
+
+    def find_neighbor_pairs(self, positions: np.ndarray, scratch: bool = False, fixed: np.ndarray | None = None) -> np.ndarray:
+        """
+        Detects all pairs that contribute to the next step. Pairs of classes that do not interact within their
+        member are dropped beyond the short-range repulsion, as in `ParticleSystem.find_neighbor_pairs`.
+
+        Parameters
+        ----------
+        positions : np.ndarray
+            A 2D array of the particle positions of all members.
+        scratch : bool, optional
+            Whether the result may be written into a scratch buffer, see `ParticleSystem.check_collisions`
+            (default is False).
+        fixed : np.ndarray, optional
+            Unused, ensembles do not support fixed-point coordinates.
+
+        Returns
+        -------
+        np.ndarray
+            See `ParticleSystem.find_neighbor_pairs`.
+        """
+        coll_arr = self.check_collisions(positions, self._interaction_radius, scratch)
+        if coll_arr.shape[0] == 0:
+            return coll_arr
+        i_idx, j_idx = coll_arr[:, 0].astype(int), coll_arr[:, 1].astype(int)
+        short_radius = max(self._beta * self._interaction_radius, 2 * self._radius)
+        keep = (coll_arr[:, 2] <= short_radius) | self._active.ravel()[self._row[i_idx] + self._column[j_idx]]
+        return coll_arr[keep]
+
+    def pair_coefficients(self, i_idx: np.ndarray, j_idx: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        """ Looks up the interaction coefficient of each pair in the matrix of its member, see `ParticleSystem.pair_coefficients` """
+        k = i_idx.shape[0]
+        flat = np.take(self._row, i_idx, out=self._state.buffer("coef_row", k, dtype=self._row.dtype))
+        flat += np.take(self._column, j_idx, out=self._state.buffer("coef_column", k, dtype=self._column.dtype))
+        return np.take(self._coefficients.ravel(), flat, out=out)
+
+    def add_particles(self, cls: int, n: int, positions: np.ndarray | None = None, velocities: np.ndarray | None = None) -> np.ndarray:
+        """ Not supported, the members of an ensemble have a fixed size """
+        raise ValueError("Ensembles do not support adding particles")
+
+    def remove_particles(self, mask: np.ndarray) -> np.ndarray:
+        """ Not supported, the members of an ensemble have a fixed size """
+        raise ValueError("Ensembles do not support removing particles")
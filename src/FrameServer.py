@@ -0,0 +1,405 @@
+import argparse
+import asyncio
+import json
+import math
+import struct
+import zlib
+import numpy as np
+from ParticleSystem import ParticleSystem
+
+QUANTIZATION = 2**16        # positions are sent as uint16 steps of width / 2**16 and height / 2**16
+COMPRESSION = 1             # zlib level of the frame payloads, deltas of slowly moving particles compress well
+HEADER = struct.Struct("<BI")       # message type, payload length
+FRAME_HEADER = struct.Struct("<II")   # frame index, number of particles
+MAX_CONTROL_BYTES = 1 << 16     # largest message payload a client may send, the connection is closed beyond
+
+# message types, INFO to ERROR are sent by the server, CONTROL by clients
+INFO = 1        # JSON with "width", "height", "classes" and "quantization"
+KEYFRAME = 2    # frame header, then zlib compressed ids (uint32), classes (uint16) and positions (uint16, (N, 2))
+DELTA = 3       # frame header, then zlib compressed position deltas (uint16, (N, 2)) modulo 2**16
+ERROR = 4       # JSON with "error"
+CONTROL = 16    # JSON with "interaction": a list of [i, j, value] entries of the interaction matrix
+
+
+def quantize(positions: np.ndarray, box: np.ndarray) -> np.ndarray:
+    """
+    Maps positions in the simulation area to uint16 coordinates. The mapping is periodic like the area,
+    positions that round up to the far edge map to 0.
+
+    Parameters
+    ----------
+    positions : np.ndarray
+        A 2D array of shape (N, 2) with positions in [0, width) and [0, height).
+    box : np.ndarray
+        Width and height of the simulation area.
+
+    Returns
+    -------
+    np.ndarray
+        A uint16 array of shape (N, 2).
+    """
+    return (np.rint(positions * (QUANTIZATION / np.asarray(box, dtype=np.float64))).astype(np.int64) % QUANTIZATION).astype(np.uint16)
+
+
+def dequantize(quantized: np.ndarray, box: np.ndarray) -> np.ndarray:
+    """
+    Inverts `quantize` up to half a quantization step.
+
+    Parameters
+    ----------
+    quantized : np.ndarray
+        A uint16 array of shape (N, 2).
+    box : np.ndarray
+        Width and height of the simulation area.
+
+    Returns
+    -------
+    np.ndarray
+        A float64 array of shape (N, 2).
+    """
+    return quantized * (np.asarray(box, dtype=np.float64) / QUANTIZATION)
+
+
+def encode(kind: int, payload: bytes) -> bytes:
+    """ Prefixes a payload with the message header """
+    return HEADER.pack(kind, len(payload)) + payload
+
+
+async def read_message(reader: asyncio.StreamReader, max_length: int | None = None) -> tuple:
+    """
+    Reads one message.
+
+    Parameters
+    ----------
+    reader : asyncio.StreamReader
+        The connection.
+    max_length : int, optional
+        Largest accepted payload in bytes, checked before the payload is read (default is None, any).
+
+    Returns
+    -------
+    tuple
+        The message type and its payload.
+
+    Raises
+    ------
+    asyncio.IncompleteReadError
+        If the connection was closed.
+    ValueError
+        If the payload is longer than `max_length`.
+    """
+    kind, length = HEADER.unpack(await reader.readexactly(HEADER.size))
+    if max_length is not None and length > max_length:
+        raise ValueError(f"Message of {length} bytes exceeds the limit of {max_length} bytes")
+    return kind, await reader.readexactly(length)
+
+
+class Frame:
+    """ The quantized positions of one published step, shared by all clients """
+
+    __slots__ = ("classes", "ids", "index", "layout", "quantized")
+
+    def __init__(self, index: int, quantized: np.ndarray, layout: int, ids: np.ndarray, classes: np.ndarray):
+        self.index = index
+        self.quantized = quantized
+        self.layout = layout    # changes whenever the storage order or the particle set changed
+        self.ids = ids
+        self.classes = classes
+
+
+class _Client:
+    """ Connection state of one client, holding only the newest unsent frame so that slow clients drop frames """
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.task = asyncio.current_task()
+        self.latest = None      # newest frame not yet sent
+        self.sent = None        # last frame sent, the reference of the next delta
+        self.ready = asyncio.Event()
+        self.frames = 0
+        self.dropped = 0
+
+    def offer(self, frame: Frame):
+        if self.latest is not None:
+            self.dropped += 1
+        self.latest = frame
+        self.ready.set()
+
+
+class FrameServer:
+    """
+    Streams the positions of a running ParticleSystem to remote viewers over TCP and lets them adjust the
+    interaction matrix.
+
+    Every published frame is quantized once to uint16 coordinates. Each client is sent the difference to the
+    last frame it received (modulo 2**16, so wrap-around at the periodic boundaries stays small), or a keyframe
+    with the particle ids and classes when it has none or the particles were reordered, added or removed.
+    Clients that cannot keep up only ever get the newest frame, the frames in between are dropped for them
+    alone. Control messages are applied between steps.
+    """
+
+    def __init__(self, ps: ParticleSystem, host: str = "127.0.0.1", port: int = 0, fps: float = 60.0):
+        """
+        Parameters
+        ----------
+        ps : ParticleSystem
+            The system to simulate and stream.
+        host : str, optional
+            Address to bind, e.g. "0.0.0.0" for the LAN (default is "127.0.0.1", local only).
+        port : int, optional
+            Port to bind, 0 picks a free port (default is 0).
+        fps : float, optional
+            Largest number of steps and frames per second of `run`, None for no limit (default is 60).
+        """
+        self.ps = ps
+        self.host = host
+        self.port = port
+        self.fps = fps
+        self.frame = None
+        self._box = np.array([ps._width, ps._height], dtype=np.float64)
+        self._index = 0
+        self._layout = 0
+        self._ids = None
+        self._classes = None
+        self._clients = set()
+        self._controls = []
+        self._server = None
+
+    @property
+    def clients(self):
+        """
+        Retrieves the number of connected clients.
+
+        Returns
+        -------
+        int
+            Number of connected clients.
+        """
+        return len(self._clients)
+
+    async def start(self):
+        """ Starts accepting clients, `port` is set to the bound port """
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        """ Disconnects all clients and stops accepting new ones """
+        if self._server is None:
+            return
+        self._server.close()
+        clients = list(self._clients)
+        for client in clients:
+            client.writer.close()
+        await asyncio.gather(*(client.task for client in clients), return_exceptions=True)
+        await self._server.wait_closed()
+        self._server = None
+
+    async def run(self, steps: int | None = None):
+        """
+        Steps the system and publishes a frame after every step. The steps run in a worker thread, so that
+        clients are served meanwhile.
+
+        Parameters
+        ----------
+        steps : int, optional
+            Number of steps, None to run until cancelled (default is None).
+        """
+        loop = asyncio.get_running_loop()
+        step = 0
+        while steps is None or step < steps:
+            start = loop.time()
+            self.apply_controls()
+            await loop.run_in_executor(None, self.ps.move_particles)
+            self.publish()
+            step += 1
+            delay = 1 / self.fps - (loop.time() - start) if self.fps else 0
+            await asyncio.sleep(max(delay, 0))
+
+    def publish(self) -> Frame:
+        """
+        Quantizes the current positions into a new frame and offers it to every client.
+
+        Returns
+        -------
+        Frame
+            The published frame.
+        """
+        ids, classes = self.ps.ids, self.ps._color_index[:, 0]
+        if self._ids is None or not (np.array_equal(ids, self._ids) and np.array_equal(classes, self._classes)):
+            self._layout += 1
+            self._ids = ids.astype(np.uint32)
+            self._classes = classes.astype(np.uint16)
+        self._index += 1
+        self.frame = Frame(self._index, quantize(self.ps.positions, self._box), self._layout, self._ids, self._classes)
+        for client in self._clients:
+            client.offer(self.frame)
+        return self.frame
+
+    def apply_controls(self):
+        """ Applies the control messages received since the last step """
+        if not self._controls:
+            return
+        # an ensemble holds one matrix per member, the controls apply to all of them
+        matrices = self.ps.interaction_matrix
+        single = isinstance(matrices, dict)
+        matrices = [{key: dict(val) for key, val in matrix.items()} for matrix in ([matrices] if single else matrices)]
+        for matrix in matrices:
+            for i, j, value in self._controls:
+                matrix[(i, j)] = {**matrix.get((i, j), {}), "value": value}
+        self.ps.interaction_matrix = matrices[0] if single else matrices
+        self._controls = []
+
+    def _control(self, client: _Client, payload: bytes):
+        """ Validates a control message and queues it for `apply_controls`, errors are reported to the client """
+        classes = len(self.ps._color_distribution)
+        try:
+            entries = json.loads(payload)["interaction"]
+            controls = [(int(i), int(j), float(value)) for i, j, value in entries]
+            if any(not (1 <= i <= classes and 1 <= j <= classes) for i, j, _ in controls):
+                raise ValueError(f"Particle classes must be between 1 and {classes}")
+            if not all(math.isfinite(value) for _, _, value in controls):
+                raise ValueError("Interaction values must be finite")
+        except (ValueError, KeyError, TypeError) as error:
+            client.writer.write(encode(ERROR, json.dumps({"error": str(error)}).encode()))
+            return
+        self._controls += controls
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        client = _Client(writer)
+        info = {"width": float(self._box[0]), "height": float(self._box[1]), "classes": len(self.ps._color_distribution), "quantization": QUANTIZATION}
+        writer.write(encode(INFO, json.dumps(info).encode()))
+        self._clients.add(client)
+        if self.frame is not None:
+            client.offer(self.frame)
+        sender = asyncio.create_task(self._send_frames(client))
+        try:
+            while True:
+                kind, payload = await read_message(reader, MAX_CONTROL_BYTES)
+                if kind == CONTROL:
+                    self._control(client, payload)
+        except ValueError as error:
+            # an oversized message is not read, the stream cannot be resynchronized
+            writer.write(encode(ERROR, json.dumps({"error": str(error)}).encode()))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._clients.discard(client)
+            sender.cancel()
+            writer.close()
+
+    async def _send_frames(self, client: _Client):
+        try:
+            while True:
+                await client.ready.wait()
+                client.ready.clear()
+                frame, client.latest = client.latest, None
+                header = FRAME_HEADER.pack(frame.index, frame.quantized.shape[0])
+                if client.sent is None or client.sent.layout != frame.layout:
+                    body = frame.ids.tobytes() + frame.classes.tobytes() + frame.quantized.tobytes()
+                    client.writer.write(encode(KEYFRAME, header + zlib.compress(body, COMPRESSION)))
+                else:
+                    delta = frame.quantized - client.sent.quantized    # wraps modulo 2**16
+                    client.writer.write(encode(DELTA, header + zlib.compress(delta.tobytes(), COMPRESSION)))
+                client.sent = frame
+                client.frames += 1
+                await client.writer.drain()
+        except ConnectionError:
+            pass
+
+
+class FrameClient:
+    """ Minimal client of a FrameServer that decodes the frames into positions """
+
+    def __init__(self):
+        self.info = None
+        self.index = 0
+        self.ids = None
+        self.classes = None
+        self.quantized = None
+        self.errors = []
+        self._reader = None
+        self._writer = None
+
+    async def connect(self, host: str, port: int):
+        """ Connects and reads the INFO message, raises a ValueError if the server sends anything else first """
+        self._reader, self._writer = await asyncio.open_connection(host, port)
+        kind, payload = await read_message(self._reader)
+        if kind != INFO:
+            self._writer.close()
+            raise ValueError(f"Expected an INFO message, received type {kind}")
+        self.info = json.loads(payload)
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+
+    @property
+    def positions(self):
+        """
+        Retrieves the positions of the last received frame.
+
+        Returns
+        -------
+        np.ndarray
+            A 2D array of shape (N, 2), in the storage order of the server, see `ids`.
+        """
+        return dequantize(self.quantized, [self.info["width"], self.info["height"]])
+
+    async def receive(self) -> int:
+        """
+        Waits for the next frame and applies it, error messages received meanwhile are collected in `errors`.
+
+        Returns
+        -------
+        int
+            The index of the frame.
+        """
+        while True:
+            kind, payload = await read_message(self._reader)
+            if kind == ERROR:
+                self.errors.append(json.loads(payload)["error"])
+                continue
+            index, n = FRAME_HEADER.unpack_from(payload)
+            body = zlib.decompress(payload[FRAME_HEADER.size:])
+            if kind == KEYFRAME:
+                self.ids = np.frombuffer(body, dtype=np.uint32, count=n)
+                self.classes = np.frombuffer(body, dtype=np.uint16, count=n, offset=4 * n)
+                self.quantized = np.frombuffer(body, dtype=np.uint16, offset=6 * n).reshape(n, 2)
+            elif kind == DELTA:
+                self.quantized = self.quantized + np.frombuffer(body, dtype=np.uint16).reshape(n, 2)
+            self.index = index
+            return index
+
+    async def set_interaction(self, entries: list):
+        """
+        Asks the server to change entries of the interaction matrix before its next step.
+
+        Parameters
+        ----------
+        entries : list
+            [i, j, value] entries with 1-based classes, like the keys of the interaction matrix.
+        """
+        self._writer.write(encode(CONTROL, json.dumps({"interaction": entries}).encode()))
+        await self._writer.drain()
+
+
+if __name__ == "__main__":
+    from Sweep import build_system
+
+    parser = argparse.ArgumentParser(description="Simulate a configuration headless and stream its frames to remote viewers")
+    parser.add_argument("config", help="JSON file with a configuration in the format of Sweep.build_system")
+    parser.add_argument("--host", default="127.0.0.1", help="address to bind, 0.0.0.0 to serve the LAN")
+    parser.add_argument("--port", type=int, default=8765, help="port to bind")
+    parser.add_argument("--fps", type=float, default=60, help="largest number of steps per second")
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        config = json.load(f)
+
+    async def serve():
+        server = FrameServer(build_system(config), args.host, args.port, args.fps)
+        await server.start()
+        print(f"Streaming on {args.host}:{server.port}")
+        await server.run()
+
+    asyncio.run(serve())
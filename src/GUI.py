@@ -1,29 +1,57 @@
-from PySide6.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QGridLayout, QWidget, 
-QPushButton, QHBoxLayout, QSlider, QLabel, QSizePolicy, QSpacerItem)
-from PySide6.QtCore import Qt
+from PySide6.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QWidget, 
+QPushButton, QHBoxLayout, QSlider, QLabel, QScrollArea)
+from PySide6.QtCore import Qt, QTimer
 from PySide6.QtGui import QColor, QScreen, QPalette
-from matplotlib.pyplot import get_cmap
-from VisPyStack import Canvas
 import random
 
 
-from custom_widgets.Widgets import PopupWidget, CustomColorPicker, SquareWidget
+from custom_widgets.Widgets import PopupWidget, CustomColorPicker, LogSlider, RelationshipMatrix
 
 PADDING = 5
 SPLIT = 4
 TICK_RATE = 20
 CIRCLE_SION = 2
 BORDER = 40
-NPARTICLES = 5
+NPARTICLES = 64
 RELATIONSHIPS = 10
-MAX_PARTICLES = 750
+MAX_PARTICLES = 1_000_000
+DEFAULT_PARTICLES = 375
 MAX_PARTICLE_MASS = 10
 MIN_PARTICLE_MASS = 1
 MAX_PARTICLE_BOUNCINESS = 1
 MAX_BOUNCINESS_STEPS = 100
 SCALING_FACTOR = 0.77
 COLOR_MAP = "viridis"
+COLOR_TABLES = {        #Key colors of the color maps, sampled evenly, so that matplotlib is not needed at startup
+    "viridis": ("#440154", "#482475", "#414487", "#355f8d", "#2a788e", "#21918c", "#22a884", "#44bf70", "#7ad151", "#bddf26", "#fde725"),
+}
 STEP_SIZE = 3          
+
+
+def sample_colormap(table: tuple, n: int) -> list:
+    """Samples a color map evenly by linear interpolation between its key colors
+    
+    Parameters
+    ----------
+    table : tuple[str]
+        Hex codes of the key colors, evenly spaced from 0 to 1
+    n : int
+        Number of colors
+    
+    Returns
+    -------
+    list[tuple[float, float, float, float]]
+        RGBA colors from the start to the end of the color map
+    """
+    keys = [tuple(int(code[k:k+2], 16) / 255 for k in (1, 3, 5)) for code in table]
+    colors = []
+    for i in range(n):
+        t = i / (n - 1) * (len(keys) - 1) if n > 1 else 0
+        lo = min(int(t), len(keys) - 2)
+        frac = t - lo
+        colors.append(tuple(a + (b - a) * frac for a, b in zip(keys[lo], keys[lo+1])) + (1.0,))
+    return colors
+
                 
 class MainWindow(QMainWindow):
     """ Main window for the particle simulation """
@@ -36,7 +64,8 @@ class MainWindow(QMainWindow):
         """
         super().__init__()
         
-        self.cmap = get_cmap(COLOR_MAP, RELATIONSHIPS+1) #Set color theme 
+        self.cmap = sample_colormap(COLOR_TABLES[COLOR_MAP], RELATIONSHIPS+1) #Set color theme 
+        self.rel_colors = {val: QColor(self.get_cmap_color(val)) for val in range(-RELATIONSHIPS//2, RELATIONSHIPS//2+1)}    #Colors of all relationship values, computed once
         self.color_distrubution = {}    #Dictionary to store color distribution for particles
         self.relationships = {}        #Dictionary to store relationships between particles
         
@@ -60,18 +89,17 @@ class MainWindow(QMainWindow):
         
         particle_widget = QWidget()    #Initialize the widget to hold particle color settings
         self.particle_layout = QVBoxLayout(particle_widget, alignment=Qt.AlignTop)
-        ctrl_layout.addWidget(particle_widget)
+        particle_scroll = QScrollArea(widgetResizable=True, frameShape=QScrollArea.NoFrame)   #Scroll through many particle classes
+        particle_scroll.setWidget(particle_widget)
+        ctrl_layout.addWidget(particle_scroll)
         
         self.adder_btn = QPushButton("+", styleSheet="color: white; font-size: 20px; font-weight: bold; background-color: #31313a;") #Button to add particle class
         self.adder_btn.clicked.connect(self.add_particle_color)   #Connect button to add_particle_color method
         ctrl_layout.addWidget(self.adder_btn)   #Add button to layout with all controls
         
-        rel_matrix = SquareWidget() #Widget to hold relationship matrix
-        self.rel_layout = QGridLayout(rel_matrix)   
-        self.rel_layout.setSpacing(3)  #Set spacing between elements in the layout
-        ctrl_layout.addWidget(rel_matrix)
-        
-        ctrl_layout.addSpacerItem(QSpacerItem(0, 0, QSizePolicy.Expanding, QSizePolicy.Expanding)) #Add spacer to push elements to the top
+        self.rel_matrix = RelationshipMatrix(self.rel_colors) #Single painted widget for the relationship matrix
+        self.rel_matrix.cellClicked.connect(self.show_relationship_slider)
+        ctrl_layout.addWidget(self.rel_matrix)
         
         self.save_btn = QPushButton("Save", styleSheet="color: white; font-size: 20px; background-color: #31313a;") #Button to save particle settings
         self.save_btn.hide()   #Hide the button until particle settings are added
@@ -84,8 +112,11 @@ class MainWindow(QMainWindow):
         ctrl_layout.addWidget(self.reset_btn)
         
         refresh_rate = round(app.primaryScreen().refreshRate()) #Get user-screen refresh rate
-        self.canvas = Canvas(bgcolor='#24242b', screen_refresh_rate=refresh_rate, particle_scaling_factor=SCALING_FACTOR) #Canvas to hold particle simulation
-        self.canvas_layout.addWidget(self.canvas.native)
+        self.refresh_rate = refresh_rate
+        self.canvas = None  #Canvas to hold particle simulation, created on the first save so that VisPy is not imported at startup
+        
+        self.flush_timer = QTimer(singleShot=True, interval=round(1000/refresh_rate))  #Coalesces setting changes, the running simulation gets them at most once per frame
+        self.flush_timer.timeout.connect(self.flush_settings)
         
         self.show()
         
@@ -105,34 +136,21 @@ class MainWindow(QMainWindow):
             color = QColor.fromRgbF(random.random(), random.random(), random.random(), 1)
             
             btn = QPushButton(styleSheet=f"background-color: {color.name()};")
-            color_box1 = QWidget(styleSheet=f"background-color: {color.name()};")
-            color_box2 = QWidget(styleSheet=f"background-color: {color.name()};")
-            color_box1.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-            color_box2.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-            self.color_distrubution[btn] = {"color": color.getRgbF(), "n": int(MAX_PARTICLES//2), "mass": MIN_PARTICLE_MASS, "bounciness": float(MAX_PARTICLE_BOUNCINESS)}
-            btn.clicked.connect(lambda: self.show_color_settings(btn, [color_box1, color_box2]))
-            _c_layout.addWidget(btn, 1)
+            self.color_distrubution[btn] = {"color": color.getRgbF(), "n": DEFAULT_PARTICLES, "mass": MIN_PARTICLE_MASS, "bounciness": float(MAX_PARTICLE_BOUNCINESS)}
             n = len(self.color_distrubution)
-            self.rel_layout.addWidget(color_box1, n, 0)
-            self.rel_layout.addWidget(color_box2, 0, n)
+            btn.clicked.connect(lambda: self.show_color_settings(btn, n))
+            _c_layout.addWidget(btn, 1)
+            self.rel_matrix.add_class(color)
             
-            label = QLabel(str(MAX_PARTICLES//2), styleSheet="color: white;")
-            slider = QSlider(Qt.Horizontal)
-            slider.setRange(1, MAX_PARTICLES)
-            slider.setValue(MAX_PARTICLES//2)
-            slider.valueChanged.connect(lambda val: self.n_particle_slider_changed(val, label, btn))
+            label = QLabel(str(DEFAULT_PARTICLES), styleSheet="color: white;")
+            slider = LogSlider(MAX_PARTICLES)   #Log scale, so that single particles and a million are both reachable
+            slider.setCount(DEFAULT_PARTICLES)
+            slider.countChanged.connect(lambda val: self.n_particle_slider_changed(val, label, btn))
             _c_layout.addWidget(slider, SPLIT+1)
             _c_layout.addWidget(label, 1)
-            for i in range(1, n+1):
-                for j in range(1, n+1):
-                    if i == n or j == n:
-                        rel_btn = QPushButton(styleSheet=f"background-color: {self.get_cmap_color(0)}; margin: 0; padding: 0; border-radius: 0;")
-                        rel_btn.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-                        rel_btn.clicked.connect(lambda _, i=i, j=j: self.show_relationship_slider(i, j))
-                        self.rel_layout.addWidget(rel_btn, i, j)
-                        entry = self.relationships.get((i, j), { "button": [], "value": 0 })
-                        entry["button"].append(rel_btn)
-                        self.relationships[(i, j)] = entry
+            for k in range(1, n+1):
+                self.relationships[(n, k)] = {"value": 0}
+                self.relationships[(k, n)] = {"value": 0}
             if len(self.color_distrubution) == 1:
                 self.save_btn.show()
                 self.reset_btn.show()
@@ -178,27 +196,27 @@ class MainWindow(QMainWindow):
         j : int
             Second color index
         """
-        for btn in self.relationships[(i, j)]["button"]:
-            btn.setStyleSheet(f"background-color: {self.get_cmap_color(val)}; margin: 0; padding: 0; border-radius: 0;")
+        self.rel_matrix.set_value(i, j, val)
         label.setText(str(val))
         self.relationships[(i, j)]["value"] = val
+        self.schedule_settings()
                 
-    def show_color_settings(self, btn: QPushButton, boxes=list[QWidget]):
+    def show_color_settings(self, btn: QPushButton, k: int):
         """Opens a popup window with color, mass and restitution setting for a particle class
         
         Parameters
         ----------
         btn : QPushButton
             Button that opened the popup window
-        boxes : list[QWidget]
-            Only passed to color_changed method
+        k : int
+            Index of the particle class, only passed to color_changed method
         """
         pop = PopupWidget(self)
         pop.setStyleSheet("background-color: #31313a;")
         lyt = QVBoxLayout(pop)
         cp = CustomColorPicker()
         cp.setCurrentColor(btn.palette().color(QPalette.Button))
-        cp.currentColorChanged.connect(lambda color: self.color_changed(color, btn, boxes))
+        cp.currentColorChanged.connect(lambda color: self.color_changed(color, btn, k))
         lyt.addWidget(cp)
         mass_box = QWidget()
         mass_layout = QHBoxLayout(mass_box)
@@ -226,7 +244,7 @@ class MainWindow(QMainWindow):
         lyt.addWidget(bounciness_box)
         pop.show()
         
-    def color_changed(self, color: QColor, btn: QPushButton, boxes=list[QWidget]):
+    def color_changed(self, color: QColor, btn: QPushButton, k: int):
         """
         Callback function for color picker
         
@@ -234,12 +252,13 @@ class MainWindow(QMainWindow):
         ----------
         btn : QPushButton
             Button to change color of
-        boxes : list[QWidget]
-            List of color boxes in relationship matrix to change color of
+        k : int
+            Index of the particle class in the relationship matrix
         """
         btn.setStyleSheet(f"background-color: {color.name()};")
-        for i in boxes: i.setStyleSheet(f"background-color: {color.name()};")
+        self.rel_matrix.set_class_color(k, color)
         self.color_distrubution[btn]["color"] = color.getRgbF()
+        self.schedule_settings()
         
     def config_slider_changed(self, val:int|float, key: str, btn: QPushButton, label: QLabel):
         """Callback for mass and restitution sliders
@@ -258,6 +277,7 @@ class MainWindow(QMainWindow):
         val_str = str(val) if isinstance(val, int) else str(val).ljust(4, "0")
         label.setText(str(val_str))
         self.color_distrubution[btn][key] = val
+        self.schedule_settings()
 
     def n_particle_slider_changed(self, val, label: QLabel, btn: QPushButton):
         """Callback function for number of particles slider
@@ -273,6 +293,31 @@ class MainWindow(QMainWindow):
         """
         label.setText(str(val))
         self.color_distrubution[btn]["n"] = val
+        self.schedule_settings()
+
+    def schedule_settings(self):
+        """Schedules passing the changed settings to a running simulation, changes until then are coalesced"""
+        if not self.flush_timer.isActive():
+            self.flush_timer.start()
+
+    def flush_settings(self):
+        """Passes the current settings to the running simulation, if the particle classes still match it"""
+        if self.canvas is not None:
+            self.canvas.update_data(self.color_distrubution, self.relationships, rebuild=False)
+
+    def get_canvas(self):
+        """Creates the VisPy canvas on first use
+        
+        Returns
+        -------
+        Canvas
+            The canvas displaying the particle simulation
+        """
+        if self.canvas is None:
+            from VisPyStack import Canvas   #Deferred, importing VisPy takes longer than building the window
+            self.canvas = Canvas(bgcolor='#24242b', screen_refresh_rate=self.refresh_rate, particle_scaling_factor=SCALING_FACTOR)
+            self.canvas_layout.addWidget(self.canvas.native)
+        return self.canvas
 
     def get_cmap_color(self, idx):
         """Get color in hex-format from color map
@@ -287,7 +332,7 @@ class MainWindow(QMainWindow):
         str
             Hex color code
         """
-        return QColor.fromRgbF(*self.cmap(int(RELATIONSHIPS/2)+idx)).name()
+        return QColor.fromRgbF(*self.cmap[int(RELATIONSHIPS/2)+idx]).name()
     
     def clear_layout(self, layout):
         """Clears a given layout of all widgets
@@ -307,9 +352,9 @@ class MainWindow(QMainWindow):
     def saved(self):
         """Callback of save button
         
-        Passes all the user settings to the VisPy Stack
+        Passes all the user settings to the VisPy Stack, a running simulation is updated in place
         """ 
-        self.canvas.insert_data(self.color_distrubution, self.relationships) # load data
+        self.get_canvas().update_data(self.color_distrubution, self.relationships) # load data
         
     def reset(self):
         """Callback of reset button
@@ -319,8 +364,10 @@ class MainWindow(QMainWindow):
         self.color_distrubution = {}
         self.relationships = {}
         self.clear_layout(self.particle_layout)
-        self.clear_layout(self.rel_layout)
-        self.canvas.reset()
+        self.rel_matrix.clear()
+        self.flush_timer.stop()
+        if self.canvas is not None:
+            self.canvas.reset()
         self.adder_btn.show()
         self.save_btn.hide()
         self.reset_btn.hide()
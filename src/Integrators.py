@@ -0,0 +1,212 @@
+import numpy as np
+
+
+def _displacement(system) -> np.ndarray:
+    """ Computes `velocity * delta_t` of a system into the scratch buffer "delta_pos" of its state """
+    return np.multiply(system._velocity, system._delta_t, out=system._state.buffer("delta_pos", system._velocity.shape[0], 2))
+
+
+class EulerIntegrator:
+    """
+    The original explicit update of `ParticleSystem`: the Brownian kick is added on top of the doubled velocity,
+    the tentative positions are only used to detect contacts, and the interaction step replaces the velocity by
+    `acc * delta_t` and moves the particles from their previous positions.
+    """
+
+    commit_drift = False    # whether the tentative positions of a step become the new positions
+
+    def bind(self, n: int, dtype=np.float64):
+        """ Allocates the buffers for `n` particles, the Euler update needs none """
+
+    def permute(self, perm: np.ndarray):
+        """ Applies a storage permutation of the particles to the buffers, the Euler update has none """
+
+    def move(self, source: np.ndarray, target: np.ndarray):
+        """ Applies a move of particles in storage to the buffers, the Euler update has none """
+
+    def begin(self, system, noise: np.ndarray) -> np.ndarray:
+        """
+        Updates the velocities at the start of a step.
+
+        Parameters
+        ----------
+        system : ParticleSystem
+            The system whose velocities are updated in place.
+        noise : np.ndarray
+            A 2D array of shape (N, 2) with the Brownian acceleration of this step, used as scratch.
+
+        Returns
+        -------
+        np.ndarray
+            The displacement of each particle during the step, a scratch buffer of the system's state.
+        """
+        noise *= system._delta_t
+        noise += system._velocity
+        system._velocity += noise
+        return _displacement(system)
+
+    def predict_velocity(self, system, noise: np.ndarray) -> np.ndarray:
+        """
+        Predicts the velocities `begin` will move the particles with, without changing the system.
+
+        Parameters
+        ----------
+        system : ParticleSystem
+            The system at the start of a step.
+        noise : np.ndarray
+            A 2D array of shape (N, 2) with the Brownian acceleration of the step.
+
+        Returns
+        -------
+        np.ndarray
+            A new 2D array of shape (N, 2) with the velocity of each particle during the step.
+        """
+        return system._velocity + system._velocity + noise * system._delta_t
+
+    def finish(self, system, acc: np.ndarray):
+        """
+        Completes a step with the interaction accelerations at the new positions.
+
+        Parameters
+        ----------
+        system : ParticleSystem
+            The system whose velocities and positions are updated in place.
+        acc : np.ndarray
+            A 2D array of shape (N, 2) with the interaction acceleration of each particle.
+        """
+        system._velocity *= system._friction_fact
+        np.multiply(acc, system._delta_t, out=system._velocity)
+        system._translate(_displacement(system), system._particles, system._state.fixed)
+
+
+
+class _CachedAccelerationIntegrator:
+    """ Base of the integrators that reuse the interaction accelerations of the previous step's end positions """
+
+    commit_drift = True
+
+    GROWTH = 1.5    # spare capacity allocated when particles are added
+
+    def __init__(self):
+        self._acc_storage = np.zeros((0, 2))
+        self._kick_storage = np.zeros((0, 2))
+        self._acc = self._acc_storage
+        self._kick = self._kick_storage
+
+    def bind(self, n: int, dtype=np.float64):
+        """
+        Sizes the buffers for `n` particles. The cached accelerations of the first particles are kept if only
+        the count changes, those of added particles start from zero. Buffers keep spare capacity and are only
+        reallocated if it is exhausted or the precision changes, the cached accelerations then restart from zero.
+
+        Parameters
+        ----------
+        n : int
+            Number of particles.
+        dtype : np.dtype, optional
+            Floating point precision of the buffers (default is np.float64).
+        """
+        if self._acc.shape[0] == n and self._acc.dtype == dtype:
+            return
+        if self._acc_storage.shape[0] < n or self._acc_storage.dtype != dtype:
+            capacity = int(n * self.GROWTH) + 1 if self._acc_storage.shape[0] else n
+            acc = np.zeros((capacity, 2), dtype=dtype)
+            if self._acc_storage.dtype == dtype:
+                acc[:self._acc.shape[0]] = self._acc
+            self._acc_storage = acc
+            self._kick_storage = np.zeros((capacity, 2), dtype=dtype)
+        else:
+            self._acc_storage[self._acc.shape[0]:n] = 0
+        self._acc = self._acc_storage[:n]
+        self._kick = self._kick_storage[:n]
+
+    def permute(self, perm: np.ndarray):
+        """
+        Applies a storage permutation of the particles to the cached accelerations.
+
+        Parameters
+        ----------
+        perm : np.ndarray
+            The permutation, new storage index k holds the particle previously stored at perm[k].
+        """
+        self._acc[:] = self._acc[perm]
+
+    def move(self, source: np.ndarray, target: np.ndarray):
+        """
+        Applies a move of particles in storage to the cached accelerations.
+
+        Parameters
+        ----------
+        source : np.ndarray
+            Storage indices the particles are moved from.
+        target : np.ndarray
+            Storage indices the particles are moved to.
+        """
+        self._acc[target] = self._acc[source]
+
+
+class VelocityVerletIntegrator(_CachedAccelerationIntegrator):
+    """
+    Symplectic velocity Verlet (kick-drift-kick). The interaction accelerations at the end of a step are cached
+    and provide the first half kick of the next one, so every step needs a single neighbor search and force
+    evaluation like the Euler update. Friction is applied as an exact decay split evenly around both half kicks
+    and the Brownian acceleration is added to the first half kick.
+    """
+
+    def begin(self, system, noise: np.ndarray) -> np.ndarray:
+        """ Half kick with the cached and Brownian accelerations, see `EulerIntegrator.begin` """
+        half_dt = 0.5 * system._delta_t
+        np.add(self._acc, noise, out=self._kick)
+        self._kick *= half_dt
+        system._velocity *= np.sqrt(system._friction_fact)
+        system._velocity += self._kick
+        return _displacement(system)
+
+    def predict_velocity(self, system, noise: np.ndarray) -> np.ndarray:
+        """ Velocities after the first half kick, see `EulerIntegrator.predict_velocity` """
+        return system._velocity * np.sqrt(system._friction_fact) + (self._acc + noise) * (0.5 * system._delta_t)
+
+    def finish(self, system, acc: np.ndarray):
+        """ Second half kick with the accelerations at the new positions, see `EulerIntegrator.finish` """
+        self._acc[:] = acc
+        np.multiply(acc, 0.5 * system._delta_t, out=self._kick)
+        system._velocity += self._kick
+        system._velocity *= np.sqrt(system._friction_fact)
+
+
+class SemiImplicitIntegrator(_CachedAccelerationIntegrator):
+    """
+    Semi-implicit (symplectic) Euler with exact friction: the velocity is advanced first with the accelerations
+    at the current positions and the positions follow with the new velocity. Friction and accelerations are
+    integrated exactly over the step, `v' = f * v + a * (1 - f) / gamma` with `f = exp(-gamma * delta_t)`, so
+    the update stays stable for any friction half-life, unlike multiplying by `1 - gamma * delta_t`.
+    """
+
+    def begin(self, system, noise: np.ndarray) -> np.ndarray:
+        """ Full kick with the cached and Brownian accelerations, see `EulerIntegrator.begin` """
+        np.add(self._acc, noise, out=self._kick)
+        self._kick *= self._gain(system)
+        system._velocity *= system._friction_fact
+        system._velocity += self._kick
+        return _displacement(system)
+
+    def predict_velocity(self, system, noise: np.ndarray) -> np.ndarray:
+        """ Velocities after the full kick, see `EulerIntegrator.predict_velocity` """
+        return system._velocity * system._friction_fact + (self._acc + noise) * self._gain(system)
+
+    @staticmethod
+    def _gain(system) -> float:
+        """ Time constant of the friction integrated over the step, delta_t in the frictionless limit """
+        f = system._friction_fact
+        return (1 - f) * system._half_life / np.log(2) if f < 1 else system._delta_t
+
+    def finish(self, system, acc: np.ndarray):
+        """ Caches the accelerations at the new positions for the next step, see `EulerIntegrator.finish` """
+        self._acc[:] = acc
+
+
+INTEGRATORS = {
+    "euler": EulerIntegrator,
+    "verlet": VelocityVerletIntegrator,
+    "semi_implicit": SemiImplicitIntegrator,
+}
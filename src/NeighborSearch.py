@@ -0,0 +1,329 @@
+import numpy as np
+
+BRUTE_FORCE_LIMIT = 2000
+DROP_FACTOR = 4
+
+
+def _within(positions_a: np.ndarray, positions_b: np.ndarray, i_idx: np.ndarray, j_idx: np.ndarray, radius: float, boxsize) -> np.ndarray:
+    """
+    Checks which candidate pairs are within a radius under periodic boundaries.
+
+    Parameters
+    ----------
+    positions_a : np.ndarray
+        A 2D array of positions the indices `i_idx` refer to.
+    positions_b : np.ndarray
+        A 2D array of positions the indices `j_idx` refer to.
+    i_idx : np.ndarray
+        Indices of the first particle of each candidate pair.
+    j_idx : np.ndarray
+        Indices of the second particle of each candidate pair.
+    radius : float
+        The search radius.
+    boxsize : sequence of float
+        Width and height of the periodic simulation area.
+
+    Returns
+    -------
+    np.ndarray
+        A boolean mask selecting the candidates with a distance of at most `radius`.
+    """
+    width, height = boxsize
+    dx = (positions_a[i_idx, 0] - positions_b[j_idx, 0] + width/2) % width - width/2
+    dy = (positions_a[i_idx, 1] - positions_b[j_idx, 1] + height/2) % height - height/2
+    return dx**2 + dy**2 <= radius**2
+
+
+class KDTreeSearch:
+    """ Neighbor search with a periodic cKDTree """
+
+    def __init__(self, leafsize: int = 16, balanced_tree: bool = True, compact_nodes: bool = True):
+        """
+        Parameters
+        ----------
+        leafsize : int, optional
+            Number of points at which the tree switches to brute force (default is 16).
+        balanced_tree : bool, optional
+            Split at the median instead of the midpoint, slower to build but faster to query (default is True).
+        compact_nodes : bool, optional
+            Shrink the hyperrectangles to the data range (default is True).
+        """
+        self.leafsize = leafsize
+        self.balanced_tree = balanced_tree
+        self.compact_nodes = compact_nodes
+
+    def _tree(self, positions, boxsize):
+        from scipy.spatial import cKDTree   # deferred to the first search, importing SciPy takes longer than building a system
+        return cKDTree(positions, leafsize=self.leafsize, balanced_tree=self.balanced_tree, compact_nodes=self.compact_nodes, boxsize=boxsize)
+
+    def pairs(self, positions: np.ndarray, radius: float, boxsize) -> np.ndarray:
+        """
+        Finds all pairs i < j within `radius`.
+
+        Parameters
+        ----------
+        positions : np.ndarray
+            A 2D array of particle positions.
+        radius : float
+            The search radius.
+        boxsize : sequence of float
+            Width and height of the periodic simulation area.
+
+        Returns
+        -------
+        np.ndarray
+            A 2D integer array of shape (K, 2) containing the indices of each pair.
+        """
+        return self._tree(positions, boxsize).query_pairs(r=radius, output_type='ndarray')
+
+    def cross_pairs(self, positions_a: np.ndarray, positions_b: np.ndarray, radius: float, boxsize) -> np.ndarray:
+        """
+        Finds all pairs between two sets of particles within `radius`.
+
+        Parameters
+        ----------
+        positions_a : np.ndarray
+            A 2D array of positions of the first set.
+        positions_b : np.ndarray
+            A 2D array of positions of the second set.
+        radius : float
+            The search radius.
+        boxsize : sequence of float
+            Width and height of the periodic simulation area.
+
+        Returns
+        -------
+        np.ndarray
+            A 2D integer array of shape (K, 2), column 0 indexes `positions_a` and column 1 `positions_b`.
+        """
+        sub = self._tree(positions_a, boxsize).sparse_distance_matrix(self._tree(positions_b, boxsize), radius, output_type='ndarray')
+        return np.column_stack((sub['i'], sub['j']))
+
+
+class BruteForceSearch:
+    """ Neighbor search with a blocked all-pairs distance matrix, fastest for small particle counts """
+
+    def __init__(self, block_size: int = 512):
+        """
+        Parameters
+        ----------
+        block_size : int, optional
+            Number of rows of the distance matrix evaluated at once, bounds the memory to block_size * N (default is 512).
+        """
+        self.block_size = block_size
+
+    def _block_mask(self, block: np.ndarray, positions: np.ndarray, radius: float, boxsize) -> np.ndarray:
+        """ Boolean (B, N) matrix of all pairs between a block of rows and `positions` within `radius` """
+        box = np.asarray(boxsize, dtype=float)
+        diff = block[:, None, :] - positions[None, :, :]
+        diff = (diff + box/2) % box - box/2
+        return np.einsum('ijk,ijk->ij', diff, diff) <= radius**2
+
+    def pairs(self, positions: np.ndarray, radius: float, boxsize) -> np.ndarray:
+        """ Finds all pairs i < j within `radius`, see `KDTreeSearch.pairs` """
+        n = positions.shape[0]
+        result = [np.empty((0, 2), dtype=np.intp)]
+        for start in range(0, n, self.block_size):
+            stop = min(start + self.block_size, n)
+            # only columns j > i can form pairs
+            mask = np.triu(self._block_mask(positions[start:stop], positions[start:], radius, boxsize), k=1)
+            i_idx, j_idx = np.nonzero(mask)
+            result.append(np.column_stack((i_idx + start, j_idx + start)))
+        return np.concatenate(result, axis=0)
+
+    def cross_pairs(self, positions_a: np.ndarray, positions_b: np.ndarray, radius: float, boxsize) -> np.ndarray:
+        """ Finds all pairs between two sets within `radius`, see `KDTreeSearch.cross_pairs` """
+        result = [np.empty((0, 2), dtype=np.intp)]
+        for start in range(0, positions_a.shape[0], self.block_size):
+            stop = min(start + self.block_size, positions_a.shape[0])
+            i_idx, j_idx = np.nonzero(self._block_mask(positions_a[start:stop], positions_b, radius, boxsize))
+            result.append(np.column_stack((i_idx + start, j_idx)))
+        return np.concatenate(result, axis=0)
+
+
+class CellListSearch:
+    """ Neighbor search with a uniform grid of cells at least `radius` wide, suited for large dense scenes """
+
+    def _candidates(self, positions_a: np.ndarray, positions_b: np.ndarray, radius: float, boxsize):
+        """
+        Lists all particles of `positions_b` in the 3x3 cell neighborhood of each particle of `positions_a`.
+
+        Returns
+        -------
+        tuple of np.ndarray or None
+            Candidate indices into `positions_a` and `positions_b`, or None if the grid has less than three
+            cells along an axis and neighboring cells would repeat.
+        """
+        box = np.asarray(boxsize, dtype=float)
+        n_cells = np.maximum((box // radius).astype(np.int64), 1)
+        if (n_cells < 3).any():
+            return None
+        cell_size = box / n_cells
+        cells_b = (positions_b // cell_size).astype(np.int64) % n_cells
+        cell_b = cells_b[:, 1] * n_cells[0] + cells_b[:, 0]
+        order = np.argsort(cell_b, kind='stable')
+        counts = np.bincount(cell_b, minlength=n_cells.prod())
+        starts = np.cumsum(counts) - counts
+        cells_a = (positions_a // cell_size).astype(np.int64) % n_cells
+
+        i_list, j_list = [], []
+        for ox in (-1, 0, 1):
+            for oy in (-1, 0, 1):
+                cell = ((cells_a[:, 1] + oy) % n_cells[1]) * n_cells[0] + (cells_a[:, 0] + ox) % n_cells[0]
+                k = counts[cell]
+                i_idx = np.repeat(np.arange(positions_a.shape[0]), k)
+                offsets = np.arange(i_idx.shape[0]) - np.repeat(np.cumsum(k) - k, k)
+                i_list.append(i_idx)
+                j_list.append(order[np.repeat(starts[cell], k) + offsets])
+        return np.concatenate(i_list), np.concatenate(j_list)
+
+    def pairs(self, positions: np.ndarray, radius: float, boxsize) -> np.ndarray:
+        """ Finds all pairs i < j within `radius`, see `KDTreeSearch.pairs` """
+        candidates = self._candidates(positions, positions, radius, boxsize)
+        if candidates is None:
+            return BruteForceSearch().pairs(positions, radius, boxsize)
+        i_idx, j_idx = candidates
+        upper = j_idx > i_idx
+        i_idx, j_idx = i_idx[upper], j_idx[upper]
+        mask = _within(positions, positions, i_idx, j_idx, radius, boxsize)
+        return np.column_stack((i_idx[mask], j_idx[mask]))
+
+    def cross_pairs(self, positions_a: np.ndarray, positions_b: np.ndarray, radius: float, boxsize) -> np.ndarray:
+        """ Finds all pairs between two sets within `radius`, see `KDTreeSearch.cross_pairs` """
+        candidates = self._candidates(positions_a, positions_b, radius, boxsize)
+        if candidates is None:
+            return BruteForceSearch().cross_pairs(positions_a, positions_b, radius, boxsize)
+        i_idx, j_idx = candidates
+        mask = _within(positions_a, positions_b, i_idx, j_idx, radius, boxsize)
+        return np.column_stack((i_idx[mask], j_idx[mask]))
+
+
+STRATEGIES = {
+    "brute": BruteForceSearch(),
+    "kdtree": KDTreeSearch(),
+    "kdtree_fast_build": KDTreeSearch(leafsize=32, balanced_tree=False, compact_nodes=False),
+    "cells": CellListSearch(),
+}
+
+
+class NeighborSearch:
+    """ Runtime auto-tuner that benchmarks the neighbor search strategies on live frames and locks in the fastest """
+
+    def __init__(self, strategy: str = "auto", trial_frames: int = 3):
+        """
+        Parameters
+        ----------
+        strategy : str, optional
+            Either "auto" to benchmark all strategies, or the name of a strategy in `STRATEGIES` to use it
+            unconditionally (default is "auto").
+        trial_frames : int, optional
+            Number of frames every candidate is timed before the fastest is chosen (default is 3).
+
+        Raises
+        ------
+        ValueError
+            If the strategy is unknown.
+        """
+        if strategy != "auto" and strategy not in STRATEGIES:
+            raise ValueError(f"Neighbor search strategy must be 'auto' or one of {list(STRATEGIES)}")
+        self._auto = strategy == "auto"
+        self._strategy = "kdtree" if self._auto else strategy
+        self._trial_frames = trial_frames
+        self._signature = None
+        self._queue = []
+        self._timings = {}
+
+    @property
+    def strategy(self):
+        """
+        Retrieves the name of the strategy currently in use.
+
+        Returns
+        -------
+        str
+            The strategy name, a key of `STRATEGIES`.
+        """
+        return self._strategy
+
+    @property
+    def search(self):
+        """
+        Retrieves the search object of the strategy currently in use.
+
+        Returns
+        -------
+        KDTreeSearch | BruteForceSearch | CellListSearch
+            The active search object.
+        """
+        return STRATEGIES[self._strategy]
+
+    @property
+    def tuning(self):
+        """
+        Whether candidates are still being benchmarked.
+
+        Returns
+        -------
+        bool
+            True until the fastest strategy has been locked in.
+        """
+        return bool(self._queue)
+
+    @property
+    def timings(self):
+        """
+        Retrieves the measured frame times of the last tuning round.
+
+        Returns
+        -------
+        dict[str, float]
+            Median time in seconds per frame for each benchmarked strategy.
+        """
+        return {name: float(np.median(times)) for name, times in self._timings.items()}
+
+    def select(self, signature: tuple, n_particles: int):
+        """
+        Chooses the strategy for the coming frame. A new tuning round is started whenever the configuration
+        signature changes.
+
+        Parameters
+        ----------
+        signature : tuple
+            Hashable description of everything the best strategy depends on (particle count, radii, box size, ...).
+        n_particles : int
+            Number of particles, brute force is only benchmarked up to `BRUTE_FORCE_LIMIT`.
+
+        Returns
+        -------
+        KDTreeSearch | BruteForceSearch | CellListSearch
+            The search object to use for this frame.
+        """
+        if self._auto and signature != self._signature:
+            self._signature = signature
+            self._timings = {}
+            candidates = [name for name in STRATEGIES if name != "brute" or n_particles <= BRUTE_FORCE_LIMIT]
+            self._queue = [name for name in candidates for _ in range(self._trial_frames)]
+        if self._queue:
+            self._strategy = self._queue[0]
+        return self.search
+
+    def record(self, elapsed: float):
+        """
+        Records the time the last frame selected by `select` took, locking in the fastest strategy
+        once all candidates have been measured. Candidates slower than `DROP_FACTOR` times the best
+        median so far are dropped without running their remaining trial frames.
+
+        Parameters
+        ----------
+        elapsed : float
+            Duration of the frame's neighbor search in seconds.
+        """
+        if not self._queue:
+            return
+        name = self._queue.pop(0)
+        best = min(self.timings.values(), default=np.inf)
+        self._timings.setdefault(name, []).append(elapsed)
+        if elapsed > DROP_FACTOR * best:
+            self._queue = [queued for queued in self._queue if queued != name]
+        if not self._queue:
+            self._strategy = min(self._timings, key=lambda name: np.median(self._timings[name]))
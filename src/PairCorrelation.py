@@ -0,0 +1,113 @@
+import numpy as np
+
+
+class PairCorrelation:
+    """
+    Running average of the radial distribution function g(r) per ordered class pair, accumulated from pair lists
+    that were computed anyway (the neighbor search of a step) with one `np.bincount` per list.
+
+    g_ab(r) is the number of b particles at distance r from an a particle, divided by the number expected for
+    uniformly distributed particles at the same density in the periodic simulation area. Each sample adds to the
+    pair histogram and to the expected pair density, so that particle counts may change between samples.
+    """
+
+    def __init__(self, classes: int, r_max: float, bins: int, area: float):
+        """
+        Parameters
+        ----------
+        classes : int
+            Number of particle classes K.
+        r_max : float
+            Largest distance of the histogram, at most the radius of the pair search and half the smaller side
+            of the simulation area.
+        bins : int
+            Number of distance bins of width `r_max / bins`.
+        area : float
+            Area of the simulation area.
+        """
+        if bins < 1:
+            raise ValueError("Number of bins must be at least 1")
+        self.classes = classes
+        self.r_max = r_max
+        self.bins = bins
+        self.area = area
+        self.reset()
+
+    def reset(self):
+        """ Discards all samples """
+        self.samples = 0
+        self._counts = np.zeros(self.classes * self.classes * self.bins, dtype=np.int64)
+        self._density = np.zeros((self.classes, self.classes))    # summed expected pair density per sample
+        self._reach = np.full((self.classes, self.classes), np.inf)
+
+    def begin(self):
+        """ Starts a sample, its pairs may be added in several batches """
+
+    def add_pairs(self, coll_arr: np.ndarray, classes: np.ndarray, ordered: bool = False):
+        """
+        Adds the pair distances of a pair list to the histogram.
+
+        Parameters
+        ----------
+        coll_arr : np.ndarray
+            A 2D array in the format of `ParticleSystem.check_collisions`, only columns 0 to 2 are used.
+        classes : np.ndarray
+            A 1D array with the 0-based class of every particle.
+        ordered : bool, optional
+            Whether the list holds every pair in both orders, otherwise each pair is counted for both of its
+            class orders (default is False).
+        """
+        if coll_arr.shape[0] == 0:
+            return
+        distance = coll_arr[:, 2]
+        inside = distance < self.r_max
+        if not inside.all():
+            coll_arr, distance = coll_arr[inside], distance[inside]
+        bin_idx = (distance * (self.bins / self.r_max)).astype(np.int64)
+        ci, cj = classes[coll_arr[:, 0].astype(np.intp)], classes[coll_arr[:, 1].astype(np.intp)]
+        size = self._counts.shape[0]
+        self._counts += np.bincount((ci * self.classes + cj) * self.bins + bin_idx, minlength=size)
+        if not ordered:
+            self._counts += np.bincount((cj * self.classes + ci) * self.bins + bin_idx, minlength=size)
+
+    def finish(self, classes: np.ndarray, reach: np.ndarray):
+        """
+        Completes a sample.
+
+        Parameters
+        ----------
+        classes : np.ndarray
+            A 1D array with the 0-based class of every particle.
+        reach : np.ndarray
+            A (K, K) array with the distance up to which the pair lists of the sample were complete for each
+            class pair, g(r) beyond the smallest reach of any sample is undefined.
+        """
+        n = np.bincount(classes, minlength=self.classes).astype(np.float64)
+        self._density += (np.outer(n, n) - np.diag(n)) / self.area
+        self._reach = np.minimum(self._reach, reach)
+        self.samples += 1
+
+    def result(self) -> dict:
+        """
+        Computes the running averages.
+
+        Returns
+        -------
+        dict
+            - "r": a 1D array with the centers of the distance bins.
+            - "g": a 3D array of shape (K, K, bins) with g(r) of each ordered class pair, NaN where it is
+              undefined (beyond the reach of the pair search or without pairs of the classes).
+            - "g_total": a 1D array with g(r) of all particles regardless of their class.
+            - "counts": a 3D array of shape (K, K, bins) with the summed ordered pair counts.
+            - "samples": number of samples.
+        """
+        edges = np.linspace(0, self.r_max, self.bins + 1)
+        shell = np.pi * np.diff(edges**2)
+        counts = self._counts.reshape(self.classes, self.classes, self.bins)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            g = counts / (self._density[:, :, None] * shell)
+            g_total = counts.sum(axis=(0, 1)) / (self._density.sum() * shell)
+        centers = (edges[:-1] + edges[1:]) / 2
+        g[(self._density == 0)[:, :, None] | (edges[1:] > self._reach[:, :, None])] = np.nan
+        g_total[(edges[1:] > self._reach.min()) | (self._density.sum() == 0)] = np.nan
+        return {"r": centers, "g": g, "g_total": g_total, "counts": counts.copy(), "samples": self.samples}
@@ -0,0 +1,150 @@
+import numpy as np
+
+
+class ParticleState:
+    """
+    Structure-of-arrays container for the per-particle state of a ParticleSystem, together with named scratch
+    buffers that the step reuses instead of allocating temporaries.
+
+    Scratch buffers only grow: a request for fewer rows than allocated returns a view of the existing buffer,
+    a request for more rows reallocates it with `GROWTH` times the requested size, so that a steady-state step
+    stops allocating once the buffers have reached their working size. The per-particle arrays are managed the
+    same way by `resize`, so that particles can be added and removed with amortized constant cost.
+    """
+
+    GROWTH = 1.5
+    PER_PARTICLE = ("positions", "velocity", "colors", "color_index", "restitution", "mass", "ids", "fixed")
+
+    __slots__ = ("_buffers", "_storage", "color_index", "colors", "dtype", "fixed", "ids", "mass", "positions", "restitution", "size", "slots", "velocity")
+
+    def __init__(self, dtype=np.float64):
+        """
+        Parameters
+        ----------
+        dtype : np.dtype, optional
+            Floating point precision of the scratch buffers (default is np.float64).
+        """
+        self.positions = None
+        self.velocity = None
+        self.colors = None
+        self.color_index = None
+        self.restitution = None
+        self.mass = None
+        self.ids = None
+        self.slots = None
+        self.size = None
+        self.fixed = None
+        self.dtype = np.dtype(dtype)
+        self._buffers = {}
+        self._storage = {}
+
+    def resize(self, n: int):
+        """
+        Changes the number of particles of all per-particle arrays (`PER_PARTICLE`, the ones that are set).
+        The first rows are kept, new rows are uninitialized. The arrays are views of storage with spare
+        capacity, storage is only reallocated (with `GROWTH` times the requested size) when it is exhausted.
+
+        Parameters
+        ----------
+        n : int
+            The new number of particles.
+        """
+        for name in self.PER_PARTICLE:
+            if getattr(self, name) is not None:
+                self._resize_field(name, n)
+
+    def resize_ids(self, count: int):
+        """
+        Changes the number of external IDs `slots` can map, with the same growth as `resize`.
+
+        Parameters
+        ----------
+        count : int
+            The new number of IDs.
+        """
+        self._resize_field("slots", count)
+
+    def _resize_field(self, name: str, n: int):
+        array = getattr(self, name)
+        storage = self._storage.get(name)
+        if storage is None or array.base is not storage or storage.shape[0] < n:
+            # arrays assigned from outside are adopted into new storage as well
+            capacity = int(n * self.GROWTH) + 1 if n > array.shape[0] else n
+            storage = self._storage[name] = np.empty((capacity, *array.shape[1:]), dtype=array.dtype)
+            kept = min(n, array.shape[0])
+            storage[:kept] = array[:kept]
+        setattr(self, name, storage[:n])
+
+    def move(self, source: np.ndarray, target: np.ndarray):
+        """
+        Copies the particles stored in rows `source` to rows `target` in all per-particle arrays.
+
+        Parameters
+        ----------
+        source : np.ndarray
+            A 1D array of row indices.
+        target : np.ndarray
+            A 1D array of row indices of the same length, disjoint from `source`.
+        """
+        for name in self.PER_PARTICLE:
+            array = getattr(self, name)
+            if array is not None:
+                array[target] = array[source]
+
+    def buffer(self, name: str, rows: int, columns: int = 0, dtype=None) -> np.ndarray:
+        """
+        Retrieves a scratch buffer. Its content is undefined and may be overwritten by the next request for the
+        same name.
+
+        Parameters
+        ----------
+        name : str
+            Name of the buffer, every name owns separate storage.
+        rows : int
+            Number of rows needed.
+        columns : int, optional
+            Number of columns, 0 for a 1D buffer (default is 0).
+        dtype : np.dtype, optional
+            Element type (default is None, the state precision).
+
+        Returns
+        -------
+        np.ndarray
+            A contiguous view of shape (rows,) or (rows, columns).
+        """
+        dtype = self.dtype if dtype is None else np.dtype(dtype)
+        shape = (columns,) if columns else ()
+        storage = self._buffers.get(name)
+        if storage is None or storage.shape[0] < rows or storage.shape[1:] != shape or storage.dtype != dtype:
+            capacity = rows if storage is None or storage.shape[1:] != shape or storage.dtype != dtype else int(rows * self.GROWTH) + 1
+            storage = self._buffers[name] = np.empty((capacity, *shape), dtype=dtype)
+        return storage[:rows]
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Retrieves the memory held by the scratch buffers.
+
+        Returns
+        -------
+        int
+            Total size of all scratch buffers in bytes.
+        """
+        return sum(storage.nbytes for storage in self._buffers.values())
+
+
+def state_field(name: str) -> property:
+    """
+    Creates a property that forwards an attribute of the owner to the field `name` of its `_state`.
+
+    Parameters
+    ----------
+    name : str
+        A field of `ParticleState`.
+
+    Returns
+    -------
+    property
+        The property, assigning to it rebinds the field.
+    """
+    return property(lambda self: getattr(self._state, name), lambda self, value: setattr(self._state, name, value))
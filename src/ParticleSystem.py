@@ -1,9 +1,34 @@
+import time
 import numpy as np
-from scipy.spatial import cKDTree
 from IntegrityChecks import _validate_particle_entry
+from NeighborSearch import NeighborSearch
+from StepStats import StepStats
+from Integrators import INTEGRATORS
+from ParticleState import ParticleState, state_field
+from Clusters import ClusterAnalysis
+from PairCorrelation import PairCorrelation
+
+MAX_OVERLAP_FRACTION = 0.25  # adaptive stepping shrinks delta_t once contacts overlap deeper than this fraction of the contact distance
+MAX_DT_GROWTH = 1.25         # largest factor by which adaptive stepping grows delta_t per step
+SWEPT_MAX_ROUNDS = 32        # largest number of time-ordered contact batches per step in swept collision mode
+PAIR_BYTES = 160     # approximate peak memory per neighbor pair of one step (indices, pair data and force temporaries)
+FIXED_POINT_STEPS = 2**32    # fixed-point coordinates per width and height of the simulation area (uint32)
+MAX_FLOAT32_PARTICLES = 2**24  # pair lists hold particle indices in the state dtype, float32 represents them exactly up to here
+IMPULSE_ITERATIONS = 64      # largest number of Jacobi sweeps of the contact impulses per step
+IMPULSE_TOLERANCE = 1e-6     # impulse sweeps stop once no impulse changes by more than this fraction of the largest
 
 class ParticleSystem:
-    def __init__(self, width: int, height: int, color_distribution: list[tuple[tuple[int, int, int, int], int, int, int]], interaction_matrix: dict[tuple[int, int], float], radius: int = .5, delta_t: float = 0.3, brownian_std: float = 20, min_vel: float = -10, max_vel: float = 10):
+    # the per-particle arrays live in the ParticleState `_state`
+    _particles = state_field("positions")
+    _velocity = state_field("velocity")
+    _colors = state_field("colors")
+    _color_index = state_field("color_index")
+    _restitution = state_field("restitution")
+    _mass = state_field("mass")
+    _ids = state_field("ids")
+    _slots = state_field("slots")
+
+    def __init__(self, width: int, height: int, color_distribution: list[tuple[tuple[int, int, int, int], int, int, int]], interaction_matrix: dict[tuple[int, int], float], radius: int = .5, delta_t: float = 0.3, brownian_std: float = 20, min_vel: float = -10, max_vel: float = 10, solver_iterations: int = 1, reorder_interval: int = 0, reorder_curve: str = "morton", neighbor_strategy: str = "auto", memory_budget: int | None = None, instrument: bool = False, diagnostics: bool = False, adaptive_dt: tuple[float, float] | None = None, cfl: float = 0.5, swept: bool = False, integrator: str = "euler", dtype=np.float64, fixed_point: bool = False, cluster_interval: int = 0, cluster_thresholds: np.ndarray | None = None, rdf_interval: int = 0, rdf_bins: int = 100):
         """
         Initialize a ParticleSystem instance for simulating particle dynamics with collisions and interactions.
         This constructor sets up the simulation area, creates particles with random initial positions,
@@ -35,6 +60,58 @@ class ParticleSystem:
             The minimum initial velocity magnitude for particles (default is -10).
         max_vel : float, optional
             The maximum initial velocity magnitude for particles (default is 10).
+        solver_iterations : int, optional
+            Number of Jacobi iterations used to resolve contacts per step (default is 1).
+        reorder_interval : int, optional
+            Number of steps between spatial reorderings of the particle arrays, 0 disables reordering (default is 0).
+        reorder_curve : str, optional
+            Ordering used by the reorder pass, either "morton" (Z-order) or "cell" (row-major cell order) (default is "morton").
+        neighbor_strategy : str, optional
+            Neighbor search strategy, "auto" benchmarks all strategies of `NeighborSearch.STRATEGIES` on the first
+            frames and whenever the configuration changes, then locks in the fastest (default is "auto").
+        memory_budget : int, optional
+            Upper bound in bytes for the pair data of one step. If the estimated pair memory exceeds it, pairs are
+            generated and reduced in spatial chunks instead of all at once (default is None, unbounded).
+        instrument : bool, optional
+            Whether to record per-phase timings and pair counts of every step in `stats` (default is False).
+        diagnostics : bool, optional
+            Whether to compute energy, momentum, speed and overlap diagnostics after every step (default is False).
+        adaptive_dt : tuple of float, optional
+            Bounds (min, max) for adaptive time stepping. If given, `delta_t` is chosen every step by `choose_delta_t`
+            within these bounds (default is None, fixed `delta_t`).
+        cfl : float, optional
+            Largest fraction of the particle radius a particle may travel per step in adaptive stepping (default is 0.5).
+        swept : bool, optional
+            Whether to detect collisions along the path of each particle during the step (continuous collision detection)
+            instead of only at the tentative new positions, so fast particles cannot tunnel through each other
+            (default is False).
+        integrator : str, optional
+            Time integration scheme, a key of `Integrators.INTEGRATORS`: "euler" (the original explicit update),
+            "verlet" (symplectic velocity Verlet) or "semi_implicit" (semi-implicit Euler with exact friction).
+            The latter two stay stable and accurate at larger `delta_t` (default is "euler").
+        dtype : np.dtype, optional
+            Floating point precision of all particle state, pair data and intermediates, either np.float32 or
+            np.float64 (default is np.float64). float32 systems are limited to `MAX_FLOAT32_PARTICLES` particles.
+        fixed_point : bool, optional
+            Whether positions are stored as unsigned 32 bit fixed-point coordinates scaled to the simulation area.
+            Periodic wrap-around then happens through integer overflow and minimum-image differences of pairs
+            through a signed cast, so both are exact and need no floating point modulo. `positions` holds the
+            decoded coordinates, the resolution is `width / 2**32` and `height / 2**32` (default is False).
+        cluster_interval : int, optional
+            Number of steps between cluster analyses (see `clusters`), which reuse the pair list of the step's
+            neighbor search. 0 disables the analysis (default is 0).
+        cluster_thresholds : np.ndarray, optional
+            A symmetric (K, K) array with the distance up to which particles of classes i+1 and j+1 belong to
+            the same cluster. Pairs beyond the reach of the pruned neighbor search (`find_neighbor_pairs`) are
+            not listed, so larger thresholds act like that reach (default is None, `0.3 * interaction_radius` for all class pairs, where the
+            short-range repulsion ends and attracting particles settle).
+        rdf_interval : int, optional
+            Number of steps between samples of the radial distribution function per class pair (see
+            `pair_correlation`), which are taken from the pair list of the step's neighbor search. 0 disables
+            sampling (default is 0).
+        rdf_bins : int, optional
+            Number of distance bins of the radial distribution function up to `interaction_radius`, capped to
+            half the smaller side of the simulation area (default is 100).
             
         Attributes
         ----------
@@ -51,9 +128,13 @@ class ParticleSystem:
         _velocity : np.ndarray
             A 2D array of shape (N, 2) representing the initial velocities of the particles,
             determined by randomly assigned speeds and directions.
-        _interaction_matrix : np.ndarray
-            A symmetric matrix (generated from the provided dictionary) containing the scaled interaction
-            magnitudes between particle classes.
+        _interaction_matrix : dict
+            The interaction matrix as given, see `interaction_matrix`.
+        _coefficients : np.ndarray
+            A (K, K) matrix (generated from `_interaction_matrix`) containing the scaled interaction
+            magnitudes between particle classes, None until the first step after the matrix was set.
+        _active : np.ndarray
+            A boolean (K, K) matrix marking the class pairs that interact in either direction.
         _half_life : float
             The half-life constant used in friction calculations (set to 0.04).
         _friction_fact : float
@@ -62,10 +143,71 @@ class ParticleSystem:
             The effective interaction radius for particles, set as 100 times the particle radius.
         _beta : float
             A threshold parameter (set to 0.3) used in force calculations to define regions of interaction.
+        _solver_iterations : int
+            Number of Jacobi iterations of the contact solver.
+        _ids : np.ndarray
+            A 1D array holding the stable external ID of the particle stored in each slot.
+        _slots : np.ndarray
+            The inverse of `_ids`, mapping each external ID to its current storage slot (-1 for free IDs).
+        _free_ids : list of int
+            IDs of removed particles, reused by `add_particles` before new IDs are issued.
+        _class_params : list of dict
+            Copies of the entries of `color_distribution` ("color", "mass", "bounciness"), updated by
+            `set_class_params` and used for particles added later.
+        _velocity_range : tuple of float
+            The (min_vel, max_vel) range of initial speeds, also used for added particles.
+        _step : int
+            Number of steps advanced so far.
+        _neighbor_search : NeighborSearch
+            The neighbor search auto-tuner.
+        _memory_budget : int or None
+            Memory budget in bytes for the pair data of one step.
+        _pairs_per_particle : float
+            Largest number of neighbors per particle observed while streaming, used to size the chunks.
+        _stats : StepStats
+            Per-phase timers and counters of the recent steps.
+        _timer : StepStats or None
+            `_stats` while an instrumented step is running, None otherwise.
+        _diagnostics_enabled : bool
+            Whether diagnostics are computed.
+        _diagnostics : dict
+            The diagnostics of the most recent step.
+        _overlaps : np.ndarray or None
+            Overlap depths of the contacts of the most recent step.
+        _adaptive_dt : tuple of float or None
+            Bounds of the adaptive time step.
+        _cfl : float
+            CFL number of the adaptive time step.
+        _swept : bool
+            Whether swept collision detection is used.
+        _integrator : EulerIntegrator | VelocityVerletIntegrator | SemiImplicitIntegrator
+            The time integration scheme, holding its own preallocated buffers.
+        _dtype : np.dtype
+            Floating point precision of the state and all kernels.
+        _box : np.ndarray
+            Width and height of the simulation area in `_dtype`.
+        _state : ParticleState
+            Container of the per-particle arrays above and of the scratch buffers the step writes its
+            intermediates into, so that a steady-state step does not allocate N- or K-sized temporaries.
+            In fixed-point mode its `fixed` array holds the authoritative positions.
+        _fixed_scale : np.ndarray or None
+            Size of one fixed-point step along x and y, None unless fixed-point coordinates are used.
+        _cluster_interval : int
+            Number of steps between cluster analyses, 0 if disabled.
+        _cluster_analysis : ClusterAnalysis or None
+            Collects the edges of the analysis and holds its buffers between analyses.
+        _clusters : dict
+            The result of the most recent cluster analysis.
+        _rdf_interval : int
+            Number of steps between samples of the radial distribution function, 0 if disabled.
+        _pair_correlation : PairCorrelation or None
+            Accumulates the pair distance histograms of the samples.
         """
-        self._particles = None
-        self._colors = None
-        self._color_index = None
+        self._dtype = np.dtype(dtype)
+        if self._dtype not in (np.float32, np.float64):
+            raise ValueError("dtype must be float32 or float64")
+        self._state = ParticleState(self._dtype)
+        self._box = np.array([width, height], dtype=self._dtype)
         self._width: int = width
         self._height: int = height
         self._radius: int = radius
@@ -73,14 +215,58 @@ class ParticleSystem:
         self._brownian_std: float = brownian_std
         self._color_distribution = color_distribution
         self._particles, self._colors, self._color_index, self._restitution, self._mass = self.init_particles()
-        speeds = np.random.uniform(min_vel, max_vel, self._particles.shape[0])
-        angles = np.random.uniform(0, 2 * np.pi, self._particles.shape[0])
-        self._velocity = np.column_stack((speeds * np.cos(angles), speeds * np.sin(angles)))
-        self._interaction_matrix = interaction_matrix#self.create_interaction_matrix(interaction_matrix) # positive values indicate attraction, negative values indicate repulsion
+        self._check_particle_count(self._particles.shape[0])
+        self._class_params = [dict(val) for val in color_distribution.values()]
+        self._velocity_range = (min_vel, max_vel)
+        self._velocity = self._random_velocities(self._particles.shape[0])
+        self._interaction_matrix = interaction_matrix # positive values indicate attraction, negative values indicate repulsion
+        self._coefficients = self._active = None    # built from the matrix on first use, see `_interaction_coefficients`
         self._half_life: float = .04
         self._friction_fact = pow(0.5, self.delta_t/self._half_life)
         self._interaction_radius = 100*self._radius
         self._beta = 0.3
+        if solver_iterations < 1:
+            raise ValueError("Solver iterations must be at least 1")
+        self._solver_iterations = solver_iterations
+        if reorder_curve not in ("morton", "cell"):
+            raise ValueError("Reorder curve must be 'morton' or 'cell'")
+        self._reorder_interval = reorder_interval
+        self._reorder_curve = reorder_curve
+        self._ids = np.arange(self._particles.shape[0])
+        self._slots = np.arange(self._particles.shape[0])
+        self._free_ids = []
+        self._step = 0
+        self._neighbor_search = NeighborSearch(neighbor_strategy)
+        self._memory_budget = memory_budget
+        self._pairs_per_particle = 0.0
+        self._stats = StepStats(enabled=instrument)
+        self._timer = None
+        self._diagnostics_enabled = diagnostics
+        self._diagnostics = {}
+        self._overlaps = None
+        if adaptive_dt is not None and not (0 < adaptive_dt[0] <= adaptive_dt[1]):
+            raise ValueError("Adaptive time step bounds must satisfy 0 < min <= max")
+        self._adaptive_dt = adaptive_dt
+        self._cfl = cfl
+        self._swept = swept
+        if integrator not in INTEGRATORS:
+            raise ValueError(f"Integrator must be one of {list(INTEGRATORS)}")
+        self._integrator = INTEGRATORS[integrator]()
+        self._integrator.bind(self._particles.shape[0], self._dtype)
+        self._fixed_scale = np.array([width, height], dtype=np.float64) / FIXED_POINT_STEPS if fixed_point else None
+        if fixed_point:
+            self.positions = self._particles
+        if cluster_interval < 0:
+            raise ValueError("Cluster interval must be non-negative")
+        self._cluster_interval = cluster_interval
+        thresholds = np.full((len(color_distribution), len(color_distribution)), self._beta * self._interaction_radius) if cluster_thresholds is None else cluster_thresholds
+        self._cluster_analysis = ClusterAnalysis(thresholds) if cluster_interval else None
+        self._clusters = {}
+        if rdf_interval < 0:
+            raise ValueError("RDF interval must be non-negative")
+        self._rdf_interval = rdf_interval
+        r_max = min(self._interaction_radius, width / 2, height / 2)
+        self._pair_correlation = PairCorrelation(len(color_distribution), r_max, rdf_bins, width * height) if rdf_interval else None
 
     
     @property
@@ -115,9 +301,120 @@ class ParticleSystem:
         Returns
         -------
         np.ndarray
-            A 1D array filled with the particle radius for each particle.
+            A read-only 1D array filled with the particle radius for each particle. It is cached and only
+            rebuilt when the particle count or the radius changes.
+        """
+        size = self._state.size
+        if size is None or size.shape[0] != self._particles.shape[0] or (size.size and size[0] != self._dtype.type(self._radius)):
+            size = self._state.size = np.full(self._particles.shape[0], self._radius, dtype=self._dtype)
+            size.flags.writeable = False
+        return size
+    
+    @property
+    def ids(self):
+        """
+        Retrieves the stable external ID of each stored particle.
+        
+        Returns
+        -------
+        np.ndarray
+            A 1D array where entry k is the external ID of the particle stored at index k.
+        """
+        return self._ids
+    
+    @property
+    def slots(self):
+        """
+        Retrieves the storage index of each external particle ID.
+        
+        Returns
+        -------
+        np.ndarray
+            A 1D array where entry k is the storage index of the particle with external ID k,
+            e.g. `positions[slots]` lists the positions in ID order. IDs freed by `remove_particles`
+            map to -1 until `add_particles` reuses them.
+        """
+        return self._slots
+    
+    @property
+    def neighbor_search(self):
+        """
+        Retrieves the neighbor search auto-tuner, e.g. to log the chosen strategy and its timings.
+        
+        Returns
+        -------
+        NeighborSearch
+            The tuner, see `NeighborSearch.strategy` and `NeighborSearch.timings`.
+        """
+        return self._neighbor_search
+    
+    @property
+    def stats(self):
+        """
+        Retrieves the step instrumentation. Set `stats.enabled` to toggle it at runtime.
+        
+        Returns
+        -------
+        StepStats
+            Per-phase timings and pair counts, see `StepStats.summary` and `StepStats.latest`.
+        """
+        return self._stats
+    
+    @property
+    def diagnostics(self):
+        """
+        Retrieves the diagnostics of the most recent step, see `update_diagnostics`.
+        
+        Returns
+        -------
+        dict
+            The diagnostics, empty if they are disabled or no step was made yet.
+        """
+        return self._diagnostics
+    
+    @property
+    def clusters(self):
+        """
+        Retrieves the most recent cluster analysis, made every `cluster_interval` steps from the pairs of the
+        step's neighbor search (at the tentative positions of that step), see `ClusterAnalysis.finish`.
+        
+        Returns
+        -------
+        dict
+            "clusters", "sizes", "composition" (per class, in class order), "labels" (per stored particle),
+            "largest_cluster", "clustered_fraction" and the "step" of the analysis, empty if the analysis is
+            disabled or was not made yet.
+        """
+        return self._clusters
+    
+    @property
+    def pair_correlation(self):
+        """
+        Retrieves the radial distribution function g(r) of every ordered class pair, averaged over the samples
+        taken every `rdf_interval` steps from the pairs of the step's neighbor search (at the tentative
+        positions of that step), see `PairCorrelation.result`.
+        
+        Class pairs with a zero interaction coefficient in both directions are only searched up to the end
+        of the short-range repulsion, their g(r) is NaN beyond it.
+        
+        Returns
+        -------
+        dict
+            "r", "g", "g_total", "counts" and "samples", empty if sampling is disabled.
+        """
+        return self._pair_correlation.result() if self._pair_correlation is not None else {}
+    
+    @property
+    def integrator(self):
+        """
+        Retrieves the time integration scheme.
+        
+        Returns
+        -------
+        EulerIntegrator | VelocityVerletIntegrator | SemiImplicitIntegrator
+            The integrator, see `Integrators.INTEGRATORS`.
         """
-        return np.full(self._particles.shape[0], self._radius)
+        return self._integrator
     
     @property
     def interaction_matrix(self):
@@ -151,14 +448,21 @@ class ParticleSystem:
         Parameters
         ----------
         value : np.ndarray
-            A 2D array of new particle positions.
+            A 2D array of new particle positions. In fixed-point mode they are copied through their
+            fixed-point encoding, which wraps them into the simulation area.
         """
-        self._particles = value
+        if self._fixed_scale is None:
+            self._particles = value
+            return
+        self._state.fixed = np.empty(np.shape(value), dtype=np.uint32)
+        self._particles = np.empty(np.shape(value), dtype=self._dtype)
+        self._store_positions(np.asarray(value))
     
     @interaction_matrix.setter
     def interaction_matrix(self, value):
         """
-        Sets a new interaction matrix.
+        Sets a new interaction matrix. Entries changed in place afterwards are not seen by the simulation,
+        assign a new matrix instead.
         
         Parameters
         ----------
@@ -166,11 +470,27 @@ class ParticleSystem:
             New dictionary mapping particle class pairs to interaction magnitudes.
         """
         self._interaction_matrix = value
+        self._coefficients = self._active = None
+
+    def _interaction_coefficients(self) -> tuple:
+        """
+        Retrieves the coefficient matrix the kernels read, built from the interaction matrix once after it
+        was set instead of on every use, see `create_interaction_matrix`.
+        
+        Returns
+        -------
+        tuple of np.ndarray
+            The (K, K) coefficients and the boolean (K, K) matrix of class pairs interacting in either direction.
+        """
+        if self._coefficients is None:
+            self._coefficients = self.create_interaction_matrix(self._interaction_matrix)
+            self._active = (self._coefficients != 0) | (self._coefficients != 0).T
+        return self._coefficients, self._active
         
     @delta_t.setter
     def delta_t(self, value):
         """
-        Sets a new time step for particle movement.
+        Sets a new time step for particle movement and updates the friction factor accordingly.
         
         Parameters
         ----------
@@ -178,6 +498,7 @@ class ParticleSystem:
             The new time step delta.
         """
         self._delta_t = value
+        self._friction_fact = pow(0.5, value/self._half_life)
         
     
     def init_particles(self):
@@ -204,11 +525,11 @@ class ParticleSystem:
             _validate_particle_entry(val["color"], val["n"], val["bounciness"], val["mass"])
             x_coords = np.random.uniform(0, self._width, size=val["n"])
             y_coords = np.random.uniform(0, self._height, size=val["n"])
-            positions = np.column_stack((x_coords, y_coords))
-            colors = np.tile(np.array(val["color"]), (val["n"], 1))
+            positions = np.column_stack((x_coords, y_coords)).astype(self._dtype)
+            colors = np.tile(np.array(val["color"], dtype=self._dtype), (val["n"], 1))
             color_indices = np.full((val["n"], 1), idx)
-            restitutions = np.full((val["n"],), val["bounciness"])
-            masses = np.full((val["n"],), val["mass"])
+            restitutions = np.full((val["n"],), val["bounciness"], dtype=self._dtype)
+            masses = np.full((val["n"],), val["mass"], dtype=self._dtype)
             particles.append((positions, colors, color_indices, restitutions, masses))
             
         positions, colors, color_indices, restitution, mass = map(lambda arrays: np.concatenate(arrays, axis=0), zip(*particles))
@@ -216,20 +537,207 @@ class ParticleSystem:
         return positions, colors, color_indices, restitution, mass
 
 
+    def _random_velocities(self, n: int) -> np.ndarray:
+        """
+        Draws initial velocities with uniformly distributed speeds in `_velocity_range` and directions.
+        """
+        speeds = np.random.uniform(*self._velocity_range, n)
+        angles = np.random.uniform(0, 2 * np.pi, n)
+        return np.column_stack((speeds * np.cos(angles), speeds * np.sin(angles))).astype(self._dtype)
+
+
+    def add_particles(self, cls: int, n: int, positions: np.ndarray | None = None, velocities: np.ndarray | None = None) -> np.ndarray:
+        """
+        Adds particles of an existing class to the running system. The per-particle arrays grow in place
+        with spare capacity, so adding costs O(n) amortized and the other particles are not touched.
+        
+        Parameters
+        ----------
+        cls : int
+            The class of the new particles, 1-based as in `interaction_matrix`.
+        n : int
+            Number of particles to add.
+        positions : np.ndarray, optional
+            A 2D array of shape (n, 2) with their positions, wrapped into the simulation area
+            (default is None, uniformly random like at initialization).
+        velocities : np.ndarray, optional
+            A 2D array of shape (n, 2) with their velocities (default is None, random like at initialization).
+        
+        Returns
+        -------
+        np.ndarray
+            The external IDs of the new particles, freed IDs are reused first.
+        
+        Raises
+        ------
+        ValueError
+            If the class does not exist, `n` is not a non-negative integer or a float32 system would exceed
+            `MAX_FLOAT32_PARTICLES` particles.
+        """
+        if not 1 <= cls <= len(self._class_params):
+            raise ValueError(f"Particle class must be between 1 and {len(self._class_params)}")
+        params = self._class_params[cls - 1]
+        _validate_particle_entry(params["color"], n, params["bounciness"], params["mass"])
+        self._check_particle_count(self._particles.shape[0] + n)
+        if positions is None:
+            positions = np.column_stack((np.random.uniform(0, self._width, n), np.random.uniform(0, self._height, n)))
+        if velocities is None:
+            velocities = self._random_velocities(n)
+        
+        old = self._particles.shape[0]
+        rows = slice(old, old + n)
+        self._state.resize(old + n)
+        if self._fixed_scale is None:
+            self._particles[rows] = self._wrap_around(np.asarray(positions, dtype=self._dtype))
+        else:
+            self._encode(np.asarray(positions, dtype=np.float64), out=self._state.fixed[rows])
+            self._decode(self._state.fixed[rows], out=self._particles[rows])
+        self._velocity[rows] = velocities
+        self._colors[rows] = params["color"]
+        self._color_index[rows] = cls
+        self._restitution[rows] = params["bounciness"]
+        self._mass[rows] = params["mass"]
+        
+        reused = [self._free_ids.pop() for _ in range(min(n, len(self._free_ids)))]
+        issued = self._slots.shape[0]
+        ids = np.concatenate((np.array(reused, dtype=self._ids.dtype), np.arange(issued, issued + n - len(reused))))
+        if n > len(reused):
+            self._state.resize_ids(issued + n - len(reused))
+        self._ids[rows] = ids
+        self._slots[ids] = np.arange(old, old + n)
+        self._integrator.bind(old + n, self._dtype)
+        return ids
+
+
+    def remove_particles(self, mask: np.ndarray) -> np.ndarray:
+        """
+        Removes particles from the running system by swap-remove: the remaining particles stored behind the
+        new end move into the freed slots, so only O(removed) rows are copied and the arrays stay dense.
+        Their IDs are freed for reuse by `add_particles`.
+        
+        Parameters
+        ----------
+        mask : np.ndarray
+            A boolean 1D array over the storage slots marking the particles to remove, e.g.
+            `ps._color_index[:, 0] == 2`.
+        
+        Returns
+        -------
+        np.ndarray
+            The external IDs of the removed particles.
+        
+        Raises
+        ------
+        ValueError
+            If the mask does not have one entry per particle.
+        """
+        mask = np.asarray(mask, dtype=bool)
+        n = self._particles.shape[0]
+        if mask.shape != (n,):
+            raise ValueError(f"The mask must have shape ({n},)")
+        removed = np.flatnonzero(mask)
+        kept = n - removed.shape[0]
+        ids = self._ids[removed].copy()
+        # removed slots before the new end are filled with the kept particles behind it
+        holes = removed[removed < kept]
+        movers = kept + np.flatnonzero(~mask[kept:])
+        self._state.move(movers, holes)
+        self._integrator.move(movers, holes)
+        self._slots[self._ids[holes]] = holes
+        self._slots[ids] = -1
+        self._free_ids.extend(ids.tolist())
+        self._state.resize(kept)
+        self._integrator.bind(kept, self._dtype)
+        return ids
+
+
+    def set_class_params(self, cls: int, mass: float | None = None, restitution: float | None = None, color: tuple | None = None) -> None:
+        """
+        Changes the parameters of a particle class in the running system, for its current particles and for
+        particles added later. Positions and velocities are kept.
+        
+        Parameters
+        ----------
+        cls : int
+            The class, 1-based as in `interaction_matrix`.
+        mass : float, optional
+            The new mass (default is None, unchanged).
+        restitution : float, optional
+            The new restitution coefficient (default is None, unchanged).
+        color : tuple of float, optional
+            The new RGBA color (default is None, unchanged).
+        
+        Raises
+        ------
+        ValueError
+            If the class does not exist or a value is invalid.
+        """
+        if not 1 <= cls <= len(self._class_params):
+            raise ValueError(f"Particle class must be between 1 and {len(self._class_params)}")
+        params = self._class_params[cls - 1]
+        updated = {
+            "color": params["color"] if color is None else tuple(color),
+            "mass": params["mass"] if mass is None else mass,
+            "bounciness": params["bounciness"] if restitution is None else restitution,
+        }
+        _validate_particle_entry(updated["color"], 0, updated["bounciness"], updated["mass"])
+        members = self._color_index[:, 0] == cls
+        for key, array in (("color", self._colors), ("mass", self._mass), ("bounciness", self._restitution)):
+            if updated[key] != params[key]:
+                array[members] = updated[key]
+        params.update(updated)
+
+
+    def update_classes(self, color_distribution: dict) -> bool:
+        """
+        Brings the running system in line with an edited color distribution with the same classes: particles
+        are added or removed (the most recently stored of their class) to match the counts, and changed
+        masses, restitutions and colors are applied with `set_class_params`.
+        
+        Parameters
+        ----------
+        color_distribution : dict
+            The edited distribution in the format of the constructor.
+        
+        Returns
+        -------
+        bool
+            False if the number of classes differs, the system then has to be rebuilt.
+        """
+        if len(color_distribution) != len(self._class_params):
+            return False
+        counts = np.bincount(self._color_index[:, 0], minlength=len(self._class_params) + 1)
+        for cls, val in enumerate(color_distribution.values(), start=1):
+            self.set_class_params(cls, mass=val["mass"], restitution=val["bounciness"], color=val["color"])
+            if val["n"] > counts[cls]:
+                self.add_particles(cls, int(val["n"] - counts[cls]))
+            elif val["n"] < counts[cls]:
+                members = np.flatnonzero(self._color_index[:, 0] == cls)
+                mask = np.zeros(self._particles.shape[0], dtype=bool)
+                mask[members[val["n"]:]] = True
+                self.remove_particles(mask)
+        self._color_distribution = color_distribution
+        return True
+
+
     def move_particles(self):
         """
         Advances the simulation by one time step by updating particle positions and velocities based on 
         Brownian motion, collisions, and interactions.
 
+        If `adaptive_dt` is set, `delta_t` is chosen by `choose_delta_t` once the Brownian acceleration is known.
+        If `reorder_interval` is set, the particle arrays are first reordered along a space-filling curve
+        every `reorder_interval` steps (see `reorder_particles`).
+
         The method performs the following steps:
         1. Generates a random Brownian acceleration for each particle using a normal distribution 
             with standard deviation `self._brownian_std`.
         2. Updates the particle velocities by adding the computed acceleration scaled by the time step 
-            `self._delta_t`.
+            `self._delta_t` (see `Integrators.INTEGRATORS` for the schemes).
         3. Computes tentative new positions using the updated velocities and applies periodic boundary 
             conditions based on the simulation area dimensions (`self._width`, `self._height`).
-        4. Detects collisions among particles by calling `check_collisions` with an effective detection 
-            radius `self._interaction_radius`.
+        4. Detects collisions among particles by calling `find_neighbor_pairs`, which searches up to 
+            `self._interaction_radius` only for class pairs with a nonzero interaction coefficient.
         5. If no collision data is found, the particle positions are updated to the new positions and 
             the method returns early.
         6. For detected collisions:
@@ -238,6 +746,8 @@ class ParticleSystem:
             `update_velocities_collisions`.
             - Processes all candidate pairs for interaction effects by invoking `update_velocities_collisions` 
             in "interaction" mode.
+        If `memory_budget` is set and the pairs of the step would exceed it, steps 4 to 6 are streamed over
+        spatial chunks instead, see `stream_pairs`.
 
         Returns
         -------
@@ -245,26 +755,669 @@ class ParticleSystem:
             The particle positions and velocities are updated in place.
         """
         
+        timer = self._timer = self._stats if self._stats.enabled else None
+        if timer:
+            timer.begin()
+        self._advance()
+        if self._diagnostics_enabled:
+            self.update_diagnostics()
+        if timer:
+            timer.end()
+        self._timer = None
+    
+    
+    def _advance(self):
+        """
+        Performs the work of `move_particles`, lapping the phase timers if the step is instrumented.
+        """
+        timer = self._timer
+        if self._reorder_interval and self._step % self._reorder_interval == 0:
+            self.reorder_particles()
+        self._step += 1
         # set up Brownian acceleration
-        acc = np.random.normal(0, self._brownian_std, self._particles.shape)
-        self._velocity += self._velocity + acc * self._delta_t # update velocities
-        delta_pos = self._velocity*self._delta_t
-        new_pos = self._wrap_around(self._particles + delta_pos)
+        acc = self._brownian_acceleration()
+        if self._adaptive_dt is not None:
+            self.delta_t = self.choose_delta_t(acc)
+        self._overlaps = None
+        if timer:
+            timer.lap("noise")
+        n = self._particles.shape[0]
+        self._integrator.bind(n, self._dtype)
+        delta_pos = self._integrator.begin(self, acc) # update velocities
+        new_fixed = self._state.buffer("new_fixed", n, 2, dtype=np.uint32) if self._fixed_scale is not None else None
+        new_pos = self._translate(delta_pos, self._state.buffer("new_pos", n, 2), new_fixed)
+        if timer:
+            timer.lap("integrate")
+        observers = self._pair_observers()
+        if self._memory_budget is not None and self._chunk_size(n) < n:
+            self._move_particles_chunked(new_pos, delta_pos, new_fixed, observers)
+            return
         # detect collisions with tentative new positions
-        collision_data: np.ndarray = self.check_collisions(new_pos, radius=self._interaction_radius) # sorted from left to right and bottom to top
+        collision_data: np.ndarray = self.find_neighbor_pairs(new_pos, scratch=True, fixed=new_fixed)
+        if timer:
+            timer.lap("neighbor_search")
+        if observers:
+            classes = self._color_index[:, 0] - 1
+            for observer in observers:
+                observer.add_pairs(collision_data, classes)
+            self._finish_pair_observers(observers)
+        if self._swept:
+            swept_pos, involved = self._sweep(delta_pos)
+        if self._integrator.commit_drift or collision_data.size == 0:
+            self._store_positions(new_pos, new_fixed)
         if collision_data.size == 0:
-            self._particles = new_pos
+            if self._swept:
+                self._store_positions(swept_pos, where=involved[:, None])
+            if self._integrator.commit_drift:
+                self._integrator.finish(self, self._zero_acceleration())
             return
 
-        colliding_mask = collision_data[:, 2] <= 2 * self._radius
-        if colliding_mask.any():
+        colliding_mask = np.less_equal(collision_data[:, 2], 2 * self._radius, out=self._state.buffer("contact_mask", collision_data.shape[0], dtype=bool))
+        if timer:
+            timer.count("pairs", collision_data.shape[0])
+            timer.count("colliding", np.count_nonzero(involved) if self._swept else np.count_nonzero(colliding_mask))
+        if self._swept:
+            self._store_positions(swept_pos, where=involved[:, None])
+        elif colliding_mask.any():
             self.update_velocities_collisions(new_pos, collision_data[colliding_mask], mode='collision')
+            self._overlaps = 2 * self._radius - collision_data[colliding_mask, 2]
+        if timer:
+            timer.lap("collision")
 
         self.update_velocities_collisions(new_pos, collision_data, mode='interaction')
 
 
+    def _pair_observers(self) -> list:
+        """
+        Starts the analyses that are due in this step and consume its pair list (cluster analysis and pair
+        correlation), so that they need no neighbor search of their own.
+        """
+        observers = [observer for observer, interval in ((self._cluster_analysis, self._cluster_interval), (self._pair_correlation, self._rdf_interval))
+                     if interval and self._step % interval == 0]
+        for observer in observers:
+            observer.begin()
+        return observers
+
+
+    def _finish_pair_observers(self, observers: list) -> None:
+        """
+        Completes the analyses started by `_pair_observers` once all pairs of the step were added.
+        """
+        classes = self._color_index[:, 0] - 1
+        if self._cluster_analysis in observers:
+            self._clusters = {**self._cluster_analysis.finish(classes), "step": self._step}
+        if self._pair_correlation in observers:
+            # class pairs without interaction are only searched up to the short-range repulsion
+            _, active = self._interaction_coefficients()
+            short_radius = max(self._beta * self._interaction_radius, 2 * self._radius)
+            reach = np.full(active.shape, self._interaction_radius) if active.all() else np.where(active, self._interaction_radius, short_radius)
+            self._pair_correlation.finish(classes, reach)
+
+
+    def _check_particle_count(self, n: int) -> None:
+        """
+        Rejects particle counts whose indices the pair lists cannot hold exactly in the state dtype.
+        
+        Parameters
+        ----------
+        n : int
+            The number of particles.
+        
+        Raises
+        ------
+        ValueError
+            If the system is float32 and `n` exceeds `MAX_FLOAT32_PARTICLES`.
+        """
+        if self._dtype == np.float32 and n > MAX_FLOAT32_PARTICLES:
+            raise ValueError(f"float32 systems support at most {MAX_FLOAT32_PARTICLES} particles, use float64 for {n}")
+
+
+    def _brownian_acceleration(self) -> np.ndarray:
+        """
+        Draws the Brownian acceleration of every particle for the coming step.
+        """
+        return np.random.normal(0, self._brownian_std, self._particles.shape).astype(self._dtype, copy=False)
+
+
+    def _translate(self, delta_pos: np.ndarray, out: np.ndarray, fixed_out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Moves the particles from their current positions by `delta_pos` under periodic boundaries.
+        
+        Parameters
+        ----------
+        delta_pos : np.ndarray
+            A 2D array with the displacement of each particle.
+        out : np.ndarray
+            A 2D array the moved positions are written into, may be `self._particles`.
+        fixed_out : np.ndarray, optional
+            In fixed-point mode, a uint32 array the moved fixed-point coordinates are written into, may be the
+            state's own (default is None, required in fixed-point mode).
+        
+        Returns
+        -------
+        np.ndarray
+            `out`, within [0, width) and [0, height).
+        """
+        if self._fixed_scale is None:
+            return self._wrap_around(np.add(self._particles, delta_pos, out=out), out=out)
+        # the displacement is rounded to whole fixed-point steps, the sum wraps through uint32 overflow
+        np.add(self._state.fixed, self._encode(delta_pos, out=self._state.buffer("fixed_delta", delta_pos.shape[0], 2, dtype=np.uint32)), out=fixed_out)
+        return self._decode(fixed_out, out=out)
+
+
+    def _store_positions(self, positions: np.ndarray, fixed: np.ndarray | None = None, where: np.ndarray | bool = True) -> None:
+        """
+        Writes new positions into the state. In fixed-point mode they are stored through their fixed-point
+        encoding, which also wraps positions that were pushed out of the simulation area.
+        
+        Parameters
+        ----------
+        positions : np.ndarray
+            A 2D array of particle positions.
+        fixed : np.ndarray, optional
+            The fixed-point coordinates `positions` were decoded from, if at hand (default is None).
+        where : np.ndarray or bool, optional
+            A mask broadcastable to the positions selecting what is written (default is True, everything).
+        """
+        if self._fixed_scale is None:
+            np.copyto(self._particles, positions, where=where)
+            return
+        if fixed is None:
+            fixed = self._encode(positions, out=self._state.buffer("fixed_store", positions.shape[0], 2, dtype=np.uint32))
+            positions = self._decode(fixed, out=self._state.buffer("fixed_decoded", positions.shape[0], 2))
+        np.copyto(self._state.fixed, fixed, where=where)
+        np.copyto(self._particles, positions, where=where)
+
+
+    def _encode(self, positions: np.ndarray, out: np.ndarray) -> np.ndarray:
+        """
+        Rounds positions (or displacements) to fixed-point coordinates. Values outside the simulation area wrap
+        through the cast to uint32.
+        
+        Parameters
+        ----------
+        positions : np.ndarray
+            A 2D array of positions or displacements.
+        out : np.ndarray
+            A uint32 array of the same shape the coordinates are written into.
+        
+        Returns
+        -------
+        np.ndarray
+            `out`.
+        """
+        n = positions.shape[0]
+        steps = np.divide(positions, self._fixed_scale, out=self._state.buffer("fixed_steps", n, 2, dtype=np.float64))
+        np.rint(steps, out=steps)
+        # via int64, negative values do not fit uint32 directly, the second cast keeps the value modulo 2**32
+        whole = self._state.buffer("fixed_whole", n, 2, dtype=np.int64)
+        np.copyto(whole, steps, casting="unsafe")
+        np.copyto(out, whole, casting="unsafe")
+        return out
+
+
+    def _decode(self, fixed: np.ndarray, out: np.ndarray) -> np.ndarray:
+        """
+        Converts fixed-point coordinates to positions.
+        
+        Parameters
+        ----------
+        fixed : np.ndarray
+            A 2D uint32 array of fixed-point coordinates.
+        out : np.ndarray
+            A 2D array the positions are written into.
+        
+        Returns
+        -------
+        np.ndarray
+            `out`, within [0, width) and [0, height).
+        """
+        np.multiply(fixed, self._fixed_scale, out=out)
+        # float32 rounds the last fixed-point steps below the box size up to it
+        if self._dtype != np.float64:
+            np.subtract(out, self._box, out=out, where=np.greater_equal(out, self._box, out=self._state.buffer("wrap_mask", out.shape[0], 2, dtype=bool)))
+        return out
+
+
+    def _zero_acceleration(self) -> np.ndarray:
+        """
+        Retrieves the scratch acceleration of the step cleared to zero, for steps without any pairs.
+        """
+        acc = self._state.buffer("acc", self._particles.shape[0], 2)
+        acc.fill(0)
+        return acc
+
+
+    def _sweep(self, delta_pos: np.ndarray) -> tuple:
+        """
+        Runs `sweep_collisions` and keeps its overlaps for the diagnostics and adaptive stepping.
+        """
+        swept_pos, involved, overlaps = self.sweep_collisions(delta_pos)
+        self._overlaps = overlaps if overlaps.size else None
+        return swept_pos, involved
+    
+    
+    def sweep_collisions(self, delta_pos: np.ndarray) -> tuple:
+        """
+        Detects and resolves collisions along the paths of the particles during a step (continuous collision
+        detection), so particles moving more than `2 * self._radius` per step cannot tunnel through each other.
+        
+        Candidate pairs are found once on the start positions with a search radius padded by twice the largest
+        displacement, since a resting particle can be hit and pushed during the step. For each candidate the time of
+        impact is the first root of `|p_ij + s * d_ij| = 2 * self._radius` in the remaining fraction s of the step.
+        The step is then advanced in time order: all particles move to the impact time of the earliest contacts,
+        these are resolved with `resolve_contacts` and the displacements for the rest of the step are recomputed
+        from the new velocities. Contacts whose impact times are so close that no pair can overlap by more than
+        `self._radius` in between are resolved in the same batch. After at most `SWEPT_MAX_ROUNDS` batches the
+        remaining displacement is applied and residual overlaps are resolved statically.
+        
+        Parameters
+        ----------
+        delta_pos : np.ndarray
+            The displacement of each particle during the step, starting from `self._particles`.
+        
+        Returns
+        -------
+        positions : np.ndarray
+            The particle positions at the end of the step.
+        involved : np.ndarray
+            A boolean mask of the particles that took part in a contact.
+        overlaps : np.ndarray
+            The overlap depths of all resolved contacts.
+        """
+        n = self._particles.shape[0]
+        boxsize = [self._width, self._height]
+        # momentum is handed on in contacts, so every particle may move as far as the fastest one
+        pad = np.sqrt(np.einsum('ij,ij->i', delta_pos, delta_pos)).max(initial=0)
+        pairs = self._neighbor_search.search.pairs(self._particles, 2 * self._radius + 2 * pad, boxsize)
+        i_idx, j_idx = pairs[:, 0], pairs[:, 1]
+        
+        positions = self._particles.copy()
+        involved = np.zeros(n, dtype=bool)
+        overlaps = [np.empty(0, dtype=self._dtype)]
+        done = 0.0      # fraction of the step already advanced
+        for _ in range(SWEPT_MAX_ROUNDS):
+            displacement = self._velocity * self._delta_t * (1 - done)
+            impact, closing = self._time_of_impact(positions, displacement, i_idx, j_idx)
+            hits = np.flatnonzero(impact <= 1)
+            if hits.size == 0:
+                break
+            hits = hits[np.argsort(impact[hits], kind='stable')]
+            # largest overlap any pair of the batch can build up until the batch is resolved
+            spread = (impact[hits] - impact[hits[0]]) * np.maximum.accumulate(closing[hits])
+            batch = hits[:np.searchsorted(spread, self._radius, side='right')]
+            s_end = impact[batch[-1]]
+            positions = self._wrap_around(positions + s_end * displacement)
+            done += s_end * (1 - done)
+            
+            coll_arr = self.pair_data(positions, pairs[batch])
+            positions = self.resolve_contacts(positions, i_idx[batch], j_idx[batch], coll_arr[:, 2], coll_arr[:, 3:])
+            involved[i_idx[batch]] = involved[j_idx[batch]] = True
+            overlaps.append(np.maximum(2 * self._radius - coll_arr[:, 2], 0))
+        
+        positions = self._wrap_around(positions + self._velocity * self._delta_t * (1 - done))
+        if pairs.shape[0]:
+            # resolve what is still overlapping at the end of the step
+            coll_arr = self.pair_data(positions, pairs)
+            overlapping = coll_arr[:, 2] < 2 * self._radius
+            if overlapping.any():
+                positions = self.resolve_contacts(positions, i_idx[overlapping], j_idx[overlapping], coll_arr[overlapping, 2], coll_arr[overlapping, 3:])
+                involved[i_idx[overlapping]] = involved[j_idx[overlapping]] = True
+                overlaps.append(2 * self._radius - coll_arr[overlapping, 2])
+        return positions, involved, np.concatenate(overlaps)
+    
+    
+    def _time_of_impact(self, positions: np.ndarray, displacement: np.ndarray, i_idx: np.ndarray, j_idx: np.ndarray) -> tuple:
+        """
+        Computes the fraction of the displacement after which the particles of each pair touch.
+        
+        Parameters
+        ----------
+        positions : np.ndarray
+            A 2D array of particle positions.
+        displacement : np.ndarray
+            A 2D array of the remaining displacement of each particle.
+        i_idx : np.ndarray
+            Indices of the first particle of each pair.
+        j_idx : np.ndarray
+            Indices of the second particle of each pair.
+        
+        Returns
+        -------
+        impact : np.ndarray
+            The time of impact of each pair as fraction of the displacement, 0 for pairs that already overlap
+            and approach each other, and infinity for pairs that do not touch.
+        closing : np.ndarray
+            The length of the relative displacement of each pair.
+        """
+        dx = (positions[i_idx, 0] - positions[j_idx, 0] + self._width/2) % self._width - self._width/2
+        dy = (positions[i_idx, 1] - positions[j_idx, 1] + self._height/2) % self._height - self._height/2
+        rel = displacement[i_idx] - displacement[j_idx]
+        a = np.einsum('ij,ij->i', rel, rel)
+        b = 2 * (dx * rel[:, 0] + dy * rel[:, 1])
+        c = dx**2 + dy**2 - (2 * self._radius)**2
+        disc = b**2 - 4 * a * c
+        
+        impact = np.full(i_idx.shape[0], np.inf, dtype=self._dtype)
+        approaching = b < 0
+        hit = approaching & (c > 0) & (disc >= 0)
+        impact[hit] = (-b[hit] - np.sqrt(disc[hit])) / (2 * a[hit])
+        impact[approaching & (c <= 0)] = 0
+        return impact, np.sqrt(a)
+    
+    
+    def choose_delta_t(self, acc: np.ndarray) -> float:
+        """
+        Chooses the time step of the coming step for adaptive stepping.
+        
+        The step is bounded by a CFL-like condition, i.e. the fastest particle may travel at most `self._cfl`
+        times the particle radius, using the velocities the coming step will integrate with as predicted by the
+        integrator (`predict_velocity`, e.g. twice the velocity for the Euler update). If the contacts of
+        the previous step overlapped deeper than `MAX_OVERLAP_FRACTION` of the contact distance, the step is
+        shrunk proportionally. Growth is limited to `MAX_DT_GROWTH` per step and the result is clipped to the
+        bounds given by `adaptive_dt`.
+        
+        Parameters
+        ----------
+        acc : np.ndarray
+            The Brownian acceleration of the coming step.
+        
+        Returns
+        -------
+        float
+            The time step.
+        """
+        dt_min, dt_max = self._adaptive_dt
+        self._integrator.bind(self._particles.shape[0], self._dtype)
+        velocity = self._integrator.predict_velocity(self, acc)   # velocities as updated by the step
+        speed = np.sqrt(np.einsum('ij,ij->i', velocity, velocity).max(initial=0))
+        dt = dt_max if speed == 0 else self._cfl * self._radius / speed
+        if self._overlaps is not None and self._overlaps.size:
+            depth = self._overlaps.max()
+            target = MAX_OVERLAP_FRACTION * 2 * self._radius
+            if depth > target:
+                dt = min(dt, self._delta_t * target / depth)
+        dt = min(dt, self._delta_t * MAX_DT_GROWTH)
+        return float(np.clip(dt, dt_min, dt_max))
+    
+    
+    def update_diagnostics(self) -> dict:
+        """
+        Computes the diagnostics of the current state. Every value is a single vectorized reduction over
+        arrays the step already produced (velocities, masses and the contact distances of the step).
+        
+        Returns
+        -------
+        dict
+            - "step": number of steps advanced so far.
+            - "delta_t": the time step of the most recent step.
+            - "kinetic_energy": A 1D array with the kinetic energy of each particle class.
+            - "total_kinetic_energy": The kinetic energy of all particles.
+            - "momentum": A 1D array with the total momentum (x, y).
+            - "max_speed": The largest particle speed.
+            - "contacts": Number of contacts resolved in the step.
+            - "overlap_max", "overlap_mean": Largest and mean overlap depth of these contacts (0 without contacts).
+        """
+        speed2 = np.einsum('ij,ij->i', self._velocity, self._velocity)
+        kinetic = np.bincount(self._color_index[:, 0] - 1, weights=0.5 * self._mass * speed2, minlength=len(self._color_distribution))
+        overlaps = self._overlaps if self._overlaps is not None else np.empty(0)
+        self._diagnostics = {
+            "step": self._step,
+            "delta_t": self._delta_t,
+            "kinetic_energy": kinetic,
+            "total_kinetic_energy": float(kinetic.sum()),
+            "momentum": self._mass @ self._velocity,
+            "max_speed": float(np.sqrt(speed2.max(initial=0))),
+            "contacts": overlaps.shape[0],
+            "overlap_max": float(overlaps.max(initial=0)),
+            "overlap_mean": float(overlaps.mean()) if overlaps.size else 0.0,
+        }
+        return self._diagnostics
+    
+    
+    def total_energy(self, samples: int = 4001) -> float:
+        """
+        Computes the kinetic plus interaction energy of the current state, e.g. to measure the energy drift of an
+        integrator on a frictionless system without Brownian motion. The pair potential is integrated numerically
+        from `force`, scaled like the accelerations of `apply_interaction_accelerations`, and is zero at the
+        interaction radius. Unlike `update_diagnostics` this needs a neighbor search of its own.
+        
+        Parameters
+        ----------
+        samples : int, optional
+            Number of distances the potential is tabulated at between 0 and the interaction radius (default is 4001).
+        
+        Returns
+        -------
+        float
+            The total energy.
+        """
+        radius = self._interaction_radius
+        s = np.linspace(0, radius, samples)
+        coll = self.check_collisions(self._particles, radius)
+        coef = self._interaction_coefficients()[0][self._color_index[coll[:, 0].astype(int), 0] - 1, self._color_index[coll[:, 1].astype(int), 0] - 1]
+        potential = 0.0
+        for c in np.unique(coef):
+            f = self.force(s, np.full_like(s, c)) * radius * 40
+            work = np.concatenate(([0], np.cumsum((f[1:] + f[:-1]) / 2 * np.diff(s))))
+            potential += np.interp(coll[coef == c, 2], s, work - work[-1]).sum()
+        return float(0.5 * np.sum(self._mass * np.einsum('ij,ij->i', self._velocity, self._velocity)) + potential)
+    
+    
+    def _move_particles_chunked(self, new_pos: np.ndarray, delta_pos: np.ndarray, new_fixed: np.ndarray | None = None, observers: tuple = ()) -> None:
+        """
+        Memory-bounded variant of the collision and interaction part of `move_particles`.
+        
+        Parameters
+        ----------
+        new_pos : np.ndarray
+            The tentative particle positions of this step.
+        delta_pos : np.ndarray
+            The displacement of each particle during this step.
+        new_fixed : np.ndarray, optional
+            The fixed-point coordinates of `new_pos` in fixed-point mode (default is None).
+        observers : tuple, optional
+            Started pair observers to pass the pairs of every chunk to, see `_pair_observers` (default is ()).
+        
+        Returns
+        -------
+        None
+            The particle positions and velocities are updated in place.
+        """
+        timer = self._timer
+        acc, contacts, n_pairs = self.stream_pairs(new_pos, new_fixed, observers)
+        if observers:
+            self._finish_pair_observers(observers)
+        if self._swept:
+            swept_pos, involved = self._sweep(delta_pos)
+        if self._integrator.commit_drift or n_pairs == 0:
+            self._store_positions(new_pos, new_fixed)
+        if n_pairs == 0:
+            if self._swept:
+                self._store_positions(swept_pos, where=involved[:, None])
+            if self._integrator.commit_drift:
+                self._integrator.finish(self, self._zero_acceleration())
+            return
+        if timer:
+            timer.count("pairs", n_pairs)
+            timer.count("colliding", np.count_nonzero(involved) if self._swept else contacts.shape[0])
+        if self._swept:
+            self._store_positions(swept_pos, where=involved[:, None])
+        elif contacts.size:
+            self.update_velocities_collisions(new_pos, contacts, mode='collision')
+            self._overlaps = 2 * self._radius - contacts[:, 2]
+        if timer:
+            timer.lap("collision")
+        self.apply_interaction_accelerations(acc)
+        if timer:
+            timer.lap("accumulate")
+    
+    
+    def _chunk_size(self, n: int) -> int:
+        """
+        Computes how many particles can own the pairs of one chunk without exceeding the memory budget.
+        
+        The number of neighbors per particle is estimated from the particle density within the interaction
+        radius, or from the densest chunk of earlier steps if that was larger.
+        
+        Parameters
+        ----------
+        n : int
+            Number of particles.
+        
+        Returns
+        -------
+        int
+            Number of particles per chunk, `n` if the budget is unbounded.
+        """
+        if self._memory_budget is None or n == 0:
+            return n
+        density = n / (self._width * self._height)
+        neighbors = max(density * np.pi * self._interaction_radius**2, self._pairs_per_particle, 1)
+        return int(np.clip(self._memory_budget // (PAIR_BYTES * neighbors), 1, n))
+    
+    
+    def stream_pairs(self, positions: np.ndarray, fixed: np.ndarray | None = None, observers: tuple = ()) -> tuple:
+        """
+        Walks the domain in vertical strips and reduces the interaction forces of each strip into an
+        acceleration array, so that only the pairs of one strip are held in memory at a time.
+        
+        Every particle owns exactly one strip. For all owners of a strip, the neighbors within the interaction
+        radius are searched among the particles of the strip and a halo of one interaction radius around it,
+        with the same class-pair pruning as `find_neighbor_pairs`. Each ordered pair contributes to its owner
+        only, so every force is accumulated exactly once. Contacts (pairs within `2 * self._radius`) are few
+        and collected for the contact solver.
+        
+        Parameters
+        ----------
+        positions : np.ndarray
+            A 2D array of particle positions.
+        fixed : np.ndarray, optional
+            The fixed-point coordinates of `positions`, see `pair_data` (default is None).
+        observers : tuple, optional
+            Started pair observers (`ClusterAnalysis`, `PairCorrelation`) the pairs of every chunk are added to,
+            in both orders (default is ()).
+        
+        Returns
+        -------
+        acc : np.ndarray
+            A 2D array of shape (N, 2) with the summed interaction forces of each particle, a scratch buffer
+            of `_state` that is only valid until the next step.
+        contacts : np.ndarray
+            A 2D array in the format of `check_collisions` holding each contact once (i < j).
+        n_pairs : int
+            Number of unordered neighbor pairs found.
+        """
+        n = positions.shape[0]
+        _, active = self._interaction_coefficients()
+        short_radius = max(self._beta * self._interaction_radius, 2 * self._radius)
+        reach = self._interaction_radius if active.any() else short_radius
+        boxsize = [self._width, self._height]
+        classes = self._color_index[:, 0] - 1
+        
+        timer = self._timer
+        search = self._neighbor_search.select((n, self._radius, self._interaction_radius, self._width, self._height, active.tobytes(), "chunked"), n)
+        start = time.perf_counter()
+        acc = self._state.buffer("acc", n, 2)
+        acc.fill(0)
+        contacts = [np.empty((0, 5), dtype=self._dtype)]
+        n_pairs = 0
+        chunk = self._chunk_size(n)
+        order = np.argsort(positions[:, 0], kind='stable')
+        for lo in range(0, n, chunk):
+            owners = order[lo:lo + chunk]
+            x_lo, x_hi = positions[owners[0], 0], positions[owners[-1], 0]
+            if x_hi - x_lo + 2 * reach >= self._width:
+                halo = np.arange(n)
+            else:
+                halo = np.flatnonzero((positions[:, 0] - x_lo + reach) % self._width <= x_hi - x_lo + 2 * reach)
+            
+            sub = search.cross_pairs(positions[owners], positions[halo], short_radius, boxsize)
+            pairs = [np.column_stack((owners[sub[:, 0]], halo[sub[:, 1]]))]
+            for a, b in zip(*np.nonzero(active)):
+                own, near = owners[classes[owners] == a], halo[classes[halo] == b]
+                if own.size and near.size:
+                    sub = search.cross_pairs(positions[own], positions[near], self._interaction_radius, boxsize)
+                    pairs.append(np.column_stack((own[sub[:, 0]], near[sub[:, 1]])))
+            pairs_arr = np.concatenate(pairs, axis=0)
+            coll_arr = self.pair_data(positions, pairs_arr, fixed=fixed)
+            keep = coll_arr[:, 0] != coll_arr[:, 1]
+            keep[pairs[0].shape[0]:] &= coll_arr[pairs[0].shape[0]:, 2] > short_radius
+            coll_arr = coll_arr[keep]
+            if timer:
+                timer.lap("neighbor_search")
+            if coll_arr.shape[0] == 0:
+                continue
+            for observer in observers:
+                observer.add_pairs(coll_arr, classes, ordered=True)
+            
+            n_pairs += coll_arr.shape[0]
+            self._pairs_per_particle = max(self._pairs_per_particle, coll_arr.shape[0] / owners.shape[0])
+            i_idx, j_idx = coll_arr[:, 0].astype(int), coll_arr[:, 1].astype(int)
+            acc += self.pair_forces(i_idx, j_idx, coll_arr[:, 2], coll_arr[:, 3:], symmetric=False, out=self._state.buffer("pair_acc", n, 2))
+            contacts.append(coll_arr[(coll_arr[:, 2] <= 2 * self._radius) & (i_idx < j_idx)])
+            if timer:
+                timer.lap("force")
+        self._neighbor_search.record(time.perf_counter() - start)
+        
+        return acc, np.concatenate(contacts, axis=0), n_pairs // 2
+    
+    
+    def reorder_particles(self) -> np.ndarray:
+        """
+        Permutes all per-particle arrays along a space-filling curve, so that particles which are close in
+        space are also close in memory and pair gathers hit the cache.
+        
+        The arrays are permuted in place, references held elsewhere (e.g. the colors used by the renderer)
+        therefore stay valid. `_ids` and `_slots` are updated so that external IDs remain stable.
+        
+        Returns
+        -------
+        np.ndarray
+            The applied permutation, new storage index k holds the particle previously stored at perm[k].
+        """
+        perm = np.argsort(self._spatial_keys(self._particles), kind="stable")
+        for arr in (self._particles, self._velocity, self._colors, self._color_index, self._restitution, self._mass, self._ids):
+            arr[:] = arr[perm]
+        if self._fixed_scale is not None:
+            self._state.fixed[:] = self._state.fixed[perm]
+        self._integrator.permute(perm)
+        self._slots[self._ids] = np.arange(self._ids.shape[0])
+        return perm
+    
+    
+    def _spatial_keys(self, positions: np.ndarray) -> np.ndarray:
+        """
+        Computes the sort key of each particle along the configured space-filling curve.
+        
+        Parameters
+        ----------
+        positions : np.ndarray
+            A 2D array of particle positions.
+        
+        Returns
+        -------
+        np.ndarray
+            A 1D array of integer keys, either interleaved 16 bit Morton codes or row-major cell indices
+            of a grid with cells of size `self._interaction_radius`.
+        """
+        if self._reorder_curve == "cell":
+            n_cols = int(np.ceil(self._width / self._interaction_radius))
+            cells = (positions // self._interaction_radius).astype(np.int64)
+            return cells[:, 1] * n_cols + cells[:, 0]
+        
+        scale = (1 << 16) - 1
+        x = np.clip(positions[:, 0] / self._width * scale, 0, scale).astype(np.uint32)
+        y = np.clip(positions[:, 1] / self._height * scale, 0, scale).astype(np.uint32)
+        # spread the 16 bits of each coordinate to every second bit
+        for shift, mask in ((8, 0x00FF00FF), (4, 0x0F0F0F0F), (2, 0x33333333), (1, 0x55555555)):
+            x = (x | (x << shift)) & mask
+            y = (y | (y << shift)) & mask
+        return x | (y << 1)
+    
+    
     def create_interaction_matrix(self, matrix: dict):
-        int_matrix = np.zeros((len(self._color_distribution), len(self._color_distribution)), dtype=float)
+        int_matrix = np.zeros((len(self._color_distribution), len(self._color_distribution)), dtype=self._dtype)
         for (i, j), val in matrix.items():
             i0 = i - 1
             j0 = j - 1
@@ -273,9 +1426,9 @@ class ParticleSystem:
         return int_matrix
     
     
-    def check_collisions(self, positions: np.ndarray, radius: float) -> tuple:
+    def check_collisions(self, positions: np.ndarray, radius: float, scratch: bool = False, fixed: np.ndarray | None = None) -> tuple:
         """
-        Detects collisions between particles using a spatial tree.
+        Detects collisions between particles using the current neighbor search strategy.
         
         Parameters
         ----------
@@ -283,6 +1436,11 @@ class ParticleSystem:
             A 2D array of particle positions.
         radius : float
             The radius used for collision detection.
+        scratch : bool, optional
+            Whether the result is written into a scratch buffer of `_state` instead of a new array. It is then
+            only valid until the next call with `scratch=True` (default is False).
+        fixed : np.ndarray, optional
+            The fixed-point coordinates of `positions`, see `pair_data` (default is None).
         
         Returns
         -------
@@ -294,29 +1452,153 @@ class ParticleSystem:
             - normals : unit vectors pointing from the second particle to the first
         """
         # boxsize=[self._width, self._height] is necessary for periodic boundaries
-        tree = cKDTree(positions, boxsize=[self._width, self._height])
-        pairs = tree.query_pairs(r=radius)
-        if not pairs:
+        pairs_arr = self._neighbor_search.search.pairs(positions, radius, [self._width, self._height])
+        if pairs_arr.shape[0] == 0:
+            return np.empty(0)
+        
+        return self.pair_data(positions, pairs_arr, out=self._state.buffer("pairs", pairs_arr.shape[0], 5) if scratch else None, fixed=fixed)
+    
+    
+    def find_neighbor_pairs(self, positions: np.ndarray, scratch: bool = False, fixed: np.ndarray | None = None) -> np.ndarray:
+        """
+        Detects all pairs that contribute to the next step, pruning the search per class pair.
+        
+        Pairs of classes whose interaction coefficients are zero in both directions only feel the
+        universal short-range repulsion, so they are only searched up to `self._beta * self._interaction_radius`
+        (or the contact distance `2 * self._radius` if that is larger). Only class pairs with a nonzero
+        coefficient are searched up to the full `self._interaction_radius`, each on the subset of particles
+        of the two classes involved.
+        
+        Parameters
+        ----------
+        positions : np.ndarray
+            A 2D array of particle positions.
+        scratch : bool, optional
+            Whether the result may be written into a scratch buffer, see `check_collisions` (default is False).
+        fixed : np.ndarray, optional
+            The fixed-point coordinates of `positions`, see `pair_data` (default is None).
+        
+        Returns
+        -------
+        np.ndarray
+            A 2D array of shape (K, 5) with the same columns as returned by `check_collisions`, or an
+            empty array if no pairs were found.
+        """
+        _, active = self._interaction_coefficients()
+        signature = (positions.shape[0], self._radius, self._interaction_radius, self._width, self._height, active.tobytes())
+        search = self._neighbor_search.select(signature, positions.shape[0])
+        start = time.perf_counter()
+        coll_arr = self._find_neighbor_pairs(positions, search, active, scratch, fixed)
+        self._neighbor_search.record(time.perf_counter() - start)
+        return coll_arr
+    
+    
+    def _find_neighbor_pairs(self, positions: np.ndarray, search, active: np.ndarray, scratch: bool = False, fixed: np.ndarray | None = None) -> np.ndarray:
+        """
+        Runs the pruned neighbor search of `find_neighbor_pairs` with a given search strategy.
+        
+        Parameters
+        ----------
+        positions : np.ndarray
+            A 2D array of particle positions.
+        search : KDTreeSearch | BruteForceSearch | CellListSearch
+            The neighbor search strategy to use.
+        active : np.ndarray
+            A boolean (K, K) matrix marking the class pairs with a nonzero interaction coefficient.
+        scratch : bool, optional
+            Whether the result may be written into a scratch buffer, see `check_collisions` (default is False).
+        fixed : np.ndarray, optional
+            The fixed-point coordinates of `positions`, see `pair_data` (default is None).
+        
+        Returns
+        -------
+        np.ndarray
+            See `find_neighbor_pairs`.
+        """
+        if active.all():
+            return self.check_collisions(positions, radius=self._interaction_radius, scratch=scratch, fixed=fixed)
+        
+        short_radius = max(self._beta * self._interaction_radius, 2 * self._radius)
+        boxsize = [self._width, self._height]
+        pairs = [search.pairs(positions, short_radius, boxsize)]
+        
+        classes = self._color_index[:, 0] - 1
+        members = [np.flatnonzero(classes == c) for c in range(active.shape[0])]
+        for a, b in zip(*np.nonzero(np.triu(active))):
+            if members[a].size == 0 or members[b].size == 0:
+                continue
+            if a == b:
+                sub = search.pairs(positions[members[a]], self._interaction_radius, boxsize)
+                pairs.append(members[a][sub])
+            else:
+                sub = search.cross_pairs(positions[members[a]], positions[members[b]], self._interaction_radius, boxsize)
+                pairs.append(np.column_stack((members[a][sub[:, 0]], members[b][sub[:, 1]])))
+        
+        pairs_arr = np.sort(np.concatenate(pairs, axis=0), axis=1)
+        if pairs_arr.shape[0] == 0:
             return np.empty(0)
+        coll_arr = self.pair_data(positions, pairs_arr, out=self._state.buffer("pairs", pairs_arr.shape[0], 5) if scratch else None, fixed=fixed)
+        # pairs within the short radius were already found by the first query
+        keep = np.ones(coll_arr.shape[0], dtype=bool)
+        keep[pairs[0].shape[0]:] = coll_arr[pairs[0].shape[0]:, 2] > short_radius
+        return coll_arr[keep]
+    
+    
+    def pair_data(self, positions: np.ndarray, pairs_arr: np.ndarray, out: np.ndarray | None = None, fixed: np.ndarray | None = None) -> np.ndarray:
+        """
+        Computes distances and normals for a list of particle pairs under periodic boundaries.
+        
+        Parameters
+        ----------
+        positions : np.ndarray
+            A 2D array of particle positions.
+        pairs_arr : np.ndarray
+            A 2D array of shape (K, 2) containing the indices of each pair.
+        out : np.ndarray, optional
+            A 2D array of shape (K, 5) the result is written into (default is None, a new array).
+        fixed : np.ndarray, optional
+            The fixed-point coordinates of `positions` in fixed-point mode. The differences are then taken
+            between these, where the uint32 difference reinterpreted as int32 is the minimum image
+            (default is None, floating point differences wrapped with a modulo).
         
-        pairs_arr = np.fromiter((i for pair in pairs for i in pair), dtype=int).reshape(-1, 2)
-        coll_arr = np.zeros((pairs_arr.shape[0], 5))
+        Returns
+        -------
+        np.ndarray
+            A 2D array of shape (K, 5) with the same columns as returned by `check_collisions`.
+        """
+        k = pairs_arr.shape[0]
+        coll_arr = np.empty((k, 5), dtype=self._dtype) if out is None else out
+        if fixed is None and self._fixed_scale is not None and positions is self._particles:
+            fixed = self._state.fixed
         i_idx = pairs_arr[:, 0]
         j_idx = pairs_arr[:, 1]
-        
+        # contiguous temporaries, strided arithmetic on the columns of coll_arr is markedly slower
+        dx, dy, distances, tmp = (self._state.buffer(name, k) for name in ("pair_dx", "pair_dy", "pair_distance", "pair_tmp"))
         
         # compute differences in x and y, wrap around boundaries
-        dx = (positions[i_idx, 0] - positions[j_idx, 0] + self._width/2) % self._width - self._width/2
-        dy = (positions[i_idx, 1] - positions[j_idx, 1] + self._height/2) % self._height - self._height/2
-        distances = np.sqrt(dx**2 + dy**2)
+        for delta, axis, size in ((dx, 0, self._width), (dy, 1, self._height)):
+            if fixed is not None:
+                steps, other = self._state.buffer("pair_fixed", k, dtype=np.uint32), self._state.buffer("pair_fixed_j", k, dtype=np.uint32)
+                np.take(fixed[:, axis], i_idx, out=steps)
+                steps -= np.take(fixed[:, axis], j_idx, out=other)
+                np.multiply(steps.view(np.int32), self._fixed_scale[axis], out=delta)
+                continue
+            np.take(positions[:, axis], i_idx, out=delta)
+            delta -= np.take(positions[:, axis], j_idx, out=tmp)
+            delta += size/2
+            np.mod(delta, size, out=delta)
+            delta -= size/2
+        np.multiply(dx, dx, out=distances)
+        distances += np.multiply(dy, dy, out=tmp)
+        np.sqrt(distances, out=distances)
         
         coll_arr[:,:2] = pairs_arr
         coll_arr[:,2] = distances
-        coll_arr[:,3] = dx
-        coll_arr[:,4] = dy
 
-        distances_safe = np.where(distances == 0, 1, distances)
-        coll_arr[:,3:] /= distances_safe[:, None]
+        np.copyto(tmp, distances)
+        np.copyto(tmp, 1, where=np.equal(distances, 0, out=self._state.buffer("pair_mask", k, dtype=bool)))
+        np.divide(dx, tmp, out=coll_arr[:,3])
+        np.divide(dy, tmp, out=coll_arr[:,4])
         
         return coll_arr
     
@@ -341,33 +1623,168 @@ class ParticleSystem:
         -------
         None
         """
-        i_idx, j_idx = colliding_data[:,0].astype(int), colliding_data[:,1].astype(int)
+        k = colliding_data.shape[0]
+        i_idx, j_idx = self._state.buffer("i_idx", k, dtype=np.intp), self._state.buffer("j_idx", k, dtype=np.intp)
+        np.copyto(i_idx, colliding_data[:,0], casting="unsafe")
+        np.copyto(j_idx, colliding_data[:,1], casting="unsafe")
         normals = colliding_data[:,3:]
         distances = colliding_data[:,2]
         if mode == "collision":
-            # calculate overlap (depth) for each collision
-            depth = 2 * self._radius - distances
-            self._particles[i_idx] = positions[i_idx] + 0.5 * depth[:, None] * normals
-            self._particles[j_idx] = positions[j_idx] - 0.5 * depth[:, None] * normals
-            # calculate the relative velocity for each colliding pair
-            v_rel = self._velocity[j_idx] - self._velocity[i_idx]
-            # minimum restitution
-            e = np.minimum(self._restitution[i_idx], self._restitution[j_idx])
-            # compute the component of the relative velocity along the collision normal
-            dot = np.sum(v_rel * normals, axis=1)
-            # compute impulse magnitude for each collision pair
-            factor = -(1 + e) * dot
-            denom = (1 / self._mass[i_idx]) + (1 / self._mass[j_idx])
-            factor /= denom  # shape (K,)
-            
-            self._velocity[i_idx] -= (factor / self._mass[i_idx])[:, None] * normals
-            self._velocity[j_idx] += (factor / self._mass[j_idx])[:, None] * normals
+            n = self._particles.shape[0]
+            contacts = self._state.buffer("contacts", n, dtype=bool)
+            contacts.fill(False)
+            contacts[i_idx] = contacts[j_idx] = True
+            corrected = self.resolve_contacts(positions, i_idx, j_idx, distances, normals, out=self._state.buffer("corrected", n, 2))
+            if self._fixed_scale is None:
+                # corrections may push particles across the boundary, fixed-point storage wraps them itself
+                self._wrap_around(corrected, out=corrected)
+            self._store_positions(corrected, where=contacts[:, None])
             
         elif mode == 'interaction':
             self.calculate_interaction_accelerations(i_idx, j_idx, distances, normals)
 
     
-    def _wrap_around(self, positions)-> np.ndarray:
+    def resolve_contacts(self, positions: np.ndarray, i_idx: np.ndarray, j_idx: np.ndarray, distances: np.ndarray, normals: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Resolves all contacts of a step at once with a vectorized Jacobi solver.
+
+        Every contact contributes a position correction and an impulse to both of its particles. The
+        contributions are summed per particle with `np.bincount`, so a particle touching several others
+        receives all of them instead of only the last one written by fancy indexing. Position corrections
+        are averaged over the number of contacts of a particle to avoid overshooting in dense clusters.
+        Additional iterations (`self._solver_iterations`) re-evaluate the overlaps on the corrected positions.
+
+        Impulses are accumulated per contact over up to `IMPULSE_ITERATIONS` relaxed Jacobi sweeps until every
+        approaching contact separates with `restitution` times its approach speed before the step, and are
+        summed per particle so that momentum is conserved. Contacts sharing a particle thereby pass momentum
+        on like a sequence of collisions (e.g. a head-on chain of three equal elastic particles keeps its
+        kinetic energy) instead of cancelling each other's impulses.
+
+        Parameters
+        ----------
+        positions : np.ndarray
+            The tentative particle positions the contacts were detected on.
+        i_idx : np.ndarray
+            Indices of the first particle of each contact.
+        j_idx : np.ndarray
+            Indices of the second particle of each contact.
+        distances : np.ndarray
+            Distances between the particles of each contact.
+        normals : np.ndarray
+            Unit vectors pointing from the second to the first particle of each contact.
+        out : np.ndarray, optional
+            A 2D array of the shape of `positions` the result is written into (default is None, a new array).
+
+        Returns
+        -------
+        np.ndarray
+            A copy of `positions` with the contact particles moved apart. The velocities are updated in place.
+        """
+        n = self._particles.shape[0]
+        state = self._state
+        counts = np.bincount(i_idx, minlength=n)
+        counts += np.bincount(j_idx, minlength=n)
+        relax = np.divide(1, np.maximum(counts, 1, out=counts), out=state.buffer("relax", n))
+        if out is None:
+            corrected = positions.copy()
+        else:
+            corrected = out
+            np.copyto(corrected, positions)
+        e = np.minimum(self._restitution[i_idx], self._restitution[j_idx])
+        inv_mass = np.divide(1, self._mass, out=state.buffer("inv_mass", n))
+
+        self._resolve_impulses(i_idx, j_idx, normals, e, inv_mass, counts)
+        for it in range(self._solver_iterations):
+            if it > 0:
+                # re-evaluate overlaps on the corrected positions
+                dx = (corrected[i_idx, 0] - corrected[j_idx, 0] + self._width/2) % self._width - self._width/2
+                dy = (corrected[i_idx, 1] - corrected[j_idx, 1] + self._height/2) % self._height - self._height/2
+                distances = np.sqrt(dx**2 + dy**2)
+                nonzero = distances > 0
+                normals = normals.copy()
+                normals[nonzero, 0] = dx[nonzero] / distances[nonzero]
+                normals[nonzero, 1] = dy[nonzero] / distances[nonzero]
+            # calculate overlap (depth) for each contact, split evenly between both particles
+            depth = np.maximum(2 * self._radius - distances, 0)
+            shift = 0.5 * depth[:, None] * normals
+            scatter_i = self._scatter_add(i_idx, shift, out=state.buffer("scatter_i", n, 2))
+            scatter_i -= self._scatter_add(j_idx, shift, out=state.buffer("scatter_j", n, 2))
+            scatter_i *= relax[:, None]
+            corrected += scatter_i
+
+        return corrected
+
+
+    def _resolve_impulses(self, i_idx: np.ndarray, j_idx: np.ndarray, normals: np.ndarray, e: np.ndarray, inv_mass: np.ndarray, counts: np.ndarray) -> None:
+        """
+        Applies the contact impulses of `resolve_contacts` to the velocities with a projected Jacobi solver.
+        
+        Parameters
+        ----------
+        i_idx : np.ndarray
+            Indices of the first particle of each contact.
+        j_idx : np.ndarray
+            Indices of the second particle of each contact.
+        normals : np.ndarray
+            Unit vectors from the second to the first particle of each contact.
+        e : np.ndarray
+            The restitution of each contact.
+        inv_mass : np.ndarray
+            The inverse mass of every particle.
+        counts : np.ndarray
+            The number of contacts of every particle, at least 1.
+        """
+        n = self._particles.shape[0]
+        state = self._state
+        denom = inv_mass[i_idx] + inv_mass[j_idx]
+        # relaxing every contact by the contact count of its busier particle keeps the sweeps convergent
+        weight = 1 / (np.maximum(counts[i_idx], counts[j_idx]) * denom)
+        # approach speed along the normal before the step, separating contacts need no impulse
+        target = e * np.maximum(np.einsum('ij,ij->i', self._velocity[j_idx] - self._velocity[i_idx], normals), 0)
+        total = np.zeros_like(target)
+        for _ in range(IMPULSE_ITERATIONS):
+            closing = np.einsum('ij,ij->i', self._velocity[j_idx] - self._velocity[i_idx], normals)
+            # impulses may only push, their sum is clamped at 0
+            delta = np.maximum(total + (closing + target) * weight, 0) - total
+            total += delta
+            impulse = delta[:, None] * normals
+            scatter_i = self._scatter_add(i_idx, impulse, out=state.buffer("scatter_i", n, 2))
+            scatter_i *= inv_mass[:, None]
+            self._velocity += scatter_i
+            scatter_j = self._scatter_add(j_idx, impulse, out=state.buffer("scatter_j", n, 2))
+            scatter_j *= inv_mass[:, None]
+            self._velocity -= scatter_j
+            if np.abs(delta).max(initial=0) <= IMPULSE_TOLERANCE * total.max(initial=0):
+                break
+
+
+    def _scatter_add(self, idx: np.ndarray, values: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Sums per-pair vectors into a per-particle array.
+        
+        Parameters
+        ----------
+        idx : np.ndarray
+            A 1D array of particle indices, one per row of `values`. Indices may repeat.
+        values : np.ndarray
+            A 2D array of shape (K, 2) holding the vectors to accumulate.
+        out : np.ndarray, optional
+            A 2D array of shape (N, 2) the sums are written into (default is None, a new array).
+        
+        Returns
+        -------
+        np.ndarray
+            A 2D array of shape (N, 2) containing the summed vectors of every particle.
+        """
+        n = self._particles.shape[0]
+        if out is None:
+            out = np.empty((n, values.shape[1]), dtype=values.dtype)
+        for k in range(values.shape[1]):
+            out[:, k] = np.bincount(idx, weights=values[:, k], minlength=n)
+        return out
+
+    
+    def _wrap_around(self, positions, out: np.ndarray | None = None)-> np.ndarray:
         """
         Wraps particle positions around the canvas.
         
@@ -375,17 +1792,23 @@ class ParticleSystem:
         ----------
         positions : np.ndarray
             A 2D array of particle positions.
+        out : np.ndarray, optional
+            A 2D array of the same shape the result is written into, may be `positions` itself
+            (default is None, a new array).
         
         Returns
         -------
         np.ndarray
-            A 2D array of particle positions with wrapping applied.
+            A 2D array of particle positions with wrapping applied, within [0, width) and [0, height).
         """
-        wrapped_positions = np.mod(positions, (self._width, self._height))
+        wrapped_positions = np.mod(positions, self._box, out=out)
+        # tiny negative coordinates round up to exactly the box size
+        outside = np.greater_equal(wrapped_positions, self._box, out=self._state.buffer("wrap_mask", positions.shape[0], 2, dtype=bool))
+        np.subtract(wrapped_positions, self._box, out=wrapped_positions, where=outside)
         return wrapped_positions
 
 
-    def force(self, dist: np.ndarray, int_coef: np.ndarray) -> np.ndarray:
+    def force(self, dist: np.ndarray, int_coef: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
         """
         Compute the interaction force magnitude based on particle distance and interaction coefficient.
 
@@ -403,26 +1826,40 @@ class ParticleSystem:
         int_coef : np.ndarray
             The interaction coefficient(s) corresponding to the particles. Positive values indicate attraction,
             whereas negative values indicate repulsion.
+        out : np.ndarray, optional
+            A 1D array the force magnitudes are written into (default is None, a new array).
 
         Returns
         -------
         np.ndarray
             An array of force magnitudes computed for each distance in `dist`.
         """
-        dist = np.asarray(dist/self._interaction_radius)
+        dist = np.asarray(dist)
         int_coef = np.asarray(int_coef).reshape(-1)
-    
-        forces = np.zeros_like(dist, dtype=float)
+        k = dist.shape[0]
+        state = self._state
+        scaled = np.divide(dist, self._interaction_radius, out=state.buffer("force_scaled", k, dtype=dist.dtype))
+        region = state.buffer("force_region", k, dtype=dist.dtype)
+        mask, bound = state.buffer("force_mask", k, dtype=bool), state.buffer("force_bound", k, dtype=bool)
+        forces = np.empty_like(scaled) if out is None else out
+        forces.fill(0)
 
         # region 1: r < beta
-        mask1 = (dist < self._beta)
-        forces[mask1] = (dist[mask1] / self._beta) - 1
+        np.divide(scaled, self._beta, out=region)
+        region -= 1
+        np.copyto(forces, region, where=np.less(scaled, self._beta, out=mask))
 
         # region 2: beta < r < 1
-        mask2 = (dist > self._beta) & (dist < 1)
-        forces[mask2] = int_coef[mask2] * (
-            1 - (np.abs(2*dist[mask2] - 1 - self._beta) / (1 - self._beta))
-        )
+        np.multiply(scaled, 2, out=region)
+        region -= 1
+        region -= self._beta
+        np.abs(region, out=region)
+        region /= 1 - self._beta
+        np.subtract(1, region, out=region)
+        region *= int_coef
+        np.greater(scaled, self._beta, out=mask)
+        mask &= np.less(scaled, 1, out=bound)
+        np.copyto(forces, region, where=mask)
         return forces
         
         
@@ -434,12 +1871,11 @@ class ParticleSystem:
           1. Retrieves the corresponding interaction coefficient from the interaction matrix using each particle's color index.
           2. Computes the interaction force magnitude via the `force` method based on the distance between particles.
           3. Applies the force along the negative of the provided normal direction to obtain a force vector.
-          4. Accumulates these force vectors into an acceleration array.
+          4. Accumulates these force vectors for both particles of each pair into an acceleration array.
           5. Scales the accumulated acceleration by the interaction radius and a constant factor (40),
              then normalizes it by the particle masses.
-          6. Applies a friction factor to the current velocities.
-          7. Updates the velocities using the computed acceleration and time step.
-          8. Updates the particle positions with periodic boundary conditions.
+          6. Lets the integrator apply friction and complete the velocity and position update of the step
+             (see `apply_interaction_accelerations`).
 
         Parameters
         ----------
@@ -456,17 +1892,102 @@ class ParticleSystem:
         -------
         None
         """
-        interaction_matrix = self.create_interaction_matrix(self._interaction_matrix)
-        int_coef = interaction_matrix[self._color_index[i_idx]-1, self._color_index[j_idx]-1]
-        forces = self.force(distances, int_coef)
-        forces_norm = -normals*forces[:, None]
-        acc = np.zeros(self._particles.shape)
-        np.add.at(acc, i_idx, forces_norm)
-        acc*=self._interaction_radius*40
+        acc = self.pair_forces(i_idx, j_idx, distances, normals, out=self._state.buffer("acc", self._particles.shape[0], 2))
+        if self._timer:
+            self._timer.lap("force")
+        self.apply_interaction_accelerations(acc)
+        if self._timer:
+            self._timer.lap("accumulate")
+
+
+    def pair_forces(self, i_idx: np.ndarray, j_idx: np.ndarray, distances: np.ndarray, normals: np.ndarray, symmetric: bool = True, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Sums the interaction force vectors of all pairs per particle.
+
+        Parameters
+        ----------
+        i_idx : np.ndarray
+            Array of indices for the first particle in each interacting pair.
+        j_idx : np.ndarray
+            Array of indices for the second particle in each interacting pair.
+        distances : np.ndarray
+            Array of distances between each interacting particle pair.
+        normals : np.ndarray
+            Array of normalized direction vectors for each pair.
+        symmetric : bool, optional
+            If True, every pair is listed once and the force is applied to both particles. If False, the
+            pairs are ordered and only the first particle receives the force (default is True).
+        out : np.ndarray, optional
+            A 2D array of shape (N, 2) the sums are written into (default is None, a new array).
+
+        Returns
+        -------
+        np.ndarray
+            A 2D array of shape (N, 2) with the summed force vectors.
+        """
+        k = i_idx.shape[0]
+        coefficients = self._state.buffer("coef", k)
+        forces = self.force(distances, self.pair_coefficients(i_idx, j_idx, out=coefficients), out=self._state.buffer("pair_force", k))
+        forces_norm = np.multiply(normals, forces[:, None], out=self._state.buffer("pair_vector", k, 2))
+        np.negative(forces_norm, out=forces_norm)
+        acc = self._scatter_add(i_idx, forces_norm, out=out)
+        if symmetric:
+            # the pair list only holds i < j, apply the force to both ends so results do not depend on storage order
+            self.force(distances, self.pair_coefficients(j_idx, i_idx, out=coefficients), out=forces)
+            acc += self._scatter_add(j_idx, np.multiply(normals, forces[:, None], out=forces_norm), out=self._state.buffer("scatter_j", acc.shape[0], 2))
+        return acc
+
+
+    def pair_coefficients(self, i_idx: np.ndarray, j_idx: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Looks up the interaction coefficient of each pair, i.e. how strongly the first particle is attracted
+        (positive) or repelled (negative) by the second.
+
+        Parameters
+        ----------
+        i_idx : np.ndarray
+            Array of indices for the first particle in each pair.
+        j_idx : np.ndarray
+            Array of indices for the second particle in each pair.
+        out : np.ndarray, optional
+            A 1D array the coefficients are written into (default is None, a new array).
+
+        Returns
+        -------
+        np.ndarray
+            A 1D array with the coefficient of each pair.
+        """
+        interaction_matrix, _ = self._interaction_coefficients()
+        k = i_idx.shape[0]
+        classes = self._color_index[:, 0]
+        rows = np.take(classes, i_idx, out=self._state.buffer("coef_row", k, dtype=classes.dtype))
+        columns = np.take(classes, j_idx, out=self._state.buffer("coef_column", k, dtype=classes.dtype))
+        # flat index (row - 1) * K + column - 1 into the matrix
+        rows -= 1
+        rows *= interaction_matrix.shape[1]
+        rows += columns
+        rows -= 1
+        return np.take(interaction_matrix.ravel(), rows, out=out)
+
+
+    def apply_interaction_accelerations(self, acc: np.ndarray) -> None:
+        """
+        Scales summed interaction forces to accelerations and lets the integrator complete the step with them.
+
+        Parameters
+        ----------
+        acc : np.ndarray
+            A 2D array of shape (N, 2) with the summed force vectors, as returned by `pair_forces`. It is
+            scaled in place.
+
+        Returns
+        -------
+        None
+        """
+        acc *= self._interaction_radius
+        acc *= 40
         acc /= self._mass[:, np.newaxis]
-        self._velocity *= self._friction_fact
-        self._velocity = acc*self.delta_t
-        self._particles = np.mod(self._particles + self._velocity*self.delta_t, (self._width, self._height))
+        self._integrator.finish(self, acc)
 
 
     @DeprecationWarning
@@ -0,0 +1,297 @@
+import argparse
+import json
+import os
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+PIXEL_BUDGET = 1 << 20  # disc pixels splatted at once, bounds the index and color arrays of a chunk
+IN_FLIGHT = 2           # frames queued per worker when rendering a stream
+PNG_COMPRESSION = 1     # zlib level of written PNG files
+
+
+def disc_offsets(radius: int) -> tuple:
+    """
+    Lists the pixel offsets covered by a disc.
+
+    Parameters
+    ----------
+    radius : int
+        Radius of the disc in pixels, 0 covers a single pixel.
+
+    Returns
+    -------
+    tuple of np.ndarray
+        The row and column offsets of all pixels whose center lies within `radius + 0.5` of the center.
+    """
+    dy, dx = np.mgrid[-radius:radius + 1, -radius:radius + 1]
+    inside = dy**2 + dx**2 <= (radius + 0.5)**2
+    return dy[inside], dx[inside]
+
+
+def rasterize(positions: np.ndarray, colors: np.ndarray, sizes: np.ndarray, box: tuple, resolution: tuple,
+              background: tuple = (0.14, 0.14, 0.17, 1.0), out: np.ndarray | None = None) -> np.ndarray:
+    """
+    Draws the particles as discs into an RGBA image. Discs of equal pixel size are drawn in storage order with
+    later ones on top, smaller discs before larger ones. Discs wrap around the image edges like the periodic
+    simulation area, a particle's alpha blends it with the background.
+
+    Parameters
+    ----------
+    positions : np.ndarray
+        A 2D array of shape (N, 2) with positions in [0, width) and [0, height), y pointing up.
+    colors : np.ndarray
+        A 2D array of shape (N, 4) with RGBA colors in [0, 1], e.g. `ParticleSystem.colors`.
+    sizes : np.ndarray
+        A 1D array with the radius of each particle in simulation units, e.g. `ParticleSystem.size`.
+    box : tuple of float
+        Width and height of the simulation area.
+    resolution : tuple of int
+        Width and height of the image in pixels.
+    background : tuple of float, optional
+        RGBA background color in [0, 1] (default is the GUI background).
+    out : np.ndarray, optional
+        A uint8 array of shape (height, width, 4) to draw into (default is None, a new array).
+
+    Returns
+    -------
+    np.ndarray
+        The image as a uint8 array of shape (height, width, 4), row 0 at the top.
+    """
+    width, height = resolution
+    if out is None:
+        out = np.empty((height, width, 4), dtype=np.uint8)
+    background = np.asarray(background, dtype=np.float64)
+    out[:] = np.rint(background * 255).astype(np.uint8)
+    flat = out.reshape(-1, 4)
+    scale = np.array([width / box[0], height / box[1]])
+    alpha = colors[:, 3:4]
+    rgba = np.rint((alpha * colors + (1 - alpha) * background) * 255).astype(np.uint8)
+    rgba[:, 3] = 255
+    col = (positions[:, 0] * scale[0]).astype(np.int64)
+    row = height - 1 - (positions[:, 1] * scale[1]).astype(np.int64)
+    radius = np.rint(np.broadcast_to(sizes, positions.shape[:1]) * scale.mean() - 0.5).clip(0).astype(np.int64)
+    # particles of one pixel radius share a stencil and keep their storage order
+    for r in np.unique(radius):
+        members = np.flatnonzero(radius == r)
+        dy, dx = disc_offsets(int(r))
+        step = max(1, PIXEL_BUDGET // dy.shape[0])
+        for lo in range(0, members.shape[0], step):
+            chunk = members[lo:lo + step]
+            pixels = ((row[chunk, None] + dy) % height) * width + (col[chunk, None] + dx) % width
+            flat[pixels.ravel()] = np.repeat(rgba[chunk], dy.shape[0], axis=0)
+    return out
+
+
+def encode_png(image: np.ndarray, level: int = PNG_COMPRESSION) -> bytes:
+    """
+    Encodes an RGBA image as PNG without external dependencies.
+
+    Parameters
+    ----------
+    image : np.ndarray
+        A uint8 array of shape (height, width, 4).
+    level : int, optional
+        zlib compression level (default is PNG_COMPRESSION).
+
+    Returns
+    -------
+    bytes
+        The PNG file.
+    """
+    height, width = image.shape[:2]
+    # every row starts with filter type 0 (none)
+    raw = np.concatenate((np.zeros((height, 1), dtype=np.uint8), image.reshape(height, width * 4)), axis=1)
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw.tobytes(), level)) + chunk(b"IEND", b"")
+
+
+_worker = {}    # the static scene of the worker process, set by `_init_worker`
+
+
+def _init_worker(colors: np.ndarray, sizes: np.ndarray, box: tuple, resolution: tuple, background: tuple):
+    _worker.update(colors=colors, sizes=sizes, box=box, resolution=resolution, background=background)
+    _worker["image"] = None
+
+
+def _render(positions: np.ndarray) -> np.ndarray:
+    return rasterize(positions, _worker["colors"], _worker["sizes"], _worker["box"], _worker["resolution"], _worker["background"])
+
+
+def _render_png(job: tuple) -> str:
+    path, positions = job
+    # the image buffer is reused, only the encoded file leaves the worker
+    _worker["image"] = rasterize(positions, _worker["colors"], _worker["sizes"], _worker["box"], _worker["resolution"], _worker["background"], out=_worker["image"])
+    with open(path, "wb") as f:
+        f.write(encode_png(_worker["image"]))
+    return path
+
+
+class FrameRenderer:
+    """
+    Renders streams of particle positions on a pool of worker processes. The colors, sizes and the simulation
+    area are sent to every worker once, each frame only carries its positions. Frames are consumed lazily and
+    at most `IN_FLIGHT` per worker are queued, so that live sources are not run ahead and results come back
+    in order.
+    """
+
+    def __init__(self, colors: np.ndarray, sizes: np.ndarray, box: tuple, resolution: tuple,
+                 background: tuple = (0.14, 0.14, 0.17, 1.0), workers: int | None = None):
+        """
+        Parameters
+        ----------
+        colors : np.ndarray
+            A 2D array of shape (N, 4) with the RGBA color of each particle.
+        sizes : np.ndarray
+            A 1D array with the radius of each particle in simulation units.
+        box : tuple of float
+            Width and height of the simulation area.
+        resolution : tuple of int
+            Width and height of the images in pixels.
+        background : tuple of float, optional
+            RGBA background color (default is the GUI background).
+        workers : int, optional
+            Number of worker processes, 0 renders in this process (default is None, one per CPU).
+        """
+        self._scene = (np.array(colors, dtype=np.float64), np.array(sizes, dtype=np.float64), tuple(box), tuple(resolution), tuple(background))
+        self.workers = os.cpu_count() if workers is None else workers
+        self._pool = None
+
+    def __enter__(self):
+        if self.workers:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=self._scene)
+        else:
+            _init_worker(*self._scene)
+        return self
+
+    def __exit__(self, *exc):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _map(self, fn, jobs):
+        if self._pool is None:
+            yield from map(fn, jobs)
+            return
+        pending = deque()
+        for job in jobs:
+            pending.append(self._pool.submit(fn, job))
+            if len(pending) >= IN_FLIGHT * self.workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def render(self, frames):
+        """
+        Renders frames in order.
+
+        Parameters
+        ----------
+        frames : iterable of np.ndarray
+            Positions of shape (N, 2) per frame, e.g. a recorded (T, N, 2) trajectory or `record`.
+
+        Yields
+        ------
+        np.ndarray
+            The image of each frame, see `rasterize`.
+        """
+        yield from self._map(_render, frames)
+
+    def write_images(self, frames, directory: str, pattern: str = "frame_{:06d}.png") -> list[str]:
+        """
+        Renders frames into a PNG image sequence. The images are encoded and written by the workers.
+
+        Parameters
+        ----------
+        frames : iterable of np.ndarray
+            Positions of shape (N, 2) per frame.
+        directory : str
+            Directory of the images, created if missing.
+        pattern : str, optional
+            File name of frame k, formatted with k (default is "frame_{:06d}.png").
+
+        Returns
+        -------
+        list of str
+            The written paths in frame order.
+        """
+        os.makedirs(directory, exist_ok=True)
+        jobs = ((os.path.join(directory, pattern.format(k)), positions) for k, positions in enumerate(frames))
+        return list(self._map(_render_png, jobs))
+
+    def write_raw(self, frames, stream) -> int:
+        """
+        Renders frames and writes them as raw RGBA bytes, e.g. into a pipe to
+        `ffmpeg -f rawvideo -pix_fmt rgba -s WIDTHxHEIGHT -i - out.mp4`.
+
+        Parameters
+        ----------
+        frames : iterable of np.ndarray
+            Positions of shape (N, 2) per frame.
+        stream : binary file-like
+            Destination of the frames.
+
+        Returns
+        -------
+        int
+            Number of frames written.
+        """
+        count = 0
+        for image in self.render(frames):
+            stream.write(image.tobytes())
+            count += 1
+        return count
+
+
+def record(ps, steps: int, every: int = 1):
+    """
+    Advances a live system and yields copies of its positions.
+
+    Parameters
+    ----------
+    ps : ParticleSystem
+        The system. Its particle set and storage order must not change while recording (no `reorder_interval`),
+        since the renderer sends colors and sizes to its workers only once.
+    steps : int
+        Number of steps.
+    every : int, optional
+        Yield the positions every `every` steps (default is 1).
+
+    Yields
+    ------
+    np.ndarray
+        The positions after each recorded step.
+    """
+    for step in range(1, steps + 1):
+        ps.move_particles()
+        if step % every == 0:
+            yield ps.positions.copy()
+
+
+if __name__ == "__main__":
+    import sys
+    from Sweep import build_system
+
+    parser = argparse.ArgumentParser(description="Simulate a configuration headless and render it without OpenGL")
+    parser.add_argument("config", help="JSON file with a configuration in the format of Sweep.build_system")
+    parser.add_argument("--steps", type=int, default=600, help="number of simulated steps")
+    parser.add_argument("--every", type=int, default=1, help="render every n-th step")
+    parser.add_argument("--size", default="1280x720", help="image size WIDTHxHEIGHT")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--output", default="frames", help="directory of the PNG sequence, '-' writes raw RGBA frames to stdout")
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        ps = build_system(json.load(f))
+    resolution = tuple(int(v) for v in args.size.split("x"))
+    with FrameRenderer(ps.colors, ps.size, (ps._width, ps._height), resolution, workers=args.workers) as renderer:
+        frames = record(ps, args.steps, args.every)
+        if args.output == "-":
+            renderer.write_raw(frames, sys.stdout.buffer)
+        else:
+            print(f"{len(renderer.write_images(frames, args.output))} frames written to {args.output}")
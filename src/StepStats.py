@@ -0,0 +1,125 @@
+import time
+import numpy as np
+
+
+class StepStats:
+    """ Low-overhead per-phase timers and counters for the steps of a ParticleSystem, kept in a ring buffer """
+
+    PHASES = ("noise", "integrate", "neighbor_search", "collision", "force", "accumulate")
+    COUNTERS = ("pairs", "colliding")
+
+    def __init__(self, window: int = 256, enabled: bool = False):
+        """
+        Parameters
+        ----------
+        window : int, optional
+            Number of most recent steps the rolling statistics are computed over (default is 256).
+        enabled : bool, optional
+            Whether steps are recorded (default is False).
+        """
+        self.enabled = enabled
+        self._columns = self.PHASES + ("total",) + self.COUNTERS
+        self._index = {name: k for k, name in enumerate(self._columns)}
+        self._samples = np.zeros((window, len(self._columns)))
+        self._frame = np.zeros(len(self._columns))
+        self._steps = 0
+        self._start = 0.0
+        self._last = 0.0
+
+    @property
+    def steps(self):
+        """
+        Retrieves the number of recorded steps.
+
+        Returns
+        -------
+        int
+            Number of steps recorded since the last reset.
+        """
+        return self._steps
+
+    def begin(self):
+        """ Starts recording a step """
+        self._frame[:] = 0
+        self._start = self._last = time.perf_counter()
+
+    def lap(self, phase: str):
+        """
+        Attributes the time since the previous lap (or `begin`) to a phase. Phases may be lapped several
+        times per step, the times are summed.
+
+        Parameters
+        ----------
+        phase : str
+            One of `PHASES`.
+        """
+        now = time.perf_counter()
+        self._frame[self._index[phase]] += now - self._last
+        self._last = now
+
+    def count(self, counter: str, value: int):
+        """
+        Adds to a counter of the current step.
+
+        Parameters
+        ----------
+        counter : str
+            One of `COUNTERS`.
+        value : int
+            The amount to add.
+        """
+        self._frame[self._index[counter]] += value
+
+    def end(self):
+        """ Finishes recording a step and stores it in the ring buffer """
+        self._frame[self._index["total"]] = time.perf_counter() - self._start
+        self._samples[self._steps % self._samples.shape[0]] = self._frame
+        self._steps += 1
+
+    def reset(self):
+        """ Discards all recorded steps """
+        self._samples[:] = 0
+        self._steps = 0
+
+    def _filled(self) -> np.ndarray:
+        return self._samples[:min(self._steps, self._samples.shape[0])]
+
+    @property
+    def latest(self):
+        """
+        Retrieves the values of the most recent step.
+
+        Returns
+        -------
+        dict[str, float]
+            Seconds per phase, the total step time and the counters, empty if nothing was recorded.
+        """
+        if self._steps == 0:
+            return {}
+        row = self._samples[(self._steps - 1) % self._samples.shape[0]]
+        return {name: float(row[k]) for name, k in self._index.items()}
+
+    def summary(self, percentiles: tuple = (50, 90, 99)) -> dict:
+        """
+        Computes rolling statistics over the recorded window.
+
+        Parameters
+        ----------
+        percentiles : tuple of float, optional
+            Percentiles to report (default is (50, 90, 99)).
+
+        Returns
+        -------
+        dict[str, dict[str, float]]
+            For every phase, "total" and every counter a dictionary with the "mean" and the requested
+            percentiles as "p50", "p90", ... Times are in seconds. Empty if nothing was recorded.
+        """
+        filled = self._filled()
+        if filled.shape[0] == 0:
+            return {}
+        means = filled.mean(axis=0)
+        values = np.percentile(filled, percentiles, axis=0)
+        return {
+            name: {"mean": float(means[k]), **{f"p{p:g}": float(values[m, k]) for m, p in enumerate(percentiles)}}
+            for name, k in self._index.items()
+        }
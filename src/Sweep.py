@@ -0,0 +1,311 @@
+import argparse
+import hashlib
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from Clusters import MIN_CLUSTER_SIZE, ClusterAnalysis
+from ParticleSystem import ParticleSystem
+
+RESULT_VERSION = 1          # part of every cache key, bump it when the simulation or the metrics change
+RELATIONSHIP_RANGE = 5      # interaction values are drawn from -5..5 like the GUI sliders
+MASS_RANGE = (1, 10)
+COUNT_RANGE = (10, 200)
+DEFAULTS = {"width": 400, "height": 400, "radius": 1, "delta_t": 0.05, "brownian_std": 20, "steps": 200, "seed": 0}
+
+
+def grid(base: dict, **axes) -> list[dict]:
+    """
+    Builds the configurations of a full grid over some parameters.
+
+    Parameters
+    ----------
+    base : dict
+        The configuration all grid points start from, see `build_system` for the keys.
+    **axes
+        For each varied key the list of its values, e.g. `matrix=[...], seed=[0, 1, 2]`.
+
+    Returns
+    -------
+    list of dict
+        One configuration per combination of the values.
+    """
+    keys = list(axes)
+    return [{**base, **dict(zip(keys, values))} for values in itertools.product(*(axes[key] for key in keys))]
+
+
+def random_configs(base: dict, n: int, classes: int, seed: int = 0) -> list[dict]:
+    """
+    Draws configurations with random interaction matrices, masses, restitutions and counts in the ranges the
+    GUI offers.
+
+    Parameters
+    ----------
+    base : dict
+        Fixed settings of all configurations, see `build_system`.
+    n : int
+        Number of configurations.
+    classes : int
+        Number of particle classes.
+    seed : int, optional
+        Seed of the sampling, the simulation seeds are drawn from it as well (default is 0).
+
+    Returns
+    -------
+    list of dict
+        The configurations.
+    """
+    rng = np.random.default_rng(seed)
+    return [{
+        **base,
+        "counts": rng.integers(COUNT_RANGE[0], COUNT_RANGE[1] + 1, classes).tolist(),
+        "masses": rng.integers(MASS_RANGE[0], MASS_RANGE[1] + 1, classes).tolist(),
+        "restitutions": np.round(rng.uniform(0, 1, classes), 2).tolist(),
+        "matrix": rng.integers(-RELATIONSHIP_RANGE, RELATIONSHIP_RANGE + 1, (classes, classes)).tolist(),
+        "seed": int(rng.integers(2**31)),
+    } for _ in range(n)]
+
+
+def _json_default(value):
+    """ Serializes the non-JSON values of configuration options, dtypes by their name """
+    if isinstance(value, (type, np.dtype)):
+        try:
+            return np.dtype(value).name
+        except TypeError:
+            pass
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def config_key(config: dict) -> str:
+    """
+    Hashes a configuration including its seed.
+
+    Parameters
+    ----------
+    config : dict
+        A configuration, JSON serializable apart from dtypes and NumPy scalars among its "options".
+
+    Returns
+    -------
+    str
+        A hex digest that only depends on the content of the configuration and `RESULT_VERSION`.
+    """
+    payload = json.dumps({"version": RESULT_VERSION, **DEFAULTS, **config}, sort_keys=True, default=_json_default)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def build_system(config: dict) -> ParticleSystem:
+    """
+    Creates the ParticleSystem of a configuration in the dictionary formats the GUI produces.
+
+    Parameters
+    ----------
+    config : dict
+        - "counts", "masses", "restitutions": one entry per particle class.
+        - "matrix": the interaction values as nested lists, row i holding the values (i+1, j+1).
+        - optional "width", "height", "radius", "delta_t", "brownian_std", "steps", "seed" (see `DEFAULTS`)
+          and further keyword arguments of `ParticleSystem` under "options".
+
+    Returns
+    -------
+    ParticleSystem
+        The system, created after seeding the global random generator with the configuration's seed.
+    """
+    config = {**DEFAULTS, **config}
+    color_distribution = {
+        f"key{c}": {"color": (c / len(config["counts"]), 0.5, 0.5, 1.0), "n": int(n), "mass": mass, "bounciness": restitution}
+        for c, (n, mass, restitution) in enumerate(zip(config["counts"], config["masses"], config["restitutions"]))
+    }
+    interaction_matrix = {(i + 1, j + 1): {"value": value} for i, row in enumerate(config["matrix"]) for j, value in enumerate(row)}
+    np.random.seed(config["seed"])
+    return ParticleSystem(config["width"], config["height"], color_distribution, interaction_matrix, radius=config["radius"],
+                          delta_t=config["delta_t"], brownian_std=config["brownian_std"], **config.get("options", {}))
+
+
+def run_config(config: dict) -> dict:
+    """
+    Simulates a configuration and computes its summary metrics.
+
+    Parameters
+    ----------
+    config : dict
+        The configuration, see `build_system`.
+
+    Returns
+    -------
+    dict
+        - "kinetic_energy": mean total kinetic energy over the second half of the steps.
+        - "max_speed": largest particle speed at the end.
+        - "clusters": number of clusters at the end, see `cluster_metrics`.
+        - "largest_cluster", "clustered_fraction": fraction of particles in the largest cluster and in any cluster.
+    """
+    ps = build_system({**config, "options": {**config.get("options", {}), "diagnostics": True}})
+    steps = {**DEFAULTS, **config}["steps"]
+    energy = []
+    for step in range(steps):
+        ps.move_particles()
+        if step >= steps // 2:
+            energy.append(ps.diagnostics["total_kinetic_energy"])
+    return {
+        "kinetic_energy": float(np.mean(energy)) if energy else 0.0,
+        "max_speed": ps.diagnostics.get("max_speed", 0.0),
+        **cluster_metrics(ps),
+    }
+
+
+def cluster_metrics(ps: ParticleSystem) -> dict:
+    """
+    Finds clusters as connected components of particles closer than the end of the short-range repulsion
+    (`ps._beta * ps._interaction_radius`), where attracting particles settle. Unlike the analysis during the
+    steps (`cluster_interval`), this searches the pairs of the current positions once.
+
+    Parameters
+    ----------
+    ps : ParticleSystem
+        The system to analyze.
+
+    Returns
+    -------
+    dict
+        "clusters" (components with at least `MIN_CLUSTER_SIZE` particles), "largest_cluster" and
+        "clustered_fraction" as fractions of all particles.
+    """
+    classes = ps._color_index[:, 0] - 1
+    short_radius = ps._beta * ps._interaction_radius
+    analysis = ClusterAnalysis(np.full((len(ps._color_distribution),) * 2, short_radius), MIN_CLUSTER_SIZE)
+    analysis.begin()
+    analysis.add_pairs(ps.check_collisions(ps.positions, short_radius), classes)
+    result = analysis.finish(classes)
+    return {key: result[key] for key in ("clusters", "largest_cluster", "clustered_fraction")}
+
+
+class ResultCache:
+    """ On-disk cache of sweep results, one JSON file per configuration, bounded in size by LRU eviction """
+
+    def __init__(self, directory: str, max_bytes: int = 64 * 2**20):
+        """
+        Parameters
+        ----------
+        directory : str
+            Directory holding the cached results, created if missing.
+        max_bytes : int, optional
+            Upper bound of the total size of the cached files, the least recently used are evicted first
+            (default is 64 MiB).
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> dict | None:
+        """
+        Looks up a result and marks it as recently used.
+
+        Parameters
+        ----------
+        key : str
+            The configuration key, see `config_key`.
+
+        Returns
+        -------
+        dict or None
+            The cached result, None if it is not cached.
+        """
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                result = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.misses += 1
+            return None
+        os.utime(path)
+        self.hits += 1
+        return result
+
+    def put(self, key: str, result: dict):
+        """
+        Stores a result and evicts the least recently used results beyond `max_bytes`.
+
+        Parameters
+        ----------
+        key : str
+            The configuration key, see `config_key`.
+        result : dict
+            A JSON serializable result.
+        """
+        tmp = self._path(key) + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(result, f)
+        os.replace(tmp, self._path(key))
+        self.evict()
+
+    def evict(self):
+        """ Deletes the least recently used results until the cache fits into `max_bytes` """
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime_ns, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            total -= size
+
+
+def run_sweep(configs: list[dict], cache: ResultCache | None = None, workers: int | None = None) -> list[dict]:
+    """
+    Runs all configurations that are not cached in parallel processes.
+
+    Parameters
+    ----------
+    configs : list of dict
+        The configurations, see `build_system`.
+    cache : ResultCache, optional
+        Cache to take results from and store new results in (default is None, no caching).
+    workers : int, optional
+        Number of worker processes (default is None, one per CPU).
+
+    Returns
+    -------
+    list of dict
+        For every configuration (in order) its metrics (see `run_config`) together with "key" and "config".
+    """
+    keys = [config_key(config) for config in configs]
+    results = [cache.get(key) if cache else None for key in keys]
+    todo = [k for k, result in enumerate(results) if result is None]
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for k, metrics in zip(todo, pool.map(run_config, [configs[k] for k in todo])):
+                results[k] = {"key": keys[k], "config": configs[k], **metrics}
+                if cache:
+                    cache.put(keys[k], results[k])
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless parameter sweep over random particle configurations")
+    parser.add_argument("--samples", type=int, default=16, help="number of random configurations")
+    parser.add_argument("--classes", type=int, default=3, help="number of particle classes")
+    parser.add_argument("--steps", type=int, default=DEFAULTS["steps"], help="steps simulated per configuration")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the sampling")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--cache", default=".sweep_cache", help="cache directory")
+    parser.add_argument("--cache-mb", type=float, default=64, help="cache size limit in MiB")
+    parser.add_argument("--output", default="sweep.json", help="file the results are written to")
+    args = parser.parse_args()
+
+    configs = random_configs({"steps": args.steps}, args.samples, args.classes, args.seed)
+    cache = ResultCache(args.cache, int(args.cache_mb * 2**20))
+    results = run_sweep(configs, cache, args.workers)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"{len(results)} configurations, {cache.hits} cached, results written to {args.output}")
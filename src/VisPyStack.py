@@ -1,6 +1,12 @@
 from vispy import scene, app
+import time
 import numpy as np
 from ParticleSystem import ParticleSystem
+from StepStats import StepStats
+
+HUD_KEY = "H"           #Key toggling the performance overlay
+HUD_RATE = 4            #Overlay text updates per second
+HUD_SAMPLES = 120       #Number of frames kept in the ring buffers
 
 class Canvas(scene.SceneCanvas):
     """ Class for creating a canvas to display a particle system using VisPy """
@@ -27,6 +33,13 @@ class Canvas(scene.SceneCanvas):
         self.part_sys = None    #Placeholder for particle system
         self.update_interval = 1 / screen_refresh_rate      #To transfer screen_refresh_rate to Hz
         self.timer = app.Timer(interval=self.update_interval, connect=self.update_positions)    #Timer to update particle positions
+        self.hud = scene.visuals.Text("", parent=self.scene, color="white", font_size=8, anchor_x="left", anchor_y="top", pos=(10, 10))  #Performance overlay in pixel coordinates
+        self.hud.visible = False
+        self.frame_times = np.zeros(HUD_SAMPLES)    #Ring buffer of wall time between frames
+        self.upload_times = np.zeros(HUD_SAMPLES)   #Ring buffer of time spent in scatter.set_data
+        self.frame_count = 0
+        self.last_frame = None
+        self.last_hud_update = 0.0
 
     def insert_data(self, color_distribution: dict, interaction_matrix: dict):
         """
@@ -66,9 +79,38 @@ class Canvas(scene.SceneCanvas):
         self.view.camera.center=(self.native.width()//2, self.native.height()//2)   #Center the camera to middle of canvas
         self.view.add(self.scatter) #Add scatter plot to view to be displayed
 
+        #Reset overlay samples and keep the instrumentation in sync with the overlay
+        self.part_sys.stats.enabled = self.hud.visible
+        self.frame_count = 0
+        self.last_frame = None
+
         #Timer for updates
         self.timer.start()
 
+    def update_data(self, color_distribution: dict, interaction_matrix: dict, rebuild: bool=True):
+        """
+        Apply edited settings to the running particle system without rebuilding it, particles are
+        added, removed or updated per class. Falls back to insert_data if there is no system yet
+        or the number of particle types changed.
+
+        Parameters
+        ----------
+        color_distribution : dict
+            Dictionary with color distribution for particles
+        interaction_matrix : np.ndarray
+            Matrix like dict to define interactions between particle-types
+        rebuild : bool, optional
+            Whether to fall back to insert_data, otherwise such settings are ignored, by default True
+        """
+        if self.part_sys is None or not self.part_sys.update_classes(color_distribution):
+            if not rebuild:
+                return
+            self.reset()
+            self.insert_data(color_distribution, interaction_matrix)
+            return
+        self.part_sys.interaction_matrix = interaction_matrix
+        self.colors = None  #Colors and sizes are fetched again with the next frame
+
     def update_positions(self, _ev):
         """
         Update particle positions and colors
@@ -80,8 +122,60 @@ class Canvas(scene.SceneCanvas):
         """
         self.part_sys.move_particles()  #call method to update particle positions
         self.positions = self.part_sys.positions    #grab updated positions
+        if self.colors is None or self.colors.shape[0] != self.positions.shape[0]:
+            #Particles were added or removed, resize the other marker attributes lazily
+            self.colors = self.part_sys.colors
+            self.sizes = self.part_sys.size * self.particle_scaling_factor
+        upload_start = time.perf_counter()
         self.scatter.set_data(pos=self.positions, face_color=self.colors, edge_color=self.colors, size=self.sizes)    
+        now = time.perf_counter()
+        if self.last_frame is not None:
+            self.frame_times[self.frame_count % HUD_SAMPLES] = now - self.last_frame
+            self.upload_times[self.frame_count % HUD_SAMPLES] = now - upload_start
+            self.frame_count += 1
+        self.last_frame = now
+        if self.hud.visible and now - self.last_hud_update >= 1 / HUD_RATE:
+            self.update_hud()
+            self.last_hud_update = now
         self.update()   #update the canvas
+
+    def on_key_press(self, event):
+        """
+        Toggle the performance overlay
+        
+        Parameters
+        ----------
+        event : KeyEvent
+            The key event, the overlay is toggled by HUD_KEY
+        """
+        if event.key == HUD_KEY:
+            self.hud.visible = not self.hud.visible
+            if self.part_sys is not None:
+                self.part_sys.stats.enabled = self.hud.visible  #Only pay for instrumentation while it is shown
+                self.part_sys.stats.reset()
+            self.update_hud()
+
+    def update_hud(self):
+        """
+        Update the overlay text from the ring-buffered frame samples and the particle system statistics
+        """
+        n = min(self.frame_count, HUD_SAMPLES)
+        if self.part_sys is None or n == 0:
+            self.hud.text = "waiting for frames..."
+            return
+        frame = self.frame_times[:n].mean()
+        summary = self.part_sys.stats.summary()
+        lines = [
+            f"FPS       {1 / frame:7.1f}",
+            f"particles {self.part_sys.positions.shape[0]:7d}",
+            f"upload    {1e3 * self.upload_times[:n].mean():7.2f} ms",
+            f"RT factor {self.part_sys.delta_t / frame:7.2f}",
+        ]
+        if summary:
+            lines.append(f"physics   {1e3 * summary['total']['mean']:7.2f} ms")
+            lines += [f"  {phase:<15}{1e3 * summary[phase]['mean']:6.2f} ms" for phase in StepStats.PHASES]
+            lines.append(f"pairs     {summary['pairs']['mean']:7.0f}")
+        self.hud.text = "\n".join(lines)
         
     def reset(self):
         """
@@ -89,3 +183,4 @@ class Canvas(scene.SceneCanvas):
         """
         self.timer.stop()   
         self.scatter.parent = None  #remove scatter plot from view
+        self.part_sys = None
@@ -1,6 +1,7 @@
-from PySide6.QtWidgets import QApplication, QMainWindow, QPushButton, QVBoxLayout, QColorDialog, QWidget
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QCursor
+import math
+from PySide6.QtWidgets import QApplication, QMainWindow, QPushButton, QVBoxLayout, QColorDialog, QWidget, QSlider
+from PySide6.QtCore import Qt, Signal
+from PySide6.QtGui import QCursor, QPainter, QColor
 
 class PopupWidget(QWidget):
     """ A custom popup widget that appears near the cursor when shown."""
@@ -35,6 +36,93 @@ class SquareWidget(QWidget):
         self.setMinimumHeight(self.width())
         super().resizeEvent(event)
 
+
+class LogSlider(QSlider):
+    """A horizontal slider for counts from 1 to a maximum on a logarithmic scale, so that small and huge counts are both reachable"""
+    countChanged = Signal(int)
+    STEPS = 1000    #Slider positions between 1 and the maximum
+
+    def __init__(self, maximum: int):
+        super().__init__(Qt.Horizontal)
+        self.maximum_count = maximum
+        self.setRange(0, self.STEPS)
+        self.valueChanged.connect(lambda pos: self.countChanged.emit(self.count()))
+
+    def count(self) -> int:
+        """Current count, position p maps to maximum**(p/STEPS)"""
+        return max(1, round(self.maximum_count ** (self.value() / self.STEPS)))
+
+    def setCount(self, count: int):
+        """Moves the slider to the position closest to count"""
+        self.setValue(round(math.log(max(count, 1)) / math.log(self.maximum_count) * self.STEPS))
+
+
+class RelationshipMatrix(QWidget):
+    """
+    A square matrix of the relationships between particle classes, painted in one pass instead of one widget per cell.
+    Row 0 and column 0 show the class colors, cell (i, j) the relationship of class i to class j.
+    """
+    cellClicked = Signal(int, int)
+
+    def __init__(self, value_colors: dict):
+        """
+        Parameters
+        ----------
+        value_colors : dict
+            Maps every relationship value to its QColor
+        """
+        super().__init__()
+        self.value_colors = value_colors    #Not `palette`, which would shadow QWidget.palette()
+        self.colors = []    #Class colors, class k is at index k-1
+        self.values = {}    #Relationship values by (i, j), missing cells count as 0
+
+    def add_class(self, color: QColor):
+        self.colors.append(QColor(color))
+        self.update()
+
+    def set_class_color(self, k: int, color: QColor):
+        self.colors[k-1] = QColor(color)
+        self.update()
+
+    def set_value(self, i: int, j: int, value: int):
+        self.values[(i, j)] = value
+        self.update()   #Repaints are merged by Qt, many changes within one frame cost one paint
+
+    def clear(self):
+        self.colors = []
+        self.values = {}
+        self.update()
+
+    def resizeEvent(self, event):   #Keep a square aspect ratio like SquareWidget
+        self.setMaximumHeight(self.width())
+        self.setMinimumHeight(self.width())
+        super().resizeEvent(event)
+
+    def cell_size(self) -> float:
+        return min(self.width(), self.height()) / (len(self.colors) + 1)
+
+    def paintEvent(self, event):
+        n = len(self.colors)
+        if n == 0:
+            return
+        size = self.cell_size()
+        gap = 1 if size > 6 else 0  #Drop the grid lines once the cells get tiny
+        painter = QPainter(self)
+        for k, color in enumerate(self.colors, start=1):
+            painter.fillRect(int(k*size), 0, int(size) - gap, int(size) - gap, color)
+            painter.fillRect(0, int(k*size), int(size) - gap, int(size) - gap, color)
+        for i in range(1, n+1):
+            for j in range(1, n+1):
+                painter.fillRect(int(j*size), int(i*size), int(size) - gap, int(size) - gap, self.value_colors[self.values.get((i, j), 0)])
+        painter.end()
+
+    def mousePressEvent(self, event):
+        size = self.cell_size()
+        i, j = int(event.position().y() // size), int(event.position().x() // size)
+        if 1 <= i <= len(self.colors) and 1 <= j <= len(self.colors):
+            self.cellClicked.emit(i, j)
+        super().mousePressEvent(event)
+
         
 if __name__ == "__main__":
     class MainWindow(QMainWindow):
@@ -0,0 +1,119 @@
+"""
+Harness that runs ParticleSystem under a fixed seed through every available backend and compares the
+results against the reference NumPy/cKDTree implementation.
+
+A backend is a set of keyword arguments for ParticleSystem. Brownian motion is disabled in the compared
+configurations, so that backends which change the storage order (and thereby which particle receives which
+random kick) stay comparable. All per-particle results are compared in external ID order.
+"""
+import numpy as np
+from ParticleSystem import ParticleSystem, PAIR_BYTES
+
+REFERENCE = {"neighbor_strategy": "kdtree"}
+
+BACKENDS = {
+    "brute": {"neighbor_strategy": "brute"},
+    "kdtree_fast_build": {"neighbor_strategy": "kdtree_fast_build"},
+    "cells": {"neighbor_strategy": "cells"},
+    "chunked": {"neighbor_strategy": "kdtree", "memory_budget": 20 * PAIR_BYTES * 40},
+    "reordered": {"neighbor_strategy": "kdtree", "reorder_interval": 1},
+    "reordered_cells": {"neighbor_strategy": "cells", "reorder_interval": 1, "reorder_curve": "cell"},
+    "float32": {"neighbor_strategy": "kdtree", "dtype": np.float32},
+    "fixed_point": {"neighbor_strategy": "kdtree", "fixed_point": True},
+}
+
+TOLERANCES = {
+    np.dtype(np.float64): {"rtol": 1e-7, "atol": 1e-7},
+    np.dtype(np.float32): {"rtol": 1e-3, "atol": 1e-3},
+    "fixed_point": {"rtol": 1e-5, "atol": 1e-5},     # positions are rounded to 2**-32 of the box every step
+}
+
+
+def random_config(seed: int) -> dict:
+    """Draws a random but valid ParticleSystem configuration."""
+    rng = np.random.default_rng(seed)
+    classes = int(rng.integers(1, 5))
+    color_distribution = {
+        f"key{c}": {
+            "color": (*rng.uniform(0, 1, 3), 1.0),
+            "n": int(rng.integers(10, 150)),
+            "mass": int(rng.integers(1, 11)),
+            "bounciness": float(rng.uniform(0, 1)),
+        }
+        for c in range(classes)
+    }
+    values = rng.integers(-5, 6, (classes, classes)) * (rng.uniform(0, 1, (classes, classes)) < 0.6)
+    interaction_matrix = {(i + 1, j + 1): {"value": int(values[i, j])} for i in range(classes) for j in range(classes)}
+    radius = float(rng.uniform(0.1, 0.6))
+    return {
+        "width": float(rng.uniform(40, 200)),
+        "height": float(rng.uniform(40, 200)),
+        "color_distribution": color_distribution,
+        "interaction_matrix": interaction_matrix,
+        "radius": radius,
+        "delta_t": float(rng.uniform(0.001, 0.01)),
+        "brownian_std": 0,
+    }
+
+
+def _id_pairs(ps: ParticleSystem, coll_arr: np.ndarray) -> set:
+    if coll_arr.size == 0:
+        return set()
+    return set(map(tuple, np.sort(ps.ids[coll_arr[:, :2].astype(int)], axis=1)))
+
+
+def run(config: dict, seed: int, steps: int, backend: dict) -> dict:
+    """
+    Builds a system for a backend and records its pair sets, forces and the state after `steps` steps.
+
+    Returns
+    -------
+    dict
+        "pairs" and "neighbor_pairs" as sets of external ID pairs from `check_collisions` and
+        `find_neighbor_pairs`, "forces" per particle and "positions", "velocity" after the steps,
+        all in external ID order, and the "precision" of the state (its dtype or "fixed_point").
+    """
+    np.random.seed(seed)
+    ps = ParticleSystem(**config, **backend)
+    pairs = ps.check_collisions(ps.positions, ps._interaction_radius)
+    neighbors = ps.find_neighbor_pairs(ps.positions)
+    if neighbors.size:
+        forces = ps.pair_forces(neighbors[:, 0].astype(int), neighbors[:, 1].astype(int), neighbors[:, 2], neighbors[:, 3:])
+    else:
+        forces = np.zeros(ps.positions.shape)
+    result = {"pairs": _id_pairs(ps, pairs), "neighbor_pairs": _id_pairs(ps, neighbors), "forces": forces[ps.slots].copy()}
+    for _ in range(steps):
+        ps.move_particles()
+    result.update(positions=ps.positions[ps.slots].copy(), velocity=ps._velocity[ps.slots].copy(),
+                  precision="fixed_point" if ps._fixed_scale is not None else ps.positions.dtype, box=np.array([config["width"], config["height"]]))
+    return result
+
+
+def compare(reference: dict, candidate: dict) -> dict:
+    """
+    Diffs two results of `run`.
+
+    Returns
+    -------
+    dict
+        Number of differing pairs, the largest absolute deviation of forces, positions (minimum image)
+        and velocities, and whether everything is within the tolerance of the coarser precision.
+    """
+    tol = max(TOLERANCES[reference["precision"]], TOLERANCES[candidate["precision"]], key=lambda t: t["atol"])
+    box = reference["box"]
+    delta = candidate["positions"] - reference["positions"]
+    delta = (delta + box/2) % box - box/2
+    report = {
+        "pairs": len(reference["pairs"] ^ candidate["pairs"]),
+        "neighbor_pairs": len(reference["neighbor_pairs"] ^ candidate["neighbor_pairs"]),
+        "forces": float(np.max(np.abs(candidate["forces"] - reference["forces"]), initial=0)),
+        "positions": float(np.max(np.abs(delta), initial=0)),
+        "velocity": float(np.max(np.abs(candidate["velocity"] - reference["velocity"]), initial=0)),
+    }
+    report["ok"] = (
+        report["pairs"] == 0 and report["neighbor_pairs"] == 0
+        and np.allclose(candidate["forces"], reference["forces"], **tol)
+        and np.all(np.abs(delta) <= tol["atol"] + tol["rtol"] * box)
+        and np.allclose(candidate["velocity"], reference["velocity"], **tol)
+    )
+    return report
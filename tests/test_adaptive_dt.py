@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from ParticleSystem import ParticleSystem, MAX_DT_GROWTH
+
+color_distribution = {
+    "key1": { "color": (1.0, 0.0, 0.0, 1.0), "n": 200, "mass": 1, "bounciness": 1.0,}
+}
+
+relationships = {(1, 1): {"value": 0}}
+
+
+def create_system(**kwargs):
+    return ParticleSystem(
+        width=100,
+        height=100,
+        color_distribution=color_distribution,
+        interaction_matrix=relationships,
+        radius=1,
+        delta_t=0.01,
+        **kwargs
+    )
+
+
+def test_invalid_bounds():
+    with pytest.raises(ValueError, match="Adaptive time step bounds"):
+        create_system(adaptive_dt=(0.1, 0.01))
+
+
+def test_delta_t_updates_friction():
+    ps = create_system()
+    ps.delta_t = 0.02
+    assert ps._friction_fact == pytest.approx(0.5 ** (0.02 / ps._half_life))
+
+
+def test_cfl_bound():
+    ps = create_system(adaptive_dt=(1e-5, 1.0), cfl=0.5)
+    ps._velocity[:] = 0
+    ps._velocity[0] = [50.0, 0.0]
+    dt = ps.choose_delta_t(np.zeros(ps.positions.shape))
+    # the step integrates with 2 * v, i.e. a speed of 100
+    assert dt == pytest.approx(0.5 * ps._radius / 100)
+
+
+def test_growth_and_bounds():
+    ps = create_system(adaptive_dt=(0.005, 0.02))
+    ps._velocity[:] = 0
+    zero = np.zeros(ps.positions.shape)
+    assert ps.choose_delta_t(zero) == pytest.approx(0.01 * MAX_DT_GROWTH)
+    ps.delta_t = 0.019
+    assert ps.choose_delta_t(zero) == pytest.approx(0.02)
+    ps._velocity[0] = [1e6, 0.0]
+    assert ps.choose_delta_t(zero) == pytest.approx(0.005)
+
+
+def test_overlap_shrinks_step():
+    ps = create_system(adaptive_dt=(1e-5, 1.0))
+    ps._velocity[:] = 0
+    ps._overlaps = np.array([1.0])   # half of the contact distance, twice the allowed overlap
+    assert ps.choose_delta_t(np.zeros(ps.positions.shape)) == pytest.approx(0.005)
+
+
+def test_adaptive_steps_within_bounds():
+    ps = create_system(adaptive_dt=(0.001, 0.05), diagnostics=True)
+    for _ in range(5):
+        ps.move_particles()
+        assert 0.001 <= ps.diagnostics["delta_t"] <= 0.05
+        assert ps._friction_fact == pytest.approx(0.5 ** (ps.delta_t / ps._half_life))
+    assert np.all(np.isfinite(ps.positions))
+
+
+@pytest.mark.parametrize("integrator, factor", [("euler", 2.0), ("verlet", 1.0), ("semi_implicit", 1.0)])
+def test_cfl_bound_per_integrator(integrator, factor):
+    """Only the Euler update doubles the velocity it moves the particles with."""
+    ps = create_system(adaptive_dt=(1e-5, 1.0), cfl=0.5, integrator=integrator)
+    ps._half_life = np.inf
+    ps.delta_t = 0.01
+    ps._velocity[:] = 0
+    ps._velocity[0] = [50.0, 0.0]
+    dt = ps.choose_delta_t(np.zeros(ps.positions.shape))
+    assert dt == pytest.approx(0.5 * ps._radius / (50 * factor))
@@ -0,0 +1,69 @@
+import tracemalloc
+import numpy as np
+import pytest
+from ParticleState import ParticleState
+from ParticleSystem import ParticleSystem
+
+
+def create_system(n, radius, **kwargs):
+    np.random.seed(0)
+    color_distribution = {"key1": {"color": (1.0, 0.0, 0.0, 1.0), "n": n, "mass": 1, "bounciness": 0.8}}
+    return ParticleSystem(500, 500, color_distribution, {(1, 1): {"value": 1}}, radius=radius, delta_t=0.01,
+                          neighbor_strategy="kdtree", **kwargs)
+
+
+def step_peak(ps):
+    """Peak traced memory of one step after the scratch buffers have reached their working size."""
+    for _ in range(3):
+        ps.move_particles()
+    tracemalloc.start()
+    try:
+        ps.move_particles()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize("integrator", ["euler", "verlet"])
+def test_step_without_pairs_allocates_little(integrator):
+    ps = create_system(20000, 0.001, integrator=integrator)
+    # the Brownian noise and the KD-tree are the only N-sized allocations left, before these were 8 arrays
+    assert step_peak(ps) < 3 * ps.positions.nbytes
+
+
+def test_step_with_pairs_allocates_little_per_pair():
+    ps = create_system(4000, 0.5)
+    n_pairs = ps.find_neighbor_pairs(ps.positions).shape[0]
+    assert n_pairs > 100000
+    # the pair list of the KD-tree takes 16 bytes per pair, before the step held about 130
+    assert step_peak(ps) < 40 * n_pairs
+
+
+def test_state_is_updated_in_place():
+    ps = create_system(500, 0.5, integrator="verlet")
+    ps.move_particles()
+    arrays = ps.positions, ps._velocity
+    scratch = ps._state.nbytes
+    for _ in range(5):
+        ps.move_particles()
+    assert ps.positions is arrays[0] and ps._velocity is arrays[1]
+    assert ps._state.nbytes <= scratch * ParticleState.GROWTH
+
+
+def test_size_is_cached():
+    ps = create_system(100, 0.5)
+    size = ps.size
+    assert ps.size is size and not size.flags.writeable
+    ps._radius = 0.25
+    assert np.all(ps.size == 0.25)
+
+
+def test_buffers_only_grow():
+    state = ParticleState(np.float32)
+    a = state.buffer("a", 10, 2)
+    assert a.shape == (10, 2) and a.dtype == np.float32
+    assert np.shares_memory(state.buffer("a", 4, 2), a)
+    b = state.buffer("a", 11, 2)
+    assert b.shape == (11, 2) and not np.shares_memory(a, b)
+    assert np.shares_memory(state.buffer("a", 16, 2), b)
+    assert state.buffer("mask", 5, dtype=bool).dtype == bool
@@ -0,0 +1,53 @@
+import numpy as np
+from ParticleSystem import ParticleSystem, PAIR_BYTES
+
+color_distribution = {
+    "key1": { "color": (1.0, 0.0, 0.0, 1.0), "n": 300, "mass": 1, "bounciness": 1.0,},
+    "key2": { "color": (0.0, 0.0, 1.0, 1.0), "n": 200, "mass": 2, "bounciness": 0.5,}
+}
+
+relationships = {
+    (1, 1): {"value": 0},
+    (1, 2): {"value": 3},
+    (2, 1): {"value": -2},
+    (2, 2): {"value": 0},
+}
+
+
+def create_system(seed, **kwargs):
+    np.random.seed(seed)
+    return ParticleSystem(
+        width=150,
+        height=100,
+        color_distribution=color_distribution,
+        interaction_matrix=relationships,
+        radius=.2,
+        delta_t=0.01,
+        neighbor_strategy="kdtree",
+        **kwargs
+    )
+
+
+def test_stream_pairs_matches_full_pairs():
+    ps = create_system(0, memory_budget=50 * PAIR_BYTES * 40)
+    assert ps._chunk_size(ps.positions.shape[0]) < ps.positions.shape[0], "Budget should force several chunks"
+    full = ps.find_neighbor_pairs(ps.positions)
+    i_idx, j_idx = full[:, 0].astype(int), full[:, 1].astype(int)
+    expected = ps.pair_forces(i_idx, j_idx, full[:, 2], full[:, 3:])
+
+    acc, contacts, n_pairs = ps.stream_pairs(ps.positions)
+    assert n_pairs == full.shape[0]
+    np.testing.assert_allclose(acc, expected, atol=1e-9)
+    contact_pairs = set(map(tuple, contacts[:, :2].astype(int)))
+    assert contact_pairs == set(map(tuple, np.sort(full[full[:, 2] <= 2 * ps._radius, :2].astype(int), axis=1)))
+
+
+def test_chunked_step_matches_unbounded_step():
+    bounded = create_system(1, memory_budget=50 * PAIR_BYTES * 40)
+    unbounded = create_system(1)
+    for ps in (bounded, unbounded):
+        np.random.seed(2)
+        for _ in range(3):
+            ps.move_particles()
+    np.testing.assert_allclose(bounded.positions, unbounded.positions, atol=1e-6)
+    np.testing.assert_allclose(bounded._velocity, unbounded._velocity, atol=1e-6)
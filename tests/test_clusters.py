@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from Clusters import ClusterAnalysis
+from ParticleSystem import ParticleSystem, PAIR_BYTES
+
+color_distribution = {
+    "key1": { "color": (1.0, 0.0, 0.0, 1.0), "n": 150, "mass": 1, "bounciness": 0.8,},
+    "key2": { "color": (0.0, 1.0, 0.0, 1.0), "n": 100, "mass": 3, "bounciness": 1.0,},
+}
+
+relationships = {(1, 1): {"value": 5}, (1, 2): {"value": 0}, (2, 1): {"value": 0}, (2, 2): {"value": 3}}
+
+
+def create_system(**kwargs):
+    np.random.seed(0)
+    return ParticleSystem(120, 100, color_distribution, relationships, radius=0.1, delta_t=0.01, brownian_std=0, neighbor_strategy="kdtree", **kwargs)
+
+
+def test_components_per_class_pair():
+    # a chain 0-1-2 of class 0, particle 3 (class 1) at distance 1 from 2, a pair 4-5 of class 1
+    coll = np.array([[0, 1, 1.0], [1, 2, 1.0], [2, 3, 1.0], [4, 5, 0.5], [0, 5, 3.0]])
+    classes = np.array([0, 0, 0, 1, 1, 1])
+    analysis = ClusterAnalysis([[2.0, 0.5], [0.5, 1.0]], min_size=2)
+    analysis.begin()
+    analysis.add_pairs(coll[:2], classes)
+    analysis.add_pairs(coll[2:], classes)
+    result = analysis.finish(classes)
+    assert result["clusters"] == 2
+    np.testing.assert_array_equal(result["sizes"], [3, 2])
+    np.testing.assert_array_equal(result["composition"], [[3, 0], [0, 2]])
+    np.testing.assert_array_equal(result["labels"], [0, 0, 0, -1, 1, 1])
+    assert result["largest_cluster"] == 0.5 and result["clustered_fraction"] == 5 / 6
+
+
+def test_buffers_are_reused():
+    analysis = ClusterAnalysis([[1.0]], min_size=1)
+    classes = np.zeros(4, dtype=int)
+    analysis.begin()
+    analysis.add_pairs(np.array([[0, 1, 0.5], [2, 3, 0.5]]), classes)
+    edges = analysis._edges
+    analysis.finish(classes)
+    analysis.begin()
+    analysis.add_pairs(np.array([[1, 2, 0.5]]), classes)
+    assert analysis._edges is edges
+    np.testing.assert_array_equal(analysis.finish(classes)["sizes"], [2, 1, 1])
+
+
+def test_interval():
+    ps = create_system(cluster_interval=2)
+    ps.move_particles()
+    assert ps.clusters == {}
+    ps.move_particles()
+    assert ps.clusters["step"] == 2
+    assert ps.clusters["labels"].shape == (250,)
+    assert ps.clusters["composition"].shape == (ps.clusters["clusters"], 2)
+    np.testing.assert_array_equal(ps.clusters["composition"].sum(axis=1), ps.clusters["sizes"])
+
+
+def test_no_extra_neighbor_search():
+    searches = []
+    for interval in (0, 1):
+        ps = create_system(cluster_interval=interval)
+        record = ps._neighbor_search.record
+        ps._neighbor_search.record = lambda seconds, interval=interval, record=record: (searches.append(interval), record(seconds))
+        for _ in range(3):
+            ps.move_particles()
+    assert searches.count(0) == searches.count(1) == 3
+
+
+@pytest.mark.parametrize("options", [{"memory_budget": 20 * PAIR_BYTES * 40}, {"reorder_interval": 1}], ids=["chunked", "reordered"])
+def test_matches_default_step(options):
+    reference = create_system(cluster_interval=1)
+    reference.move_particles()
+    ps = create_system(cluster_interval=1, **options)
+    ps.move_particles()
+    np.testing.assert_array_equal(ps.clusters["sizes"], reference.clusters["sizes"])
+    # clusters of equal size may be numbered differently, the same particles are grouped together
+    same = ps.clusters["labels"][ps.slots][:, None] == ps.clusters["labels"][ps.slots][None, :]
+    expected = reference.clusters["labels"][:, None] == reference.clusters["labels"][None, :]
+    np.testing.assert_array_equal(same, expected)
+
+
+def test_thresholds():
+    # class pairs without a threshold never connect
+    ps = create_system(cluster_interval=1, cluster_thresholds=[[30.0, 0.0], [0.0, 0.0]])
+    ps.move_particles()
+    assert np.all(ps.clusters["composition"][:, 1] == 0)
@@ -133,3 +133,42 @@ def test_multiple_collisions():
                                    err_msg=f"Distance mismatch for collision pair ({i_exp}, {j_exp})")
         np.testing.assert_allclose(n_obs, n_exp, atol=1e-6,
                                    err_msg=f"Normal mismatch for collision pair ({i_exp}, {j_exp})")
+
+
+def _pair_set(arr):
+    return set(map(tuple, np.sort(arr[:, :2].astype(int), axis=1)))
+
+
+def test_neighbor_pruning_matches_full_search():
+    """
+    Class pairs without interaction coefficient are only searched within the repulsion radius,
+    all other pairs are found up to the full interaction radius.
+    """
+    distribution = {
+        "key1": { "color": (1.0, 0.0, 0.0, 1.0), "n": 150, "mass": 1, "bounciness": 1.0,},
+        "key2": { "color": (0.0, 1.0, 0.0, 1.0), "n": 150, "mass": 1, "bounciness": 1.0,},
+        "key3": { "color": (0.0, 0.0, 1.0, 1.0), "n": 150, "mass": 1, "bounciness": 1.0,},
+    }
+    matrix = {(i, j): {"value": 0} for i in range(1, 4) for j in range(1, 4)}
+    matrix[(1, 2)] = {"value": 3}
+    matrix[(3, 3)] = {"value": -2}
+    ps = ParticleSystem(width=300, height=200, color_distribution=distribution, interaction_matrix=matrix, radius=.5)
+
+    full = ps.check_collisions(ps.positions, ps._interaction_radius)
+    classes = ps._color_index[:, 0]
+    ci, cj = classes[full[:, 0].astype(int)], classes[full[:, 1].astype(int)]
+    active = ((ci == 1) & (cj == 2)) | ((ci == 2) & (cj == 1)) | ((ci == 3) & (cj == 3))
+    expected = full[active | (full[:, 2] <= ps._beta * ps._interaction_radius)]
+
+    pruned = ps.find_neighbor_pairs(ps.positions)
+    assert pruned.shape[0] == expected.shape[0], "Pruned search returned duplicate or missing pairs"
+    assert _pair_set(pruned) == _pair_set(expected)
+
+
+def test_neighbor_pruning_all_active():
+    distribution = {"key1": { "color": (1.0, 0.0, 0.0, 1.0), "n": 200, "mass": 1, "bounciness": 1.0,}}
+    ps = ParticleSystem(width=200, height=200, color_distribution=distribution, interaction_matrix={(1, 1): {"value": 1}}, radius=.5)
+    full = ps.check_collisions(ps.positions, ps._interaction_radius)
+    pruned = ps.find_neighbor_pairs(ps.positions)
+    assert pruned.shape[0] == full.shape[0]
+    assert _pair_set(pruned) == _pair_set(full)
@@ -82,3 +82,61 @@ def test_update_velocities_collisions_single():
                                err_msg="Particle 0 velocity not updated correctly.")
     np.testing.assert_allclose(ps._velocity[1], expected_v1, atol=1e-6,
                                err_msg="Particle 1 velocity not updated correctly.")
+
+
+def test_update_velocities_collisions_multi_contact():
+    """
+      - Particle 0 at [2.5, 1.0] touches particle 1 at [1.0, 1.0] and particle 2 at [4.0, 1.0]
+      
+    Both contacts share particle 0 as first index. The position corrections cancel for particle 0
+    and both impulses have to be applied. Like a Newton's cradle the elastic chain passes the
+    momentum on, so the outer particles bounce back with their speed and particle 0 stays at rest,
+    conserving momentum and kinetic energy.
+    """
+    ps = ParticleSystem(
+        width=10,
+        height=10,
+        color_distribution=color_distribution,
+        radius=1,
+        interaction_matrix=relationships
+    )
+    ps._particles = np.array([[2.5, 1.0], [1.0, 1.0], [4.0, 1.0]], dtype=float)
+    ps._velocity = np.array([[0.0, 0.0], [1.0, 0.0], [-1.0, 0.0]], dtype=float)
+    ps._restitution = np.array([1.0, 1.0, 1.0], dtype=float)
+    ps._mass = np.array([1.0, 1.0, 1.0], dtype=float)
+
+    pos = ps.positions.copy()
+    colliding_data = ps.check_collisions(pos, 2*ps._radius)
+    ps.update_velocities_collisions(pos, colliding_data, mode="collision")
+
+    np.testing.assert_allclose(ps.positions[0], pos[0], atol=1e-6,
+                               err_msg="Opposing corrections on particle 0 should cancel")
+    assert ps.positions[1, 0] < pos[1, 0] and ps.positions[2, 0] > pos[2, 0], "Outer particles should be pushed apart"
+    np.testing.assert_allclose(ps._velocity, [[0.0, 0.0], [-1.0, 0.0], [1.0, 0.0]], atol=1e-4,
+                               err_msg="Impulses of both contacts should be applied")
+    np.testing.assert_allclose(np.sum(ps._velocity**2), 2.0, rtol=1e-4,
+                               err_msg="An elastic collision should keep the kinetic energy")
+
+
+def test_solver_iterations_reduce_overlap():
+    """More Jacobi iterations should leave less overlap in a dense cluster."""
+    overlaps = []
+    for iterations in (1, 8):
+        np.random.seed(0)
+        ps = ParticleSystem(
+            width=10,
+            height=10,
+            color_distribution=color_distribution,
+            radius=1,
+            interaction_matrix=relationships,
+            solver_iterations=iterations
+        )
+        ps._particles = np.random.uniform(4, 6, (20, 2))
+        ps._velocity = np.zeros((20, 2))
+        ps._restitution = np.zeros(20)
+        ps._mass = np.ones(20)
+        pos = ps.positions.copy()
+        ps.update_velocities_collisions(pos, ps.check_collisions(pos, 2*ps._radius), mode="collision")
+        after = ps.check_collisions(ps.positions, 2*ps._radius)
+        overlaps.append(np.sum(2*ps._radius - after[:, 2]))
+    assert overlaps[1] < overlaps[0], "Additional iterations should reduce the remaining overlap"
@@ -0,0 +1,48 @@
+import numpy as np
+from ParticleSystem import ParticleSystem
+
+color_distribution = {
+    "key1": { "color": (1.0, 0.0, 0.0, 1.0), "n": 300, "mass": 1, "bounciness": 1.0,},
+    "key2": { "color": (0.0, 0.0, 1.0, 1.0), "n": 200, "mass": 3, "bounciness": 0.5,}
+}
+
+relationships = {
+    (1, 1): {"value": 0},
+    (1, 2): {"value": 3},
+    (2, 1): {"value": -2},
+    (2, 2): {"value": 0},
+}
+
+
+def create_system(**kwargs):
+    return ParticleSystem(
+        width=40,
+        height=30,
+        color_distribution=color_distribution,
+        interaction_matrix=relationships,
+        radius=.5,
+        delta_t=0.01,
+        **kwargs
+    )
+
+
+def test_diagnostics_disabled_by_default():
+    ps = create_system()
+    ps.move_particles()
+    assert ps.diagnostics == {}
+
+
+def test_diagnostics_values():
+    ps = create_system(diagnostics=True)
+    ps.move_particles()
+    diag = ps.diagnostics
+    v2 = np.sum(ps._velocity**2, axis=1)
+    classes = ps._color_index[:, 0]
+    np.testing.assert_allclose(diag["kinetic_energy"], [np.sum(0.5 * ps._mass[classes == c] * v2[classes == c]) for c in (1, 2)])
+    np.testing.assert_allclose(diag["total_kinetic_energy"], np.sum(0.5 * ps._mass * v2))
+    np.testing.assert_allclose(diag["momentum"], np.sum(ps._mass[:, None] * ps._velocity, axis=0))
+    np.testing.assert_allclose(diag["max_speed"], np.sqrt(v2.max()))
+    assert diag["step"] == 1
+    # 500 particles on 40x30 with radius .5 always produce contacts
+    assert diag["contacts"] > 0
+    assert 0 < diag["overlap_mean"] <= diag["overlap_max"] <= 2 * ps._radius
@@ -0,0 +1,159 @@
+import numpy as np
+import pytest
+from Ensemble import Ensemble
+from ParticleSystem import ParticleSystem
+
+color_distribution = {
+    "key1": { "color": (1.0, 0.0, 0.0, 1.0), "n": 60, "mass": 1, "bounciness": 0.8,},
+    "key2": { "color": (0.0, 1.0, 0.0, 1.0), "n": 40, "mass": 3, "bounciness": 1.0,},
+}
+
+relationships = {(1, 1): {"value": 2}, (1, 2): {"value": -3}, (2, 1): {"value": 1}, (2, 2): {"value": 0}}
+
+
+def create_system(**kwargs):
+    np.random.seed(0)
+    return ParticleSystem(100, 80, color_distribution, relationships, radius=0.5, delta_t=0.01, neighbor_strategy="kdtree", **kwargs)
+
+
+def assert_ids_consistent(ps):
+    live = ps.slots >= 0
+    np.testing.assert_array_equal(ps.ids[ps.slots[live]], np.flatnonzero(live))
+    assert np.count_nonzero(live) == ps.positions.shape[0]
+
+
+def test_add_particles():
+    ps = create_system()
+    ids = ps.add_particles(2, 10)
+    np.testing.assert_array_equal(ids, np.arange(100, 110))
+    assert ps.positions.shape == (110, 2) and ps._velocity.shape == (110, 2)
+    np.testing.assert_array_equal(ps._color_index[100:, 0], 2)
+    np.testing.assert_array_equal(ps.colors[100:], np.tile([0.0, 1.0, 0.0, 1.0], (10, 1)))
+    assert np.all(ps._mass[100:] == 3) and np.all(ps._restitution[100:] == 1.0)
+    assert np.all(ps.positions >= 0) and np.all(ps.positions < [100, 80])
+    assert_ids_consistent(ps)
+    ps.move_particles()
+    assert ps.positions.shape == (110, 2)
+
+
+def test_add_particles_at_positions():
+    ps = create_system()
+    ids = ps.add_particles(1, 2, positions=[[101.0, 5.0], [3.0, -1.0]], velocities=[[1.0, 0.0], [0.0, 1.0]])
+    np.testing.assert_allclose(ps.positions[ps.slots[ids]], [[1.0, 5.0], [3.0, 79.0]])
+    np.testing.assert_array_equal(ps._velocity[ps.slots[ids]], [[1.0, 0.0], [0.0, 1.0]])
+
+
+def test_add_particles_rejects_unknown_class():
+    ps = create_system()
+    with pytest.raises(ValueError):
+        ps.add_particles(3, 1)
+    with pytest.raises(ValueError):
+        ps.add_particles(1, -1)
+
+
+def test_remove_keeps_survivors():
+    ps = create_system()
+    before = {name: getattr(ps, name)[ps.slots].copy() for name in ("_particles", "_velocity", "_colors", "_mass")}
+    mask = np.zeros(100, dtype=bool)
+    mask[[0, 5, 97, 99]] = True
+    removed = ps.remove_particles(mask)
+    assert set(removed) == {0, 5, 97, 99}
+    assert ps.positions.shape == (96, 2)
+    assert_ids_consistent(ps)
+    survivors = np.setdiff1d(np.arange(100), removed)
+    for name, values in before.items():
+        np.testing.assert_array_equal(getattr(ps, name)[ps.slots[survivors]], values[survivors])
+    np.testing.assert_array_equal(ps.slots[removed], -1)
+
+
+def test_removed_ids_are_reused():
+    ps = create_system()
+    ps.remove_particles(ps._color_index[:, 0] == 2)
+    assert ps.positions.shape == (60, 2)
+    ids = ps.add_particles(1, 45)
+    assert set(ids[:40]) == set(range(60, 100))
+    np.testing.assert_array_equal(ids[40:], np.arange(100, 105))
+    assert_ids_consistent(ps)
+
+
+def test_growth_is_amortized():
+    ps = create_system()
+    ps.add_particles(1, 1)
+    storage = ps._particles.base
+    for _ in range(40):
+        ps.add_particles(1, 1)
+    assert ps._particles.base is storage
+    assert np.shares_memory(ps._velocity, ps._state._storage["velocity"])
+
+
+def test_verlet_keeps_cached_acceleration():
+    ps = create_system(integrator="verlet")
+    ps.move_particles()
+    acc = ps._integrator._acc[ps.slots].copy()
+    mask = np.zeros(100, dtype=bool)
+    mask[:3] = True
+    removed = ps.remove_particles(mask)
+    ps.add_particles(1, 5)
+    survivors = np.setdiff1d(np.arange(100), removed)
+    np.testing.assert_array_equal(ps._integrator._acc[ps.slots[survivors]], acc[survivors])
+    np.testing.assert_array_equal(ps._integrator._acc[97:], 0)
+    ps.move_particles()
+
+
+def test_fixed_point_add():
+    ps = create_system(fixed_point=True)
+    ids = ps.add_particles(1, 3, positions=[[10.0, 10.0], [99.5, 0.5], [50.0, 79.9]])
+    np.testing.assert_allclose(ps.positions[ps.slots[ids]], [[10.0, 10.0], [99.5, 0.5], [50.0, 79.9]], atol=1e-6)
+    np.testing.assert_array_equal(ps.positions, (ps._state.fixed * ps._fixed_scale).astype(ps.positions.dtype))
+    ps.remove_particles(np.arange(103) < 50)
+    np.testing.assert_array_equal(ps.positions, (ps._state.fixed * ps._fixed_scale).astype(ps.positions.dtype))
+
+
+def test_set_class_params():
+    ps = create_system()
+    positions = ps.positions.copy()
+    ps.set_class_params(2, mass=5, restitution=0.5)
+    members = ps._color_index[:, 0] == 2
+    assert np.all(ps._mass[members] == 5) and np.all(ps._restitution[members] == 0.5)
+    assert np.all(ps._mass[~members] == 1) and np.all(ps._restitution[~members] == 0.8)
+    np.testing.assert_array_equal(ps.positions, positions)
+    ps.add_particles(2, 1)
+    assert ps._mass[-1] == 5
+    with pytest.raises(ValueError):
+        ps.set_class_params(1, mass=0)
+
+
+def test_update_classes():
+    ps = create_system()
+    edited = {
+        "key1": {**color_distribution["key1"], "n": 30, "color": (0.0, 0.0, 1.0, 1.0)},
+        "key2": {**color_distribution["key2"], "n": 70, "bounciness": 0.2},
+    }
+    assert ps.update_classes(edited)
+    counts = np.bincount(ps._color_index[:, 0], minlength=3)
+    assert counts[1] == 30 and counts[2] == 70
+    np.testing.assert_array_equal(ps.colors[ps._color_index[:, 0] == 1], np.tile([0.0, 0.0, 1.0, 1.0], (30, 1)))
+    assert np.all(ps._restitution[ps._color_index[:, 0] == 2] == 0.2)
+    assert_ids_consistent(ps)
+    assert not ps.update_classes({"key1": color_distribution["key1"]})
+
+
+def test_interaction_coefficients_cached(monkeypatch):
+    ps = create_system()
+    calls = []
+    build = ps.create_interaction_matrix
+    monkeypatch.setattr(ps, "create_interaction_matrix", lambda matrix: calls.append(1) or build(matrix))
+    for _ in range(3):
+        ps.move_particles()
+    assert len(calls) == 1
+    ps.interaction_matrix = {**relationships, (1, 2): {"value": 5}}
+    ps.move_particles()
+    assert len(calls) == 2
+    assert ps._interaction_coefficients()[0][0, 1] == 1.0
+
+def test_ensemble_rejects_resizing():
+    ensemble = Ensemble(100, 80, color_distribution, [relationships], [0])
+    with pytest.raises(ValueError):
+        ensemble.add_particles(1, 1)
+    with pytest.raises(ValueError):
+        ensemble.remove_particles(np.zeros(100, dtype=bool))
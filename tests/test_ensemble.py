@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+from Ensemble import Ensemble
+from ParticleSystem import ParticleSystem
+
+color_distribution = {
+    "key1": { "color": (1.0, 0.0, 0.0, 1.0), "n": 40, "mass": 1, "bounciness": 0.8,},
+    "key2": { "color": (0.0, 1.0, 0.0, 1.0), "n": 30, "mass": 3, "bounciness": 0.5,},
+}
+
+matrices = [
+    {(1, 1): {"value": 2}, (1, 2): {"value": -3}, (2, 1): {"value": 1}, (2, 2): {"value": 0}},
+    {(1, 1): {"value": 0}, (1, 2): {"value": 0}, (2, 1): {"value": 0}, (2, 2): {"value": 0}},
+    {(1, 1): {"value": -5}, (1, 2): {"value": 4}, (2, 1): {"value": 4}, (2, 2): {"value": 5}},
+]
+seeds = [3, 7, 11]
+kwargs = {"radius": 0.5, "delta_t": 0.01, "brownian_std": 5}
+
+
+@pytest.mark.parametrize("integrator", ["euler", "verlet"])
+def test_members_match_single_systems(integrator):
+    """Every member evolves exactly like a ParticleSystem created with the member's seed."""
+    ensemble = Ensemble(60, 60, color_distribution, matrices, seeds, integrator=integrator, **kwargs)
+    for _ in range(5):
+        ensemble.move_particles()
+    singles = []
+    for matrix, seed in zip(matrices, seeds):
+        # the single systems draw from the global random stream, run them one after another
+        np.random.seed(seed)
+        ps = ParticleSystem(60, 60, color_distribution, matrix, neighbor_strategy="kdtree", integrator=integrator, **kwargs)
+        for _ in range(5):
+            ps.move_particles()
+        singles.append(ps)
+    assert ensemble.batch_positions.shape == (3, 70, 2)
+    for b, ps in enumerate(singles):
+        np.testing.assert_allclose(ensemble.batch_positions[b], ps.positions, rtol=1e-9, atol=1e-9)
+        np.testing.assert_allclose(ensemble.batch_velocities[b], ps._velocity, rtol=1e-9, atol=1e-9)
+
+
+def test_no_pairs_across_members():
+    ensemble = Ensemble(60, 60, color_distribution, matrices, seeds, **kwargs)
+    # put all members on top of each other
+    ensemble.batch_positions[:] = ensemble.batch_positions[0]
+    coll = ensemble.check_collisions(ensemble.positions, ensemble._interaction_radius)
+    member = ensemble._member[coll[:, :2].astype(int)]
+    assert coll.shape[0] > 0
+    assert np.all(member[:, 0] == member[:, 1])
+
+
+def test_global_random_state_untouched():
+    np.random.seed(0)
+    expected = np.random.uniform()
+    np.random.seed(0)
+    Ensemble(60, 60, color_distribution, matrices, seeds, **kwargs)
+    assert np.random.uniform() == expected
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        Ensemble(60, 60, color_distribution, matrices, seeds[:2], **kwargs)
+    with pytest.raises(ValueError):
+        Ensemble(60, 60, color_distribution, matrices, seeds, swept=True, **kwargs)
+    with pytest.raises(ValueError):
+        Ensemble(60, 60, color_distribution, matrices, seeds, cluster_interval=1, **kwargs)
+    with pytest.raises(ValueError):
+        Ensemble(60, 60, color_distribution, matrices, seeds, adaptive_dt=(0.001, 0.05), **kwargs)
+
+
+def test_set_interaction_matrices():
+    """Assigned matrices take effect, a member evolves like a single system with its new matrix."""
+    ensemble = Ensemble(60, 60, color_distribution, matrices, seeds, **kwargs)
+    ensemble.interaction_matrix = [matrices[2], matrices[0], matrices[1]]
+    for _ in range(3):
+        ensemble.move_particles()
+    np.random.seed(seeds[0])
+    ps = ParticleSystem(60, 60, color_distribution, matrices[2], neighbor_strategy="kdtree", **kwargs)
+    for _ in range(3):
+        ps.move_particles()
+    np.testing.assert_allclose(ensemble.batch_positions[0], ps.positions, rtol=1e-9, atol=1e-9)
+    with pytest.raises(ValueError):
+        ensemble.interaction_matrix = matrices[:2]
+    with pytest.raises(ValueError):
+        ensemble.interaction_matrix = matrices[0]
@@ -0,0 +1,14 @@
+import pytest
+from equivalence import BACKENDS, REFERENCE, random_config, run, compare
+
+STEPS = 3
+
+
+@pytest.mark.parametrize("backend", list(BACKENDS))
+@pytest.mark.parametrize("seed", range(8))
+def test_backend_matches_reference(backend, seed):
+    """Randomized configurations must give the same pairs, forces and trajectories on every backend."""
+    config = random_config(seed)
+    reference = run(config, seed, STEPS, REFERENCE)
+    report = compare(reference, run(config, seed, STEPS, BACKENDS[backend]))
+    assert report["ok"], f"{backend} deviates from the reference for seed {seed}: {report}"
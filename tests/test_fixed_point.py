@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+from Ensemble import Ensemble
+from ParticleSystem import ParticleSystem, FIXED_POINT_STEPS
+
+color_distribution = {
+    "key1": { "color": (1.0, 0.0, 0.0, 1.0), "n": 150, "mass": 1, "bounciness": 0.8,},
+    "key2": { "color": (0.0, 1.0, 0.0, 1.0), "n": 100, "mass": 3, "bounciness": 1.0,},
+}
+
+relationships = {(1, 1): {"value": 2}, (1, 2): {"value": -3}, (2, 1): {"value": 1}, (2, 2): {"value": 0}}
+
+
+def create_system(**kwargs):
+    np.random.seed(0)
+    return ParticleSystem(100, 80, color_distribution, relationships, radius=0.5, delta_t=0.01, neighbor_strategy="kdtree", fixed_point=True, **kwargs)
+
+
+def assert_consistent(ps):
+    """The positions are the decoded fixed-point coordinates and lie inside the simulation area."""
+    assert ps._state.fixed.dtype == np.uint32
+    np.testing.assert_array_equal(ps.positions, (ps._state.fixed * ps._fixed_scale).astype(ps.positions.dtype))
+    assert np.all(ps.positions >= 0) and np.all(ps.positions < [ps._width, ps._height])
+
+
+@pytest.mark.parametrize("options", [
+    {},
+    {"integrator": "verlet"},
+    {"memory_budget": 20000},
+    {"swept": True},
+    {"reorder_interval": 1},
+    {"dtype": np.float32},
+], ids=["euler", "verlet", "chunked", "swept", "reordered", "float32"])
+def test_state_stays_consistent(options):
+    ps = create_system(**options)
+    for _ in range(5):
+        ps.move_particles()
+    assert_consistent(ps)
+
+
+def test_wrap_through_overflow():
+    np.random.seed(0)
+    pair = {"key1": {"color": (1.0, 0.0, 0.0, 1.0), "n": 2, "mass": 1, "bounciness": 1.0}}
+    ps = ParticleSystem(100, 80, pair, {(1, 1): {"value": 0}}, radius=0.5, delta_t=0.01, brownian_std=0,
+                        integrator="semi_implicit", fixed_point=True)
+    # 20 apart under periodic boundaries, beyond the short-range repulsion
+    ps.positions = np.array([[99.999, 10.0], [0.001, 70.0]])
+    ps._velocity[:] = [[0.5, 0.0], [-0.5, 0.0]]
+    ps.move_particles()
+    moved = np.array([99.999, 0.001]) + ps._velocity[:, 0] * ps.delta_t
+    np.testing.assert_allclose(ps.positions[:, 0], moved % 100, atol=1e-6)
+    assert ps.positions[0, 0] < 1 and ps.positions[1, 0] > 99
+    assert_consistent(ps)
+
+
+def test_setter_wraps_positions():
+    ps = create_system()
+    ps.positions = np.tile([[101.0, -1.0]], (250, 1))
+    np.testing.assert_allclose(ps.positions, np.tile([[1.0, 79.0]], (250, 1)), atol=1e-6)
+    assert_consistent(ps)
+
+
+def test_minimum_image_from_fixed_point():
+    ps = create_system()
+    ps.positions = np.array([[99.8, 79.9], [0.1, 0.2]] + [[50.0, 40.0]] * 248)
+    pair = np.array([[0, 1]])
+    coll = ps.pair_data(ps.positions, pair, fixed=ps._state.fixed)
+    np.testing.assert_allclose(coll[0, 2:], ps.pair_data(ps.positions.copy(), pair)[0, 2:], atol=1e-9)
+    dx = np.int64(ps._state.fixed[0, 0]) - np.int64(ps._state.fixed[1, 0])
+    assert abs(dx) > FIXED_POINT_STEPS // 2 and coll[0, 3] < 0
+
+
+def test_ensemble_rejects_fixed_point():
+    with pytest.raises(ValueError):
+        Ensemble(100, 80, color_distribution, [relationships], [0], fixed_point=True)
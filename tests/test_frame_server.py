@@ -0,0 +1,166 @@
+import asyncio
+import json
+import numpy as np
+import pytest
+from Ensemble import Ensemble
+from FrameServer import CONTROL, ERROR, HEADER, INFO, MAX_CONTROL_BYTES, FrameClient, FrameServer, dequantize, encode, quantize, read_message
+from ParticleSystem import ParticleSystem
+
+color_distribution = {
+    "key1": { "color": (1.0, 0.0, 0.0, 1.0), "n": 150, "mass": 1, "bounciness": 0.8,},
+    "key2": { "color": (0.0, 1.0, 0.0, 1.0), "n": 100, "mass": 3, "bounciness": 1.0,},
+}
+
+relationships = {(1, 1): {"value": 2}, (1, 2): {"value": -3}, (2, 1): {"value": 1}, (2, 2): {"value": 0}}
+
+
+def create_system(**kwargs):
+    np.random.seed(0)
+    return ParticleSystem(100, 80, color_distribution, relationships, radius=0.5, delta_t=0.01, neighbor_strategy="kdtree", **kwargs)
+
+
+def serve(ps, session):
+    """Runs `session(server, client)` against a server on a free local port."""
+    async def main():
+        server = FrameServer(ps, fps=None)
+        await server.start()
+        client = FrameClient()
+        await client.connect("127.0.0.1", server.port)
+        try:
+            return await session(server, client)
+        finally:
+            await client.close()
+            await server.stop()
+    return asyncio.run(main())
+
+
+def assert_matches(client, ps):
+    np.testing.assert_array_equal(client.ids, ps.ids)
+    np.testing.assert_array_equal(client.classes, ps._color_index[:, 0])
+    error = np.abs(client.positions - ps.positions)
+    error = np.minimum(error, [100, 80] - error)    # across the periodic boundary
+    assert np.all(error <= np.array([100, 80]) / 2**17 + 1e-9)
+
+
+def test_quantize_is_periodic():
+    box = np.array([100.0, 80.0])
+    positions = np.array([[0.0, 0.0], [50.0, 40.0], [100 - 1e-9, 80 - 1e-9]])
+    quantized = quantize(positions, box)
+    np.testing.assert_array_equal(quantized, [[0, 0], [2**15, 2**15], [0, 0]])
+    np.testing.assert_allclose(dequantize(quantized, box)[:2], positions[:2])
+
+
+def test_keyframe_then_deltas():
+    ps = create_system(reorder_interval=3)
+
+    async def session(server, client):
+        assert client.info["classes"] == 2
+        for _ in range(6):
+            ps.move_particles()
+            server.publish()
+            await client.receive()
+            assert_matches(client, ps)
+        return server.frame.index, client.index
+
+    assert serve(ps, session) == (6, 6)
+
+
+def test_slow_client_drops_frames():
+    ps = create_system()
+
+    async def session(server, client):
+        ps.move_particles()
+        server.publish()
+        await client.receive()
+        # the client does not keep up with these, it only gets the newest
+        for _ in range(5):
+            ps.move_particles()
+            server.publish()
+        await client.receive()
+        assert client.index == 6
+        assert_matches(client, ps)
+        (state,) = server._clients
+        return state.frames, state.dropped
+
+    assert serve(ps, session) == (2, 4)
+
+
+def test_particles_added_during_stream():
+    ps = create_system()
+
+    async def session(server, client):
+        server.publish()
+        await client.receive()
+        ps.add_particles(2, 10)
+        server.publish()
+        await client.receive()
+        assert_matches(client, ps)
+
+    serve(ps, session)
+
+
+def test_control_channel():
+    ps = create_system()
+
+    async def session(server, client):
+        await client.set_interaction([[1, 2, 4], [3, 1, 1]])
+        await client.set_interaction([[1, 1, float("nan")]])
+        await client.set_interaction([[2, 2, -5]])
+        while not server._controls:     # wait until the server has read the messages
+            await asyncio.sleep(0.01)
+        await server.run(steps=1)
+        await client.receive()
+        return client.errors
+
+    errors = serve(ps, session)
+    assert len(errors) == 2 and "between 1 and 2" in errors[0] and "finite" in errors[1]
+    assert ps.interaction_matrix[(2, 2)]["value"] == -5
+    assert ps.interaction_matrix[(1, 2)]["value"] == -3
+    assert relationships[(2, 2)]["value"] == 0
+    assert ps.interaction_matrix[(1, 1)]["value"] == 2
+
+
+def test_controls_apply_to_ensemble_members():
+    ensemble = Ensemble(100, 80, color_distribution, [relationships, relationships], [0, 1], radius=0.5, delta_t=0.01)
+    server = FrameServer(ensemble, fps=None)
+    server._controls = [(1, 2, 4.0)]
+    server.apply_controls()
+    assert [matrix[(1, 2)]["value"] for matrix in ensemble.interaction_matrix] == [4.0, 4.0]
+    np.testing.assert_allclose(ensemble._coefficients[:, 0, 1], 4.0 / 5)
+
+
+def test_connect_expects_info():
+    async def main():
+        async def reject(reader, writer):
+            writer.write(encode(ERROR, json.dumps({"error": "busy"}).encode()))
+            await writer.drain()
+            writer.close()
+        server = await asyncio.start_server(reject, "127.0.0.1", 0)
+        try:
+            with pytest.raises(ValueError, match="INFO"):
+                await FrameClient().connect("127.0.0.1", server.sockets[0].getsockname()[1])
+        finally:
+            server.close()
+            await server.wait_closed()
+    asyncio.run(main())
+
+
+def test_oversized_control_closes_connection():
+    ps = create_system()
+
+    async def main():
+        server = FrameServer(ps, fps=None)
+        await server.start()
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            assert (await read_message(reader))[0] == INFO
+            # only the header is sent, the server must not wait for a payload of this size
+            writer.write(HEADER.pack(CONTROL, MAX_CONTROL_BYTES + 1))
+            await writer.drain()
+            kind, payload = await read_message(reader)
+            assert kind == ERROR and "exceeds" in json.loads(payload)["error"]
+            assert await reader.read() == b""
+            writer.close()
+        finally:
+            await server.stop()
+    asyncio.run(main())
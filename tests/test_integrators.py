@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+from ParticleSystem import ParticleSystem
+from equivalence import random_config, run, compare
+
+color_distribution = {
+    "key1": { "color": (1.0, 0.0, 0.0, 1.0), "n": 10, "mass": 20, "bounciness": 1.0,},
+    "key2": { "color": (0.0, 1.0, 0.0, 1.0), "n": 10, "mass": 40, "bounciness": 1.0,},
+}
+
+relationships = {(1, 1): {"value": 1}, (1, 2): {"value": -1}, (2, 1): {"value": -1}, (2, 2): {"value": 1}}
+
+
+def create_system(integrator, delta_t=0.05, frictionless=True):
+    np.random.seed(0)
+    ps = ParticleSystem(80, 80, color_distribution, relationships, radius=0.2, delta_t=delta_t, brownian_std=0, min_vel=-1, max_vel=1, integrator=integrator)
+    if frictionless:
+        ps._half_life = np.inf
+        ps.delta_t = delta_t
+    return ps
+
+
+def energy_drift(integrator, delta_t, duration=2.0):
+    ps = create_system(integrator, delta_t)
+    e0 = ps.total_energy()
+    drift = 0.0
+    for _ in range(round(duration / delta_t)):
+        ps.move_particles()
+        drift = max(drift, abs(ps.total_energy() - e0))
+    return drift / abs(e0)
+
+
+def test_unknown_integrator():
+    with pytest.raises(ValueError):
+        create_system("rk4")
+
+
+@pytest.mark.parametrize("integrator", ["verlet", "semi_implicit"])
+def test_free_flight(integrator):
+    """Without neighbors and friction, particles move in straight lines at constant velocity."""
+    ps = create_system(integrator)
+    ps._interaction_radius = 0.3
+    start, velocity = ps.positions.copy(), ps._velocity.copy()
+    for _ in range(10):
+        ps.move_particles()
+    np.testing.assert_allclose(ps._velocity, velocity)
+    np.testing.assert_allclose(ps.positions, np.mod(start + 10 * velocity * ps.delta_t, 80))
+
+
+@pytest.mark.parametrize("integrator", ["verlet", "semi_implicit"])
+def test_friction_decay(integrator):
+    """The velocity decays by exactly the friction factor per step, independent of the step size."""
+    ps = create_system(integrator, delta_t=0.5, frictionless=False)
+    ps._interaction_radius = 0.3
+    velocity = ps._velocity.copy()
+    ps.move_particles()
+    np.testing.assert_allclose(ps._velocity, velocity * 0.5**(0.5 / ps._half_life))
+
+
+def test_verlet_conserves_energy_better():
+    euler, verlet, semi_implicit = (energy_drift(name, 0.02) for name in ("euler", "verlet", "semi_implicit"))
+    assert verlet < semi_implicit < euler
+    # second order: halving the step reduces the drift roughly fourfold
+    assert energy_drift("verlet", 0.01) < verlet / 2.5
+
+
+def test_buffers_allocated_once():
+    ps = create_system("verlet")
+    acc = ps.integrator._acc
+    for _ in range(3):
+        ps.move_particles()
+    assert ps.integrator._acc is acc
+    assert np.any(acc != 0)
+
+
+def test_reordering_keeps_cached_accelerations():
+    """The cached accelerations must follow the particles when the storage is permuted."""
+    config = random_config(3)
+    reference = run(config, 3, 3, {"neighbor_strategy": "kdtree", "integrator": "verlet"})
+    reordered = run(config, 3, 3, {"neighbor_strategy": "kdtree", "integrator": "verlet", "reorder_interval": 1})
+    report = compare(reference, reordered)
+    assert report["ok"], report
+
+
+@pytest.mark.parametrize("integrator", ["euler", "verlet", "semi_implicit"])
+def test_contacts_keep_positions_in_box(integrator):
+    """Contact corrections near the boundary must be wrapped like the drift."""
+    crowded = {
+        "key1": { "color": (1.0, 0.0, 0.0, 1.0), "n": 250, "mass": 1, "bounciness": 0.8,},
+        "key2": { "color": (0.0, 1.0, 0.0, 1.0), "n": 250, "mass": 3, "bounciness": 1.0,},
+    }
+    for seed in range(5):
+        np.random.seed(seed)
+        ps = ParticleSystem(100, 80, crowded, relationships, radius=0.5, delta_t=0.01, integrator=integrator)
+        for _ in range(5):
+            ps.move_particles()
+            assert np.all(ps.positions >= 0) and np.all(ps.positions < [100, 80])
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from NeighborSearch import NeighborSearch, STRATEGIES
+from ParticleSystem import ParticleSystem
+
+
+def _pair_set(pairs):
+    return set(map(tuple, np.sort(pairs, axis=1)))
+
+
+@pytest.mark.parametrize("name", list(STRATEGIES))
+def test_strategies_agree_with_kdtree(name):
+    rng = np.random.default_rng(3)
+    boxsize = [60, 40]
+    positions = rng.uniform(0, 1, (500, 2)) * boxsize
+    other = rng.uniform(0, 1, (300, 2)) * boxsize
+    reference = STRATEGIES["kdtree"]
+    for radius in (2.5, 15):    # 15 leaves less than three cells along y
+        assert _pair_set(STRATEGIES[name].pairs(positions, radius, boxsize)) == _pair_set(reference.pairs(positions, radius, boxsize))
+        cross = STRATEGIES[name].cross_pairs(positions, other, radius, boxsize)
+        assert set(map(tuple, cross)) == set(map(tuple, reference.cross_pairs(positions, other, radius, boxsize)))
+
+
+def test_tuner_locks_in_fastest():
+    tuner = NeighborSearch(trial_frames=2)
+    times = {"brute": 3.0, "kdtree": 2.0, "kdtree_fast_build": 1.0, "cells": 4.0}
+    while True:
+        tuner.select(("config",), 100)
+        if not tuner.tuning:
+            break
+        tuner.record(times[tuner.strategy])
+    assert tuner.strategy == "kdtree_fast_build"
+    assert tuner.timings == times
+
+    tuner.select(("config",), 100)
+    assert not tuner.tuning, "Same configuration should not trigger a new tuning round"
+    tuner.select(("changed",), 10**6)
+    assert tuner.tuning, "Changed configuration should trigger a new tuning round"
+    assert tuner.strategy != "brute", "Brute force should be skipped for large particle counts"
+
+
+def test_fixed_strategy():
+    with pytest.raises(ValueError):
+        NeighborSearch("octree")
+    tuner = NeighborSearch("cells")
+    tuner.select(("config",), 100)
+    assert not tuner.tuning and tuner.strategy == "cells"
+
+
+def test_particle_system_exposes_tuner():
+    distribution = {"key1": { "color": (1.0, 0.0, 0.0, 1.0), "n": 300, "mass": 1, "bounciness": 1.0,}}
+    ps = ParticleSystem(width=200, height=150, color_distribution=distribution, interaction_matrix={(1, 1): {"value": 1}}, radius=.5)
+    for _ in range(3 * len(STRATEGIES)):
+        ps.move_particles()
+    assert not ps.neighbor_search.tuning
+    assert set(ps.neighbor_search.timings) == set(STRATEGIES)
+    assert ps.neighbor_search.strategy in STRATEGIES
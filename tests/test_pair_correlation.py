@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+from Ensemble import Ensemble
+from PairCorrelation import PairCorrelation
+from ParticleSystem import ParticleSystem, PAIR_BYTES
+
+
+def create_system(relationships, n=(1000, 1000), **kwargs):
+    np.random.seed(0)
+    color_distribution = {
+        "key1": { "color": (1.0, 0.0, 0.0, 1.0), "n": n[0], "mass": 1, "bounciness": 0.8,},
+        "key2": { "color": (0.0, 1.0, 0.0, 1.0), "n": n[1], "mass": 3, "bounciness": 1.0,},
+    }
+    return ParticleSystem(100, 100, color_distribution, relationships, radius=0.1, delta_t=0.01, brownian_std=0,
+                          neighbor_strategy="kdtree", rdf_bins=10, **kwargs)
+
+
+attracting = {(1, 1): {"value": 1}, (1, 2): {"value": 1}, (2, 1): {"value": 1}, (2, 2): {"value": 1}}
+
+
+def test_histogram_per_class_pair():
+    rdf = PairCorrelation(2, 2.0, 4, 100.0)
+    classes = np.array([0, 0, 1])
+    rdf.begin()
+    rdf.add_pairs(np.array([[0, 1, 0.2], [1, 2, 1.2], [0, 2, 5.0]]), classes)
+    rdf.finish(classes, np.full((2, 2), 2.0))
+    counts = rdf.result()["counts"]
+    np.testing.assert_array_equal(counts[0, 0], [2, 0, 0, 0])
+    np.testing.assert_array_equal(counts[0, 1], [0, 0, 1, 0])
+    np.testing.assert_array_equal(counts[1, 0], counts[0, 1])
+    assert counts.sum() == 4
+    # listing both orders counts the same
+    ordered = PairCorrelation(2, 2.0, 4, 100.0)
+    ordered.add_pairs(np.array([[0, 1, 0.2], [1, 0, 0.2], [1, 2, 1.2], [2, 1, 1.2]]), classes, ordered=True)
+    np.testing.assert_array_equal(ordered.result()["counts"], counts)
+
+
+def test_uniform_particles_are_uncorrelated():
+    ps = create_system(attracting, rdf_interval=1)
+    ps.move_particles()
+    result = ps.pair_correlation
+    assert result["samples"] == 1 and result["r"].shape == (10,)
+    np.testing.assert_allclose(result["g_total"], 1, atol=0.1)
+    np.testing.assert_allclose(result["g"][:, :, 2:], 1, atol=0.15)
+
+
+def test_interval_and_average():
+    ps = create_system(attracting, rdf_interval=2)
+    assert ps.pair_correlation["samples"] == 0
+    for _ in range(4):
+        ps.move_particles()
+    assert ps.pair_correlation["samples"] == 2
+
+
+def test_unsearched_distances_are_undefined():
+    ps = create_system({(1, 1): {"value": 1}, (1, 2): {"value": 0}, (2, 1): {"value": 0}, (2, 2): {"value": 0}}, rdf_interval=1)
+    ps.move_particles()
+    g = ps.pair_correlation["g"]
+    # inactive class pairs are searched up to 0.3 * interaction_radius, 3 of 10 bins
+    assert not np.isnan(g[0, 0]).any()
+    assert not np.isnan(g[0, 1, :3]).any() and np.isnan(g[0, 1, 3:]).all()
+    assert np.isnan(g[1, 1, 3:]).all()
+
+
+def test_chunked_step_matches():
+    reference = create_system(attracting, rdf_interval=1)
+    reference.move_particles()
+    ps = create_system(attracting, rdf_interval=1, memory_budget=20 * PAIR_BYTES * 40)
+    ps.move_particles()
+    np.testing.assert_array_equal(ps.pair_correlation["counts"], reference.pair_correlation["counts"])
+
+
+def test_ensemble_rejects_rdf():
+    color_distribution = {"key1": {"color": (1.0, 0.0, 0.0, 1.0), "n": 10, "mass": 1, "bounciness": 0.8}}
+    with pytest.raises(ValueError):
+        Ensemble(100, 100, color_distribution, [{(1, 1): {"value": 1}}], [0], rdf_interval=1)
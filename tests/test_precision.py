@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+import ParticleSystem as particle_system
+from ParticleSystem import ParticleSystem
+
+color_distribution = {
+    "key1": { "color": (1.0, 0.0, 0.0, 1.0), "n": 150, "mass": 1, "bounciness": 0.8,},
+    "key2": { "color": (0.0, 1.0, 0.0, 1.0), "n": 100, "mass": 3, "bounciness": 1.0,},
+}
+
+relationships = {(1, 1): {"value": 2}, (1, 2): {"value": -3}, (2, 1): {"value": 1}, (2, 2): {"value": 0}}
+
+
+def create_system(**kwargs):
+    np.random.seed(0)
+    return ParticleSystem(100, 80, color_distribution, relationships, radius=0.5, delta_t=0.01, dtype=np.float32, **kwargs)
+
+
+def test_invalid_dtype():
+    with pytest.raises(ValueError):
+        ParticleSystem(100, 80, color_distribution, relationships, dtype=np.int32)
+
+
+def test_float32_particle_limit(monkeypatch):
+    """Pair lists hold particle indices as floats, float32 systems must not outgrow their exact range."""
+    assert np.float32(particle_system.MAX_FLOAT32_PARTICLES + 1) == particle_system.MAX_FLOAT32_PARTICLES
+    monkeypatch.setattr(particle_system, "MAX_FLOAT32_PARTICLES", 260)
+    with pytest.raises(ValueError, match="float32"):
+        ParticleSystem(100, 80, {**color_distribution, "key3": {**color_distribution["key1"], "n": 20}}, relationships, dtype=np.float32)
+    ps = create_system()
+    ps.add_particles(1, 10)
+    with pytest.raises(ValueError, match="float32"):
+        ps.add_particles(1, 1)
+    ParticleSystem(100, 80, {**color_distribution, "key3": {**color_distribution["key1"], "n": 20}}, relationships)
+
+
+@pytest.mark.parametrize("options", [
+    {"neighbor_strategy": "kdtree"},
+    {"neighbor_strategy": "brute"},
+    {"neighbor_strategy": "cells", "integrator": "verlet"},
+    {"neighbor_strategy": "kdtree", "integrator": "semi_implicit", "swept": True},
+    {"neighbor_strategy": "kdtree", "memory_budget": 20000},
+    {"neighbor_strategy": "kdtree", "reorder_interval": 1, "adaptive_dt": (0.001, 0.05)},
+], ids=["kdtree", "brute", "cells-verlet", "swept", "chunked", "reordered-adaptive"])
+def test_state_stays_float32(options):
+    ps = create_system(**options)
+    for _ in range(3):
+        ps.move_particles()
+    for array in (ps._particles, ps._velocity, ps._colors, ps._restitution, ps._mass, ps.size):
+        assert array.dtype == np.float32
+    if ps.integrator.commit_drift:
+        assert ps.integrator._acc.dtype == np.float32
+
+
+def test_kernels_stay_float32():
+    ps = create_system(neighbor_strategy="kdtree")
+    coll = ps.find_neighbor_pairs(ps.positions)
+    assert coll.dtype == np.float32 and coll.shape[0] > 0
+    i_idx, j_idx = coll[:, 0].astype(int), coll[:, 1].astype(int)
+    assert ps.check_collisions(ps.positions, 2.0).dtype == np.float32
+    assert ps.force(coll[:, 2], ps.pair_coefficients(i_idx, j_idx)).dtype == np.float32
+    assert ps.pair_forces(i_idx, j_idx, coll[:, 2], coll[:, 3:]).dtype == np.float32
+    assert ps.resolve_contacts(ps.positions, i_idx, j_idx, coll[:, 2], coll[:, 3:]).dtype == np.float32
+    assert ps._velocity.dtype == np.float32
+    assert ps.stream_pairs(ps.positions)[0].dtype == np.float32
+
+
+def test_wrap_around():
+    """Coordinates that round to the box size in float32 must still land inside [0, width) x [0, height)."""
+    ps = create_system()
+    positions = np.array([[-1e-9, -1e-9], [100, 80], [100.001, 80.001], [-100, -80], [250.5, -0.25]], dtype=np.float32)
+    wrapped = ps._wrap_around(positions)
+    assert wrapped.dtype == np.float32
+    assert np.all(wrapped >= 0) and np.all(wrapped < ps._box)
+    np.testing.assert_allclose(wrapped[4], [50.5, 79.75])
+
+
+def test_head_on_collision():
+    """An elastic head-on collision of equal masses swaps the velocities and separates the particles."""
+    ps = create_system()
+    ps._particles[:2] = [[10.0, 10.0], [10.8, 10.0]]
+    ps._velocity[:2] = [[1.0, 0.0], [-1.0, 0.0]]
+    ps._restitution[:2] = 1
+    ps._mass[:2] = 1
+    coll = ps.pair_data(ps.positions, np.array([[0, 1]]))
+    corrected = ps.resolve_contacts(ps.positions, np.array([0]), np.array([1]), coll[:, 2], coll[:, 3:])
+    np.testing.assert_allclose(ps._velocity[:2], [[-1.0, 0.0], [1.0, 0.0]], atol=1e-6)
+    np.testing.assert_allclose(corrected[1, 0] - corrected[0, 0], 2 * ps._radius, atol=1e-5)
@@ -0,0 +1,90 @@
+import struct
+import zlib
+import numpy as np
+import Rasterizer
+from ParticleSystem import ParticleSystem
+from Rasterizer import FrameRenderer, disc_offsets, encode_png, rasterize, record
+
+BACKGROUND = (0.0, 0.0, 0.0, 1.0)
+
+
+def decode_png(data):
+    """Decodes the PNG files written by encode_png (a single IDAT chunk, no filters)."""
+    width, height = struct.unpack(">II", data[16:24])
+    start = data.index(b"IDAT")
+    length = struct.unpack(">I", data[start - 4:start])[0]
+    raw = np.frombuffer(zlib.decompress(data[start + 4:start + 4 + length]), dtype=np.uint8)
+    return raw.reshape(height, width * 4 + 1)[:, 1:].reshape(height, width, 4)
+
+
+def create_system():
+    np.random.seed(0)
+    color_distribution = {
+        "key1": {"color": (1.0, 0.0, 0.0, 1.0), "n": 150, "mass": 1, "bounciness": 0.8},
+        "key2": {"color": (0.0, 1.0, 0.0, 1.0), "n": 100, "mass": 3, "bounciness": 1.0},
+    }
+    relationships = {(1, 1): {"value": 2}, (1, 2): {"value": -3}, (2, 1): {"value": 1}, (2, 2): {"value": 0}}
+    return ParticleSystem(100, 80, color_distribution, relationships, radius=0.5, delta_t=0.01, neighbor_strategy="kdtree")
+
+
+def test_disc():
+    image = rasterize(np.array([[50.0, 40.0]]), np.array([[1.0, 0.5, 0.0, 1.0]]), np.array([5.0]), (100, 80), (200, 160), BACKGROUND)
+    covered = np.all(image == [255, 128, 0, 255], axis=2)
+    assert covered.sum() == disc_offsets(10)[0].shape[0]
+    assert abs(covered.sum() - np.pi * 10.5**2) < 0.05 * np.pi * 10.5**2
+    rows, cols = np.nonzero(covered)
+    assert rows.mean() == 79 and cols.mean() == 100     # y points up
+    assert np.all(image[~covered] == [0, 0, 0, 255])
+
+
+def test_periodic_wrap_and_order():
+    positions = np.array([[0.0, 0.0], [0.0, 0.0]])
+    colors = np.array([[1.0, 0.0, 0.0, 1.0], [0.0, 0.0, 1.0, 0.5]])
+    image = rasterize(positions, colors, np.array([2.0, 2.0]), (100, 80), (100, 80), BACKGROUND)
+    # the later, half transparent particle is on top, blended with the background
+    blue = [0, 0, 128, 255]
+    for corner in (image[-1, 0], image[-1, -1], image[0, 0], image[0, -1]):
+        np.testing.assert_array_equal(corner, blue)
+    assert not np.any(np.all(image == [255, 0, 0, 255], axis=2))
+
+
+def test_chunks_match_single_pass(monkeypatch):
+    """Large discs are splatted in chunks of a few particles, overlapping discs keep their storage order."""
+    ps = create_system()
+    sizes = np.full(ps.positions.shape[0], 3.0)
+    whole = rasterize(ps.positions, ps.colors, sizes, (100, 80), (200, 160), BACKGROUND)
+    monkeypatch.setattr(Rasterizer, "PIXEL_BUDGET", 200)
+    np.testing.assert_array_equal(rasterize(ps.positions, ps.colors, sizes, (100, 80), (200, 160), BACKGROUND), whole)
+
+
+def test_png_roundtrip():
+    image = np.random.default_rng(0).integers(0, 256, (7, 5, 4), dtype=np.uint8)
+    data = encode_png(image)
+    assert data.startswith(b"\x89PNG")
+    np.testing.assert_array_equal(decode_png(data), image)
+
+
+def test_pool_matches_serial(tmp_path):
+    ps = create_system()
+    frames = list(record(ps, 4))
+    scene = (ps.colors, ps.size, (100, 80), (64, 48))
+    with FrameRenderer(*scene, workers=0) as renderer:
+        serial = list(renderer.render(frames))
+    with FrameRenderer(*scene, workers=2) as renderer:
+        pooled = list(renderer.render(iter(frames)))
+        paths = renderer.write_images(frames, str(tmp_path))
+    assert len(pooled) == 4
+    for a, b in zip(serial, pooled):
+        np.testing.assert_array_equal(a, b)
+    assert [p.rsplit("/", 1)[1] for p in paths] == [f"frame_{k:06d}.png" for k in range(4)]
+    with open(paths[2], "rb") as f:
+        np.testing.assert_array_equal(decode_png(f.read()), serial[2])
+
+
+def test_raw_frames():
+    import io
+    ps = create_system()
+    stream = io.BytesIO()
+    with FrameRenderer(ps.colors, ps.size, (100, 80), (32, 16), workers=0) as renderer:
+        assert renderer.write_raw(record(ps, 6, every=2), stream) == 3
+    assert len(stream.getvalue()) == 3 * 32 * 16 * 4
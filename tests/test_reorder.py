@@ -0,0 +1,71 @@
+import numpy as np
+from ParticleSystem import ParticleSystem
+
+color_distribution = {
+    "key1": { "color": (1.0, 0.0, 0.0, 1.0), "n": 200, "mass": 1, "bounciness": 1.0,},
+    "key2": { "color": (0.0, 0.0, 1.0, 1.0), "n": 100, "mass": 3, "bounciness": 0.5,}
+}
+
+relationships = {
+    (1, 1): {"value": 0},
+    (1, 2): {"value": 2},
+    (2, 1): {"value": -1},
+    (2, 2): {"value": 0},
+}
+
+
+def create_system(**kwargs):
+    return ParticleSystem(
+        width=100,
+        height=80,
+        color_distribution=color_distribution,
+        interaction_matrix=relationships,
+        radius=1,
+        **kwargs
+    )
+
+
+def test_reorder_keeps_particle_attributes_together():
+    """Reordering permutes all arrays consistently and keeps the ID mapping valid."""
+    ps = create_system()
+    positions = ps.positions.copy()
+    colors = ps.colors
+    masses = ps._mass.copy()
+    velocities = ps._velocity.copy()
+    ps.reorder_particles()
+
+    assert ps.colors is colors, "Colors must be permuted in place to keep renderer references valid"
+    np.testing.assert_array_equal(ps.positions[ps.slots], positions)
+    np.testing.assert_array_equal(ps._mass[ps.slots], masses)
+    np.testing.assert_array_equal(ps._velocity[ps.slots], velocities)
+    np.testing.assert_array_equal(ps.ids[ps.slots], np.arange(positions.shape[0]))
+
+
+def test_reorder_sorts_along_curve():
+    for curve in ("morton", "cell"):
+        ps = create_system(reorder_curve=curve)
+        ps.reorder_particles()
+        keys = ps._spatial_keys(ps.positions)
+        assert np.all(np.diff(keys.astype(np.int64)) >= 0), f"{curve} keys are not sorted after reordering"
+
+
+def test_reorder_preserves_pairs():
+    """The neighbor pairs found after reordering are the same pairs of external IDs."""
+    ps = create_system()
+    before = ps.check_collisions(ps.positions, 5)
+    ps.reorder_particles()
+    after = ps.check_collisions(ps.positions, 5)
+
+    def id_pairs(arr, ids):
+        pairs = np.sort(ids[arr[:, :2].astype(int)], axis=1)
+        return set(map(tuple, pairs))
+    assert id_pairs(before, np.arange(ps.ids.shape[0])) == id_pairs(after, ps.ids)
+
+
+def test_reorder_interval_in_move_particles():
+    ps = create_system(reorder_interval=2)
+    for _ in range(3):
+        ps.move_particles()
+    assert ps._step == 3
+    assert not np.array_equal(ps.ids, np.arange(ps.ids.shape[0])), "Particles should have been reordered"
+    assert np.all(np.isfinite(ps.positions))
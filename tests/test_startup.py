@@ -0,0 +1,30 @@
+import json
+import os
+import subprocess
+import sys
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), "../src"))
+
+
+def loaded_after(statement):
+    """Returns the top-level modules imported by `statement` in a fresh interpreter."""
+    script = f"import json, sys\n{statement}\nprint(json.dumps(sorted({{m.split('.')[0] for m in sys.modules}})))"
+    out = subprocess.run([sys.executable, "-c", script], cwd=SRC, check=True, capture_output=True, text=True).stdout
+    return set(json.loads(out.strip().splitlines()[-1]))
+
+
+def test_import_defers_heavy_modules():
+    loaded = loaded_after("import ParticleSystem, Clusters, Rasterizer")
+    assert not loaded & {"scipy", "matplotlib", "vispy"}
+
+
+def test_scipy_loaded_at_first_search():
+    setup = """
+import numpy as np
+from ParticleSystem import ParticleSystem
+cd = {"key1": {"color": (1.0, 0.0, 0.0, 1.0), "n": 50, "mass": 1, "bounciness": 0.8}}
+ps = ParticleSystem(50, 50, cd, {(1, 1): {"value": 1}}, radius=0.5, delta_t=0.01, neighbor_strategy="kdtree")
+assert "scipy" not in sys.modules
+ps.move_particles()
+"""
+    assert "scipy" in loaded_after(setup)
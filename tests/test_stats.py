@@ -0,0 +1,67 @@
+import numpy as np
+from ParticleSystem import ParticleSystem, PAIR_BYTES
+from StepStats import StepStats
+
+color_distribution = {
+    "key1": { "color": (1.0, 0.0, 0.0, 1.0), "n": 300, "mass": 1, "bounciness": 1.0,},
+    "key2": { "color": (0.0, 0.0, 1.0, 1.0), "n": 200, "mass": 2, "bounciness": 0.5,}
+}
+
+relationships = {
+    (1, 1): {"value": 0},
+    (1, 2): {"value": 3},
+    (2, 1): {"value": -2},
+    (2, 2): {"value": 0},
+}
+
+
+def create_system(**kwargs):
+    return ParticleSystem(
+        width=100,
+        height=80,
+        color_distribution=color_distribution,
+        interaction_matrix=relationships,
+        radius=.5,
+        delta_t=0.01,
+        **kwargs
+    )
+
+
+def test_stats_disabled_by_default():
+    ps = create_system()
+    ps.move_particles()
+    assert ps.stats.steps == 0
+    assert ps.stats.summary() == {}
+
+
+def test_stats_record_phases_and_counts():
+    ps = create_system(instrument=True)
+    for _ in range(5):
+        ps.move_particles()
+    assert ps.stats.steps == 5
+    summary = ps.stats.summary()
+    assert set(summary) == set(StepStats.PHASES) | {"total"} | set(StepStats.COUNTERS)
+    assert summary["pairs"]["mean"] > 0
+    assert set(summary["total"]) == {"mean", "p50", "p90", "p99"}
+    latest = ps.stats.latest
+    assert sum(latest[phase] for phase in StepStats.PHASES) <= latest["total"]
+    assert latest["neighbor_search"] > 0 and latest["force"] > 0
+
+
+def test_stats_toggle_and_chunked():
+    ps = create_system(memory_budget=30 * PAIR_BYTES * 40)
+    ps.move_particles()
+    ps.stats.enabled = True
+    ps.move_particles()
+    assert ps.stats.steps == 1
+    assert ps.stats.latest["pairs"] > 0
+
+
+def test_stats_ring_buffer():
+    stats = StepStats(window=4, enabled=True)
+    for k in range(10):
+        stats.begin()
+        stats.count("pairs", k)
+        stats.end()
+    assert stats.steps == 10
+    np.testing.assert_allclose(stats.summary()["pairs"]["mean"], np.mean([6, 7, 8, 9]))
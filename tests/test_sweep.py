@@ -0,0 +1,82 @@
+import os
+import numpy as np
+import pytest
+from Sweep import ResultCache, build_system, cluster_metrics, config_key, grid, random_configs, run_config, run_sweep
+
+base = {"width": 60, "height": 60, "steps": 5, "counts": [20, 10], "masses": [1, 2], "restitutions": [0.5, 1.0], "matrix": [[1, -2], [3, 0]]}
+
+
+def test_grid():
+    configs = grid(base, seed=[0, 1], masses=[[1, 1], [2, 2], [3, 3]])
+    assert len(configs) == 6
+    assert {(c["seed"], tuple(c["masses"])) for c in configs} == {(s, (m, m)) for s in (0, 1) for m in (1, 2, 3)}
+
+
+def test_random_configs_in_gui_ranges():
+    configs = random_configs(base, 10, classes=3, seed=1)
+    assert len(configs) == 10
+    for config in configs:
+        assert np.all(np.abs(config["matrix"]) <= 5) and len(config["matrix"]) == 3
+        assert all(1 <= m <= 10 for m in config["masses"])
+    assert random_configs(base, 10, classes=3, seed=1) == configs
+
+
+def test_config_key():
+    assert config_key(base) == config_key(dict(reversed(list(base.items()))))
+    assert config_key(base) != config_key({**base, "seed": 1})
+    # defaults are part of the key, spelling them out gives the same key
+    assert config_key(base) == config_key({**base, "seed": 0})
+
+
+def test_config_key_with_dtype_option():
+    single = {**base, "options": {"dtype": np.float32}}
+    assert config_key(single) == config_key({**base, "options": {"dtype": np.dtype("float32")}})
+    assert config_key(single) != config_key({**base, "options": {"dtype": np.float64}})
+    assert run_config(single)["kinetic_energy"] > 0
+
+
+def test_build_system():
+    ps = build_system(base)
+    assert ps.positions.shape == (30, 2)
+    assert ps.pair_coefficients(np.array([0]), np.array([25]))[0] == -2 / 5
+
+
+def test_run_config_deterministic():
+    assert run_config(base) == run_config(base)
+
+
+def test_cluster_metrics():
+    ps = build_system(base)
+    # two groups further apart than the link distance of 30, also across the periodic boundary
+    ps._particles[:] = 45
+    ps._particles[:5] = [[15.0 + k, 15.0] for k in range(5)]
+    metrics = cluster_metrics(ps)
+    assert metrics["clusters"] == 2
+    assert metrics["largest_cluster"] == 25 / 30
+    assert metrics["clustered_fraction"] == 1.0
+
+
+def test_sweep_uses_cache(tmp_path):
+    configs = grid(base, seed=[0, 1, 2])
+    cache = ResultCache(str(tmp_path))
+    results = run_sweep(configs, cache, workers=2)
+    assert cache.hits == 0 and len(os.listdir(tmp_path)) == 3
+    assert [r["key"] for r in results] == [config_key(c) for c in configs]
+    # reductions may round differently in the worker process
+    assert results[0]["kinetic_energy"] == pytest.approx(run_config(configs[0])["kinetic_energy"], rel=1e-12)
+
+    cache = ResultCache(str(tmp_path))
+    again = run_sweep(configs + [{**base, "seed": 3}], cache, workers=2)
+    assert cache.hits == 3 and cache.misses == 1
+    assert again[:3] == results
+
+
+def test_cache_lru_eviction(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=3 * 100)
+    for key in "abc":
+        cache.put(key, {"payload": "x" * 80})
+        os.utime(tmp_path / f"{key}.json", ns=(0, {"a": 1, "b": 2, "c": 3}[key]))
+    cache.get("a")          # "b" is now the least recently used entry
+    cache.put("d", {"payload": "x" * 80})
+    assert cache.get("b") is None
+    assert all(cache.get(key) is not None for key in "acd")
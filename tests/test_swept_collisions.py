@@ -0,0 +1,75 @@
+import numpy as np
+from ParticleSystem import ParticleSystem
+
+color_distribution = {
+    "key1": { "color": (1.0, 0.0, 0.0, 1.0), "n": 2, "mass": 1, "bounciness": 1.0,}
+}
+
+relationships = {(1, 1): {"value": 0}}
+
+
+def create_system(**kwargs):
+    ps = ParticleSystem(
+        width=100,
+        height=100,
+        color_distribution=color_distribution,
+        interaction_matrix=relationships,
+        radius=1,
+        delta_t=0.01,
+        brownian_std=0,
+        **kwargs
+    )
+    # two particles 10 apart moving head-on by 10 each per step, they swap places within one step
+    ps._particles = np.array([[10.0, 50.0], [20.0, 50.0]])
+    ps._velocity = np.array([[1000.0, 0.0], [-1000.0, 0.0]])
+    return ps
+
+
+def test_static_detection_misses_fast_particles():
+    ps = create_system()
+    end = ps._particles + ps._velocity * ps.delta_t
+    assert ps.check_collisions(end, 2 * ps._radius).size == 0
+
+
+def test_sweep_collisions_head_on():
+    """
+    The gap of 8 between the surfaces closes at 20 per step, so the impact happens at s = 0.4.
+    With restitution 1 and equal masses the velocities swap and both particles bounce back
+    for the remaining 0.6 of the step: p0 = 10 + 4 - 6 = 8 and p1 = 20 - 4 + 6 = 22.
+    """
+    ps = create_system(swept=True)
+    positions, involved, overlaps = ps.sweep_collisions(ps._velocity * ps.delta_t)
+    np.testing.assert_allclose(ps._velocity, [[-1000.0, 0.0], [1000.0, 0.0]], atol=1e-6)
+    np.testing.assert_allclose(positions, [[8.0, 50.0], [22.0, 50.0]], atol=1e-6)
+    assert involved.all()
+    np.testing.assert_allclose(overlaps, [0.0], atol=1e-9)
+
+
+def test_sweep_without_contacts():
+    ps = create_system(swept=True)
+    ps._velocity = np.array([[0.0, 1000.0], [0.0, 1000.0]])
+    positions, involved, overlaps = ps.sweep_collisions(ps._velocity * ps.delta_t)
+    np.testing.assert_allclose(positions, [[10.0, 60.0], [20.0, 60.0]])
+    assert not involved.any() and overlaps.size == 0
+
+
+def test_sweep_chain_in_time_order():
+    """A fast particle hits a resting one which then hits a third, all within one step."""
+    ps = create_system(swept=True)
+    ps._particles = np.array([[10.0, 50.0], [20.0, 50.0], [30.0, 50.0]])
+    ps._velocity = np.array([[2000.0, 0.0], [0.0, 0.0], [0.0, 0.0]])
+    ps._mass = np.ones(3)
+    ps._restitution = np.ones(3)
+    ps._color_index = np.ones((3, 1), dtype=int)
+    positions, involved, _ = ps.sweep_collisions(ps._velocity * ps.delta_t)
+    # momentum is handed down the chain, only the last particle keeps moving
+    np.testing.assert_allclose(ps._velocity, [[0.0, 0.0], [0.0, 0.0], [2000.0, 0.0]], atol=1e-6)
+    assert involved.all()
+    assert np.all(np.diff(positions[:, 0]) >= 2 * ps._radius - 1e-9), "Particles must not pass through each other"
+
+
+def test_swept_mode_in_move_particles():
+    ps = create_system(swept=True, diagnostics=True)
+    ps.move_particles()
+    assert ps.diagnostics["contacts"] > 0
+    assert np.all(np.isfinite(ps.positions))